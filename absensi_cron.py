@@ -0,0 +1,227 @@
+"""
+Mode sekali jalan untuk cron / systemd timer.
+
+Tidak ada proses yang menunggu seharian: setiap dijalankan, script ini
+membaca jadwal hari ini dari STATE_FILE, mengerjakan absen yang jadwalnya
+sudah tiba (atau tiba dalam --tenggang detik ke depan), lalu keluar.
+Jika tidak ada yang perlu dikerjakan, requests dan absensi_inp tidak
+di-import sama sekali sehingga start cukup beberapa milidetik.
+
+Kredensial (tanpa input interaktif):
+    env ABSENSI_USERNAME + ABSENSI_PASSWORD, atau
+    file akun JSON (--akun, format sama dengan absensi_multi.py)
+
+Contoh systemd timer (tiap menit di sekitar jendela absen):
+    [Timer]
+    OnCalendar=Mon..Sat *-*-* 00,07,08,17:*:00
+    [Service]
+    Type=oneshot
+    ExecStart=/usr/bin/python3 /opt/absensi/absensi_cron.py --run-due
+
+Contoh crontab:
+    * 0,7,8,17 * * 1-6 cd /opt/absensi && python3 absensi_cron.py --run-due
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from absensi_state import StateStore
+
+# ======== KONFIGURASI =========
+AKUN_FILE = "akun.json"
+STATE_FILE = "absensi_state.db"
+
+HARI_ALLOWED = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+
+# Absen yang jadwalnya tiba dalam sekian detik ke depan ditunggu lalu dikerjakan
+TENGGANG_DETIK = 60
+
+SESI = (
+    ("Pagi", "waktu_pagi", "jam_datang"),
+    ("Sore", "waktu_sore", "jam_pulang"),
+)
+
+# ======== KREDENSIAL =========
+def muat_kredensial(path=AKUN_FILE):
+    """Return list (username, password) dari env atau file akun JSON"""
+    username = os.environ.get("ABSENSI_USERNAME", "").strip()
+    password = os.environ.get("ABSENSI_PASSWORD", "").strip()
+    if username and password:
+        return [(username, password)]
+
+    import json     # hanya dibutuhkan jika kredensial dari file
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    daftar = []
+    for item in data:
+        username = str(item.get("username", "")).strip()
+        password = str(item.get("password", "")).strip()
+        if username and password:
+            daftar.append((username, password))
+    return daftar
+
+# ======== JADWAL =========
+def cari_jatuh_tempo(store, daftar_akun, waktu, tenggang):
+    """
+    Return (jatuh_tempo, berikutnya, tanpa_jadwal):
+    jatuh_tempo  list (jadwal, username, password, sesi) yang harus dikerjakan sekarang
+    berikutnya   jadwal paling dekat setelah tenggang (None jika tidak ada)
+    tanpa_jadwal username yang belum punya jadwal hari ini
+    """
+    hari_ini = waktu.date()
+    batas = waktu + timedelta(seconds=tenggang)
+    jatuh_tempo, tanpa_jadwal = [], []
+    berikutnya = None
+
+    for username, password in daftar_akun:
+        state = store.ambil(username, hari_ini)
+        if not state or not state["waktu_pagi"] or not state["waktu_sore"]:
+            tanpa_jadwal.append(username)
+            continue
+        if state["tunda"]:
+            continue
+
+        terlewat = store.terlewat(username, hari_ini)
+        for sesi, kolom_jadwal, kolom_jam in SESI:
+            if state[kolom_jam]:
+                continue
+            if sesi in terlewat:
+                continue    # jendela pagi sudah lewat, sore tetap dicoba di jendelanya
+            jadwal = datetime.fromisoformat(state[kolom_jadwal])
+            if jadwal <= batas:
+                jatuh_tempo.append((jadwal, username, password, sesi))
+            elif berikutnya is None or jadwal < berikutnya:
+                berikutnya = jadwal
+            break       # sore baru dikerjakan setelah pagi tercatat
+
+    jatuh_tempo.sort(key=lambda x: x[0])
+    return jatuh_tempo, berikutnya, tanpa_jadwal
+
+def kunci_run(state_file):
+    """
+    Lock file di samping STATE_FILE agar dua run (cron lambat + run berikutnya)
+    tidak mengerjakan absen yang sama. Return file lock (tetap dibuka selama run),
+    atau None jika run lain masih memegang lock
+    """
+    f = open(state_file + ".lock", "a")
+    try:
+        if os.name == "nt":
+            # Windows tidak punya fcntl: kunci byte pertama, dilepas OS saat proses selesai
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+def muat_absensi(state_file):
+    """Import absensi_inp (dan requests) hanya saat benar-benar ada pekerjaan"""
+    import absensi_inp
+    absensi_inp.STATE_FILE = state_file
+    return absensi_inp
+
+# ======== EKSEKUSI =========
+def kerjakan(absensi, store, jatuh_tempo, banyak_akun):
+    """Kerjakan absen yang jatuh tempo secara berurutan, return jumlah yang gagal"""
+    gagal = 0
+    for jadwal, username, password, sesi in jatuh_tempo:
+        if banyak_akun:
+            absensi.AKUN_AKTIF.set(username)
+
+        tunggu = (jadwal - datetime.now()).total_seconds()
+        if tunggu > 0:
+            time.sleep(tunggu)
+
+        hari_ini = datetime.now().date()
+        if store.tunda(username, hari_ini):
+            absensi.tulis_log(f"[TUNDA] Absensi {sesi.lower()} ditunda, dilewati")
+            continue
+
+        status = absensi.cek_status_absensi(username, password)
+        if status is None:
+            absensi.tulis_log("[ERROR] Tidak dapat mengecek status absensi, dicoba lagi di run berikutnya")
+            gagal += 1
+            continue
+        if status.get("jam_datang" if sesi == "Pagi" else "jam_pulang"):
+            absensi.tulis_log(f"[COMPLETE] Absen {sesi.lower()} sudah tercatat di server")
+            continue
+
+        if datetime.now() > absensi.batas_sesi(sesi):
+            absensi.tulis_log(f"[FAILED] Jendela absen {sesi.lower()} sudah lewat")
+            store.tandai_terlewat(username, hari_ini, sesi)
+            gagal += 1
+            continue
+
+        absensi.tulis_log(f"[ACTION] Waktu absen {sesi.lower()} tiba! (mode cron)")
+        if not absensi.login_dan_absen(sesi, username, password):
+            absensi.tulis_log(f"[FAILED] Gagal absen {sesi.lower()}")
+            if datetime.now() > absensi.batas_sesi(sesi):
+                store.tandai_terlewat(username, hari_ini, sesi)
+            gagal += 1
+    return gagal
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan absen yang jatuh tempo sekarang lalu keluar (untuk cron/systemd timer)")
+    parser.add_argument("--run-due", action="store_true", help="kerjakan absen yang jatuh tempo (default)")
+    parser.add_argument("--cek", action="store_true", help="hanya tampilkan yang jatuh tempo, tanpa absen")
+    parser.add_argument("--akun", default=AKUN_FILE, help="file akun JSON jika env ABSENSI_USERNAME/ABSENSI_PASSWORD kosong")
+    parser.add_argument("--state", default=STATE_FILE, help="file state SQLite")
+    parser.add_argument("--tenggang", type=float, default=TENGGANG_DETIK, help="detik ke depan yang ikut dikerjakan")
+    args = parser.parse_args()
+
+    try:
+        daftar_akun = muat_kredensial(args.akun)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Kredensial tidak ditemukan (env ABSENSI_USERNAME/ABSENSI_PASSWORD atau {args.akun}): {str(e)}")
+        sys.exit(1)
+    if not daftar_akun:
+        print("[ERROR] Tidak ada akun yang valid!")
+        sys.exit(1)
+
+    sekarang = datetime.now()
+    if sekarang.strftime("%A").lower() not in HARI_ALLOWED:
+        return
+
+    kunci = None    # lock dilepas saat proses keluar
+    if not args.cek:
+        kunci = kunci_run(args.state)
+        if kunci is None:
+            print("[CRON] Run sebelumnya masih berjalan, keluar")
+            return
+
+    store = StateStore(args.state)
+    absensi = None
+
+    jatuh_tempo, berikutnya, tanpa_jadwal = cari_jatuh_tempo(store, daftar_akun, sekarang, args.tenggang)
+    if tanpa_jadwal and not args.cek:
+        # Sekali sehari: jadwal semua akun dibagi rata lalu disimpan ke state
+        absensi = muat_absensi(args.state)
+        absensi.rencanakan_jadwal(tanpa_jadwal)
+        jatuh_tempo, berikutnya, _ = cari_jatuh_tempo(store, daftar_akun, sekarang, args.tenggang)
+
+    if args.cek:
+        for jadwal, username, _, sesi in jatuh_tempo:
+            print(f"[CRON] Jatuh tempo: {username} {sesi.lower()} {jadwal:%H:%M:%S}")
+        for username in tanpa_jadwal:
+            print(f"[CRON] Belum ada jadwal hari ini: {username}")
+        if berikutnya:
+            print(f"[CRON] Jadwal berikutnya: {berikutnya:%H:%M:%S}")
+        return
+
+    if not jatuh_tempo:
+        return
+
+    absensi = absensi or muat_absensi(args.state)
+    gagal = kerjakan(absensi, store, jatuh_tempo, len(daftar_akun) > 1)
+    absensi.LOG_WRITER.tutup()
+    sys.exit(1 if gagal else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""
+Ekspor history absensi semua akun ke file kolom, lalu laporan armada.
+
+    python absensi_ekspor.py ekspor [--akun akun.json] [--output absensi_history.npz]
+    python absensi_ekspor.py ekspor --dari-cache      (dari cache history STATE_FILE, tanpa request)
+    python absensi_ekspor.py laporan [absensi_history.npz] [--dari 2026-01-01] [--sampai 2026-03-31]
+
+Format file mengikuti ekstensi output:
+    .parquet  Apache Parquet (butuh pyarrow)
+    .npz      arsip kolom NumPy, tetap bisa ditulis/dibaca tanpa NumPy
+
+Kolom: akun (indeks ke akun_nama), tanggal (hari sejak 1970-01-01),
+datang dan pulang (detik sejak 00:00, -1 = tidak ada).
+History tiap akun dibaca streaming (absensi_history.baca_records) dan
+sekalian disimpan ke cache history di STATE_FILE. Laporan dihitung dengan
+operasi vektor NumPy, atau loop Python biasa jika NumPy tidak terpasang.
+"""
+import argparse
+import ast
+import bisect
+import sys
+import zipfile
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:     # opsional: tanpa NumPy kolom memakai array dan laporan memakai loop Python
+    np = None
+
+import absensi_history
+import absensi_inp
+from absensi_cron import muat_kredensial, AKUN_FILE
+from absensi_inp import tulis_log, PAGI_START, PAGI_END
+
+# ======== KONFIGURASI =========
+EKSPOR_FILE = "absensi_history.npz"
+EKSPOR_KONKUREN = 10        # akun yang diambil history-nya bersamaan
+EKSPOR_RETRY = 5
+HISTOGRAM_MENIT = 5         # lebar bucket distribusi jam datang di dalam jendela pagi
+LAPORAN_TOP = 10
+
+_EPOCH = date(1970, 1, 1).toordinal()
+_MINGGU = 6
+
+def _hari(tanggal):
+    """'2026-01-05' -> hari sejak 1970-01-01"""
+    return date.fromisoformat(tanggal).toordinal() - _EPOCH
+
+def _detik(jam):
+    """'07:51:02' -> detik sejak 00:00, -1 jika kosong/tidak valid"""
+    try:
+        jam, menit, detik = str(jam).split(":")
+        return int(jam) * 3600 + int(menit) * 60 + int(float(detik))
+    except (TypeError, ValueError):
+        return -1
+
+def _jam(detik):
+    detik = int(detik)
+    return f"{detik // 3600:02d}:{detik % 3600 // 60:02d}:{detik % 60:02d}"
+
+def _tanggal(hari):
+    return date.fromordinal(int(hari) + _EPOCH).isoformat()
+
+# ======== KOLOM =========
+class KolomHistory:
+    """History semua akun dalam bentuk kolom array int32 (bukan dict per record)"""
+
+    KOLOM = ("akun", "tanggal", "datang", "pulang")
+
+    def __init__(self, akun_nama=None):
+        self.akun_nama = list(akun_nama or [])
+        self.akun = array("i")
+        self.tanggal = array("i")
+        self.datang = array("i")
+        self.pulang = array("i")
+
+    def __len__(self):
+        return len(self.akun)
+
+    def tambah(self, username, records):
+        """Tambah record (tanggal, jam_datang, jam_pulang) satu akun"""
+        kode = len(self.akun_nama)
+        self.akun_nama.append(username)
+        for tanggal, jam_datang, jam_pulang in records:
+            try:
+                hari = _hari(tanggal)
+            except ValueError:
+                continue
+            self.akun.append(kode)
+            self.tanggal.append(hari)
+            self.datang.append(_detik(jam_datang))
+            self.pulang.append(_detik(jam_pulang))
+
+# ======== FORMAT .npz =========
+# Tanpa NumPy, .npz ditulis/dibaca langsung (zip berisi file .npy versi 1.0)
+def _npy(descr, shape, data):
+    header = repr({"descr": descr, "fortran_order": False, "shape": shape}).encode("latin1")
+    header += b" " * (63 - (10 + len(header)) % 64) + b"\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header + data
+
+def _npy_kolom(kolom):
+    if sys.byteorder == "big":
+        kolom = array("i", kolom)
+        kolom.byteswap()
+    return _npy("<i4", (len(kolom),), kolom.tobytes())
+
+def _npy_teks(daftar):
+    lebar = max([1] + [len(teks) for teks in daftar])
+    data = b"".join(teks.encode("utf-32-le").ljust(4 * lebar, b"\0") for teks in daftar)
+    return _npy(f"<U{lebar}", (len(daftar),), data)
+
+def _baca_npy(data):
+    panjang = int.from_bytes(data[8:10], "little")
+    header = ast.literal_eval(data[10:10 + panjang].decode("latin1"))
+    isi = data[10 + panjang:]
+    descr = header["descr"]
+    if descr.startswith("<U"):
+        lebar = 4 * int(descr[2:])
+        return [isi[i:i + lebar].decode("utf-32-le").rstrip("\0") for i in range(0, len(isi), lebar)]
+    if descr != "<i4":
+        raise ValueError(f"Tipe kolom tidak didukung tanpa NumPy: {descr}")
+    kolom = array("i")
+    kolom.frombytes(isi)
+    if sys.byteorder == "big":
+        kolom.byteswap()
+    return kolom
+
+def _simpan_npz(kolom, path):
+    if np is not None:
+        np.savez_compressed(path, akun_nama=np.array(kolom.akun_nama, dtype=str),
+                            **{nama: np.asarray(getattr(kolom, nama), dtype=np.int32) for nama in KolomHistory.KOLOM})
+        return
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as arsip:
+        arsip.writestr("akun_nama.npy", _npy_teks(kolom.akun_nama))
+        for nama in KolomHistory.KOLOM:
+            arsip.writestr(f"{nama}.npy", _npy_kolom(getattr(kolom, nama)))
+
+def _muat_npz(path):
+    if np is not None:
+        with np.load(path) as data:
+            kolom = KolomHistory(data["akun_nama"].tolist())
+            for nama in KolomHistory.KOLOM:
+                setattr(kolom, nama, data[nama].astype(np.int32))
+        return kolom
+    with zipfile.ZipFile(path) as arsip:
+        kolom = KolomHistory(_baca_npy(arsip.read("akun_nama.npy")))
+        for nama in KolomHistory.KOLOM:
+            setattr(kolom, nama, _baca_npy(arsip.read(f"{nama}.npy")))
+    return kolom
+
+# ======== FORMAT .parquet =========
+def _simpan_parquet(kolom, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    akun = pa.DictionaryArray.from_arrays(pa.array(kolom.akun, type=pa.int32()), pa.array(kolom.akun_nama, type=pa.string()))
+    tabel = pa.table({
+        "akun": akun,
+        "tanggal": pa.array(kolom.tanggal, type=pa.int32()).cast(pa.date32()),
+        "datang": pa.array(kolom.datang, type=pa.int32()),
+        "pulang": pa.array(kolom.pulang, type=pa.int32()),
+    })
+    pq.write_table(tabel, path)
+
+def _muat_parquet(path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tabel = pq.read_table(path)
+    akun = tabel.column("akun").combine_chunks()
+    if not pa.types.is_dictionary(akun.type):
+        akun = akun.dictionary_encode()
+    kolom = KolomHistory(akun.dictionary.to_pylist())
+    nilai = {
+        "akun": akun.indices,
+        "tanggal": tabel.column("tanggal").combine_chunks().cast(pa.int32()),
+        "datang": tabel.column("datang").combine_chunks(),
+        "pulang": tabel.column("pulang").combine_chunks(),
+    }
+    for nama, data in nilai.items():
+        data = data.cast(pa.int32())
+        setattr(kolom, nama, data.to_numpy() if np is not None else array("i", data.to_pylist()))
+    return kolom
+
+def simpan(kolom, path):
+    if path.endswith(".parquet"):
+        _simpan_parquet(kolom, path)
+    elif path.endswith(".npz"):
+        _simpan_npz(kolom, path)
+    else:
+        raise ValueError(f"Format output tidak dikenal (pakai .npz atau .parquet): {path}")
+
+def muat(path):
+    if path.endswith(".parquet"):
+        return _muat_parquet(path)
+    if path.endswith(".npz"):
+        return _muat_npz(path)
+    raise ValueError(f"Format file tidak dikenal (pakai .npz atau .parquet): {path}")
+
+# ======== EKSPOR =========
+def ambil_history(username, password):
+    """Return list (tanggal, jam_datang, jam_pulang) seluruh history akun dari server, atau None"""
+    absensi_inp.AKUN_AKTIF.set(username)
+
+    def _ambil():
+        res = absensi_inp.SESSION_POOL.request(username, password, "GET", "absensi/history/kemarin", stream=True)
+        if res is None:
+            tulis_log("[ERROR] Login gagal saat ekspor history")
+            return None
+
+        with res:
+            if res.status_code >= 500 or res.status_code == 429:
+                res.raise_for_status()  # Gangguan server sementara, biarkan di-retry
+            if res.status_code != 200:
+                tulis_log(f"[ERROR] Gagal mengambil data history: {res.status_code}")
+                return None
+
+            potongan = res.iter_content(absensi_history.HISTORY_CHUNK)
+            return [(absensi_history.tanggal_record(record), record.get("jam_datang"), record.get("jam_pulang"))
+                    for record in absensi_history.baca_records(potongan, res.encoding or "utf-8")]
+
+    records = absensi_inp.execute_with_retry(_ambil, policy=absensi_inp.RetryPolicy(max_attempt=EKSPOR_RETRY))
+    store = absensi_inp.state_store()
+    if records and store:
+        store.simpan_history(username, records)
+    return records
+
+def ekspor(daftar_akun, konkuren=EKSPOR_KONKUREN, dari_cache=False):
+    """Kumpulkan history semua akun ke KolomHistory (urutan akun sesuai daftar)"""
+    kolom = KolomHistory()
+    gagal = 0
+
+    if dari_cache:
+        store = absensi_inp.state_store()
+        if store is None:
+            raise ValueError("STATE_FILE nonaktif, tidak ada cache history")
+        for username, _ in daftar_akun:
+            kolom.tambah(username, store.history_akun(username))
+        return kolom, gagal
+
+    with ThreadPoolExecutor(max_workers=konkuren, thread_name_prefix="ekspor") as executor:
+        hasil = executor.map(lambda akun: ambil_history(*akun), daftar_akun)
+        # Record satu akun langsung dipindah ke kolom, list-nya dibuang
+        for (username, _), records in zip(daftar_akun, hasil):
+            if records is None:
+                gagal += 1
+            kolom.tambah(username, records or [])
+    return kolom, gagal
+
+# ======== LAPORAN =========
+def _batas_histogram():
+    """Batas bucket jam datang: sebelum PAGI_START, tiap HISTOGRAM_MENIT di jendela pagi, sesudah PAGI_END"""
+    mulai = PAGI_START[0] * 3600 + PAGI_START[1] * 60
+    akhir = PAGI_END[0] * 3600 + PAGI_END[1] * 60
+    return list(range(mulai, akhir, HISTOGRAM_MENIT * 60)) + [akhir]
+
+def _persentil(terurut, p):
+    """Persentil interpolasi linear (sama dengan np.percentile default)"""
+    posisi = (len(terurut) - 1) * p / 100
+    bawah = int(posisi)
+    atas = min(bawah + 1, len(terurut) - 1)
+    return terurut[bawah] + (terurut[atas] - terurut[bawah]) * (posisi - bawah)
+
+def _statistik_numpy(kolom, dari, sampai, batas_telat, batas):
+    akun = np.asarray(kolom.akun, dtype=np.int64)
+    tanggal = np.asarray(kolom.tanggal, dtype=np.int64)
+    datang = np.asarray(kolom.datang, dtype=np.int64)
+    pulang = np.asarray(kolom.pulang, dtype=np.int64)
+    jumlah_akun = len(kolom.akun_nama)
+
+    # 1970-01-01 hari Kamis: (hari + 3) % 7 -> 0 = Senin .. 6 = Minggu
+    pilih = (tanggal >= dari) & (tanggal <= sampai) & ((tanggal + 3) % 7 != _MINGGU)
+    hadir = pilih & (datang >= 0)
+    telat = hadir & (datang > batas_telat)
+    semua_hari = np.arange(dari, sampai + 1)
+    hari_kerja = int(np.count_nonzero((semua_hari + 3) % 7 != _MINGGU))
+
+    jam_hadir = datang[hadir]
+    # bucket [batas[i-1], batas[i]): sebelum batas[0], tiap HISTOGRAM_MENIT, sesudah batas[-1] (= telat);
+    # tepat batas[-1] (PAGI_END) belum telat, jadi masuk bucket terakhir di dalam jendela
+    bucket = np.searchsorted(batas, jam_hadir, side="right")
+    bucket[jam_hadir == batas[-1]] -= 1
+    return {
+        "record": int(np.count_nonzero(pilih)),
+        "hari_kerja": hari_kerja,
+        "hadir": int(jam_hadir.size),
+        "tanpa_pulang": int(np.count_nonzero(hadir & (pulang < 0))),
+        "persentil": np.percentile(jam_hadir, [50, 90, 99]).tolist() if jam_hadir.size else [],
+        "histogram": np.bincount(bucket, minlength=len(batas) + 1).tolist(),
+        "telat_per_akun": np.bincount(akun[telat], minlength=jumlah_akun).tolist(),
+        "bolos_per_akun": (hari_kerja - np.bincount(akun[hadir], minlength=jumlah_akun)).tolist(),
+    }
+
+def _statistik_python(kolom, dari, sampai, batas_telat, batas):
+    jumlah_akun = len(kolom.akun_nama)
+    hari_kerja = sum(1 for hari in range(dari, sampai + 1) if (hari + 3) % 7 != _MINGGU)
+    record = tanpa_pulang = 0
+    jam_hadir = []
+    histogram = [0] * (len(batas) + 1)
+    telat_per_akun = [0] * jumlah_akun
+    hadir_per_akun = [0] * jumlah_akun
+
+    for akun, tanggal, datang, pulang in zip(kolom.akun, kolom.tanggal, kolom.datang, kolom.pulang):
+        if tanggal < dari or tanggal > sampai or (tanggal + 3) % 7 == _MINGGU:
+            continue
+        record += 1
+        if datang < 0:
+            continue
+        jam_hadir.append(datang)
+        hadir_per_akun[akun] += 1
+        histogram[bisect.bisect_right(batas, datang) - (datang == batas[-1])] += 1
+        if datang > batas_telat:
+            telat_per_akun[akun] += 1
+        if pulang < 0:
+            tanpa_pulang += 1
+
+    jam_hadir.sort()
+    return {
+        "record": record,
+        "hari_kerja": hari_kerja,
+        "hadir": len(jam_hadir),
+        "tanpa_pulang": tanpa_pulang,
+        "persentil": [_persentil(jam_hadir, p) for p in (50, 90, 99)] if jam_hadir else [],
+        "histogram": histogram,
+        "telat_per_akun": telat_per_akun,
+        "bolos_per_akun": [hari_kerja - n for n in hadir_per_akun],
+    }
+
+def laporan(kolom, dari=None, sampai=None, top=LAPORAN_TOP):
+    """Hitung statistik armada, return list baris teks"""
+    if not len(kolom):
+        return ["Tidak ada data history"]
+    dari = _hari(dari) if dari else int(min(kolom.tanggal))
+    sampai = _hari(sampai) if sampai else int(max(kolom.tanggal))
+    batas = _batas_histogram()
+    batas_telat = batas[-1]
+
+    hitung = _statistik_numpy if np is not None else _statistik_python
+    stat = hitung(kolom, dari, sampai, batas_telat, batas)
+
+    jumlah_akun = len(kolom.akun_nama)
+    hasil = [
+        f"Periode {_tanggal(dari)} s/d {_tanggal(sampai)}: {jumlah_akun} akun, {stat['hari_kerja']} hari kerja, {stat['record']} record",
+        f"Hadir: {stat['hadir']} dari {jumlah_akun * stat['hari_kerja']} akun-hari, tanpa absen pulang: {stat['tanpa_pulang']}",
+    ]
+    telat = sum(stat["telat_per_akun"])
+    if stat["hadir"]:
+        hasil.append(f"Telat (datang setelah {_jam(batas_telat)}): {telat} ({telat / stat['hadir'] * 100:.1f}% kehadiran)")
+        p50, p90, p99 = stat["persentil"]
+        hasil.append(f"Jam datang p50 {_jam(p50)}, p90 {_jam(p90)}, p99 {_jam(p99)}")
+
+    hasil.append("Distribusi jam datang:")
+    label = [f"< {_jam(batas[0])[:5]}"]
+    label += [f"{_jam(a)[:5]}-{_jam(b)[:5]}" for a, b in zip(batas, batas[1:])]
+    label += [f"> {_jam(batas[-1])[:5]}"]
+    for nama, jumlah in zip(label, stat["histogram"]):
+        persen = jumlah / stat["hadir"] * 100 if stat["hadir"] else 0
+        hasil.append(f"  {nama:>13}  {jumlah:8d}  {persen:5.1f}%")
+
+    for judul, kunci in (("Paling sering telat", "telat_per_akun"), ("Paling banyak tidak hadir", "bolos_per_akun")):
+        urut = sorted(range(jumlah_akun), key=lambda i: -stat[kunci][i])[:top]
+        urut = [i for i in urut if stat[kunci][i] > 0]
+        if urut:
+            hasil.append(f"{judul}:")
+            hasil.extend(f"  {kolom.akun_nama[i]}: {stat[kunci][i]} hari" for i in urut)
+    return hasil
+
+def main():
+    parser = argparse.ArgumentParser(description="Ekspor history absensi semua akun dan laporan armada")
+    sub = parser.add_subparsers(dest="perintah", required=True)
+
+    p_ekspor = sub.add_parser("ekspor", help="ambil history semua akun ke file kolom")
+    p_ekspor.add_argument("--akun", default=AKUN_FILE, help="file akun JSON jika env ABSENSI_USERNAME/ABSENSI_PASSWORD kosong")
+    p_ekspor.add_argument("--output", default=EKSPOR_FILE, help="file hasil (.npz atau .parquet)")
+    p_ekspor.add_argument("--konkuren", type=int, default=EKSPOR_KONKUREN, help="akun yang diambil bersamaan")
+    p_ekspor.add_argument("--dari-cache", action="store_true", help="pakai cache history di STATE_FILE, tanpa request")
+
+    p_laporan = sub.add_parser("laporan", help="statistik telat, distribusi jam datang dan hari tidak hadir")
+    p_laporan.add_argument("file", nargs="?", default=EKSPOR_FILE, help="file hasil ekspor")
+    p_laporan.add_argument("--dari", help="tanggal awal (YYYY-mm-dd)")
+    p_laporan.add_argument("--sampai", help="tanggal akhir, inklusif (YYYY-mm-dd)")
+    p_laporan.add_argument("--top", type=int, default=LAPORAN_TOP, help="jumlah akun teratas yang ditampilkan")
+    args = parser.parse_args()
+
+    try:
+        if args.perintah == "laporan":
+            print("\n".join(laporan(muat(args.file), args.dari, args.sampai, args.top)))
+            return
+
+        daftar_akun = muat_kredensial(args.akun)
+        kolom, gagal = ekspor(daftar_akun, args.konkuren, args.dari_cache)
+        simpan(kolom, args.output)
+        tulis_log(f"[EKSPOR] {len(kolom)} record dari {len(daftar_akun)} akun disimpan ke {args.output}"
+                  + (f" ({gagal} akun gagal)" if gagal else ""))
+    except (OSError, ValueError, ImportError) as e:
+        print(f"[ERROR] {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        absensi_inp.LOG_WRITER.tutup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Parser streaming untuk response absensi/history/kemarin.
+
+Response history berupa satu array JSON berisi semua record absensi akun,
+makin lama makin besar. Daripada json.loads seluruh body lalu scan semua
+record, record dibaca satu per satu langsung dari potongan response
+(res.iter_content), jadi memori yang dipakai hanya sebesar satu potongan +
+satu record, dan pembacaan bisa berhenti begitu record yang dicari ketemu.
+
+    for record in baca_records(res.iter_content(HISTORY_CHUNK)):
+        ...
+"""
+import codecs
+import json
+
+# ======== KONFIGURASI =========
+HISTORY_CHUNK = 16 * 1024   # byte per potongan yang dibaca dari response
+
+_DECODER = json.JSONDecoder()
+_SPASI = " \t\r\n"
+
+def baca_records(potongan_iter, encoding="utf-8"):
+    """
+    Generator record (dict) dari array JSON yang datang per potongan
+    potongan_iter: iterable bytes atau str (misal res.iter_content)
+    Body yang bukan array JSON menghasilkan json.JSONDecodeError
+    (biasanya halaman HTML/maintenance, di-retry oleh execute_with_retry)
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    buffer = ""
+    posisi = 0
+    mulai = False       # '[' pembuka sudah dibaca
+    selesai = False     # ']' penutup sudah dibaca
+
+    def isi(potongan):
+        nonlocal buffer, posisi
+        if isinstance(potongan, bytes):
+            potongan = decoder.decode(potongan)
+        buffer = buffer[posisi:] + potongan
+        posisi = 0
+
+    potongan_iter = iter(potongan_iter)
+    habis = False
+    while not selesai:
+        # Lewati spasi dan pemisah antar record
+        while posisi < len(buffer) and (buffer[posisi] in _SPASI or (mulai and buffer[posisi] == ",")):
+            posisi += 1
+
+        if posisi < len(buffer):
+            karakter = buffer[posisi]
+            if not mulai:
+                if karakter != "[":
+                    raise json.JSONDecodeError("History bukan array JSON", buffer, posisi)
+                mulai = True
+                posisi += 1
+                continue
+            if karakter == "]":
+                selesai = True
+                break
+            akhir = None
+            try:
+                record, akhir = _DECODER.raw_decode(buffer, posisi)
+            except json.JSONDecodeError:
+                # Record terpotong di akhir buffer, tunggu potongan berikutnya
+                if habis:
+                    raise
+            if akhir is not None:
+                posisi = akhir
+                if isinstance(record, dict):
+                    yield record
+                continue
+
+        if habis:
+            if not selesai:
+                raise json.JSONDecodeError("History JSON terpotong", buffer, posisi)
+            break
+        try:
+            isi(next(potongan_iter))
+        except StopIteration:
+            habis = True
+            isi(decoder.decode(b"", final=True))
+
+def tanggal_record(record):
+    """Tanggal record history ('2026-01-05 00:00:00' -> '2026-01-05')"""
+    return str(record.get("tanggal") or "").split(" ")[0]
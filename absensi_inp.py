@@ -4,13 +4,28 @@ import random
 import time
 import os
 import json
+import re
 import threading
 import sys
-from requests.exceptions import ConnectionError, Timeout, RequestException
+from requests.exceptions import ConnectionError, Timeout, RequestException, HTTPError
+from requests.adapters import HTTPAdapter
 import getpass
+import contextvars
+import queue
+import atexit
+import email.utils
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import absensi_jadwal
+import absensi_history
+from absensi_jadwal import sekarang, tidur, bagi_slot_epoch, iso_lokal
+from absensi_state import StateStore
+from absensi_metrik import METRIK
+import absensi_profil
 
 # ======== KONFIGURASI =========
-BASE_URL = "https://naradaya.adhimix.web.id/"
+# Bisa diarahkan ke server lokal (misal server_mock.py) lewat env ABSENSI_BASE_URL
+BASE_URL = os.environ.get("ABSENSI_BASE_URL", "https://naradaya.adhimix.web.id/")
 
 # Username dan password akan diinput saat script dijalankan
 USERNAME = ""
@@ -21,17 +36,66 @@ PAGI_END   = (8, 15)   # 07:45
 SORE_START = (17, 10)  # 17:10
 SORE_END   = (18, 00)  # 18:00
 
+# Engine multi akun: jadwal semua akun dibagi rata di jendela absen,
+# maksimal sekian akun per detik (login + hit) agar beban server terkendali
+SLOT_PER_DETIK = 1
+
 LOG_FILE = "absensi_log.txt"
 
+# Rotasi log: ukuran maksimal per file (0 = nonaktif), jumlah backup, rotasi harian
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_ROTASI_HARIAN = False
+
+# Folder log per akun (None = semua akun hanya ditulis ke LOG_FILE)
+LOG_DIR_AKUN = None
+# Maksimal file log per akun yang dibiarkan terbuka (sisanya ditutup, dibuka lagi saat perlu)
+LOG_HANDLE_MAKS = 32
+
+# State harian (jadwal, tunda, hasil absen) agar restart tidak mengulang dari nol
+STATE_FILE = "absensi_state.db"   # None = nonaktif
+STATE_SIMPAN_HARI = 60
+HISTORY_SIMPAN_HARI = 400   # cache history absensi dari server
+
+# Username akun yang sedang diproses (dipakai engine multi akun agar log bisa dibedakan)
+AKUN_AKTIF = contextvars.ContextVar("akun_aktif", default=None)
+
 # Status global untuk tunda absensi
 TUNDA_ABSENSI = False
 TANGGAL_TUNDA = None
 
+# Di-set saat ada perintah tunda agar penantian langsung bangun (tanpa polling)
+TUNDA_EVENT = threading.Event()
+
 # Konfigurasi retry dan timeout
 MAX_RETRY = 540
-RETRY_DELAY = 30  # detik
+RETRY_BASE_DELAY = 2    # detik, jeda awal backoff
+RETRY_MAX_DELAY = 300   # detik, batas atas jeda backoff
 REQUEST_TIMEOUT = 30  # detik
 
+# Sekian detik sebelum jadwal hit, cek session dulu agar DNS, koneksi TLS dan session
+# sudah siap. Jangan lebih lama dari keep-alive server atau koneksinya keburu ditutup
+PEMANASAN_DETIK = 10
+# Session yang terbukti login sekian detik terakhir (dan koneksinya) dianggap masih
+# siap, pemanasan tidak perlu mengirim request sama sekali
+SESI_SEGAR_DETIK = 30
+
+# Perkiraan jam server dari header Date: jumlah dan umur maksimal sampel yang dipakai
+JAM_SERVER_SAMPEL = 32
+JAM_SERVER_UMUR = 3600  # detik
+
+# Circuit breaker: setelah sekian kegagalan jaringan berturut-turut, semua
+# request ke server ditahan dan hanya satu request percobaan yang dikirim
+BREAKER_AMBANG = 5
+BREAKER_COOLDOWN = 30       # detik, jeda sebelum request percobaan pertama
+BREAKER_COOLDOWN_MAX = 300  # detik, jeda maksimal (digandakan tiap percobaan gagal)
+
+# Hasil cek koneksi internet dianggap valid selama ini (detik)
+KONEKSI_CACHE_TTL = 60
+
+# Koneksi keep-alive maksimal ke server (dipakai bersama oleh semua session akun)
+POOL_MAXSIZE = 20
+
 # ======== FUNGSI INPUT KREDENSIAL =========
 def input_kredensial():
     """Meminta input username dan password dari pengguna"""
@@ -41,14 +105,19 @@ def input_kredensial():
     print("BOT ABSENSI OTOMATIS - LOGIN")
     print("=" * 50)
     
-    USERNAME = input("Masukkan Username: ").strip()
-    
-    # Gunakan getpass untuk menyembunyikan password saat diketik
-    try:
-        PASSWORD = getpass.getpass("Masukkan Password: ").strip()
-    except:
-        # Fallback jika getpass tidak tersedia
-        PASSWORD = input("Masukkan Password: ").strip()
+    # Tanpa input interaktif (systemd/cron): kredensial dari environment
+    USERNAME = os.environ.get("ABSENSI_USERNAME", "").strip()
+    PASSWORD = os.environ.get("ABSENSI_PASSWORD", "").strip()
+
+    if not USERNAME or not PASSWORD:
+        USERNAME = input("Masukkan Username: ").strip()
+        
+        # Gunakan getpass untuk menyembunyikan password saat diketik
+        try:
+            PASSWORD = getpass.getpass("Masukkan Password: ").strip()
+        except:
+            # Fallback jika getpass tidak tersedia
+            PASSWORD = input("Masukkan Password: ").strip()
     
     if not USERNAME or not PASSWORD:
         print("[ERROR] Username dan password tidak boleh kosong!")
@@ -67,23 +136,316 @@ def input_kredensial():
     print("=" * 50)
     print()
 
+# ======== JAM SERVER =========
+class JamServer:
+    """
+    Perkiraan selisih jam server terhadap jam lokal dari header Date (gaya NTP).
+
+    Header Date hanya presisi detik, jadi satu response memberi rentang offset
+    [jam_server - waktu_terima, jam_server + 1 - waktu_kirim]. Irisan rentang
+    dari beberapa response terakhir mempersempit perkiraan; RTT dihaluskan
+    dengan EWMA dan setengahnya dipakai sebagai perkiraan latency satu arah.
+    """
+
+    def __init__(self, jumlah_sampel=JAM_SERVER_SAMPEL, umur_sampel=JAM_SERVER_UMUR):
+        self.umur_sampel = umur_sampel
+        self.rtt = None
+        self._sampel = deque(maxlen=jumlah_sampel)  # (waktu_terima, offset_bawah, offset_atas)
+        self._lock = threading.Lock()
+
+    def catat(self, res):
+        """Ambil sampel dari response requests (header Date + res.elapsed)"""
+        try:
+            jam_server = email.utils.parsedate_to_datetime(res.headers["Date"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return
+
+        waktu_terima = absensi_jadwal.JAM.waktu()
+        rtt = res.elapsed.total_seconds()
+        with self._lock:
+            self.rtt = rtt if self.rtt is None else 0.8 * self.rtt + 0.2 * rtt
+            self._sampel.append((waktu_terima, jam_server - waktu_terima, jam_server + 1 - (waktu_terima - rtt)))
+
+    def perkiraan(self):
+        """Return (offset, error) dalam detik, offset positif = jam server lebih cepat; (0, None) jika belum ada sampel"""
+        with self._lock:
+            batas = absensi_jadwal.JAM.waktu() - self.umur_sampel
+            sampel = [s for s in self._sampel if s[0] >= batas]
+            if not sampel:
+                return 0.0, None
+
+            bawah = max(s[1] for s in sampel)
+            atas = min(s[2] for s in sampel)
+            if bawah > atas:
+                # Rentang tidak beririsan (jam lokal/server disetel ulang): mulai lagi dari sampel terbaru
+                _, bawah, atas = sampel[-1]
+                self._sampel.clear()
+                self._sampel.append(sampel[-1])
+            return (bawah + atas) / 2, (atas - bawah) / 2
+
+    def latensi(self):
+        return (self.rtt or 0.0) / 2
+
+    def waktu_server(self):
+        """Perkiraan jam server saat ini (jam lokal jika belum ada sampel)"""
+        return sekarang() + timedelta(seconds=self.perkiraan()[0])
+
+    def status(self):
+        offset, error = self.perkiraan()
+        return {"offset": offset, "error": error, "latensi": self.latensi()}
+
+
+JAM_SERVER = JamServer()
+
+def waktu_tembak(target_time, sesi=None, laporkan=True):
+    """
+    Waktu lokal untuk mengirim hit agar sampai di server tepat pada target_time
+    menurut jam server (dikoreksi offset jam dan latency satu arah)
+    Jika sesi diisi, hit tidak pernah dikirim (jam lokal) maupun sampai di server
+    (jam server) sebelum awal jendela sesi ditambah batas error perkiraan jam
+    """
+    offset, error = JAM_SERVER.perkiraan()
+    if error is None:
+        return target_time
+
+    latensi = JAM_SERVER.latensi()
+    if laporkan:
+        tulis_log(f"[JAM SERVER] Offset {offset:+.2f} detik (±{error:.2f}), latency {latensi * 1000:.0f} ms")
+    tembak = target_time - timedelta(seconds=offset + latensi)
+    if sesi is not None:
+        # Jam server saat hit sampai = tembak + latensi + offset
+        paling_awal = mulai_sesi(sesi, target_time.date()) + timedelta(seconds=error + max(0, -(offset + latensi)))
+        tembak = max(tembak, paling_awal)
+    return tembak
+
+# ======== SESSION POOL =========
+# Nama fase untuk metrik latency per endpoint
+FASE_REQUEST = {
+    "login/confirm": "login",
+    "absensi/history/kemarin": "history",
+    "absensi/hit": "hit",
+}
+
+class SessionPool:
+    """
+    Cache session yang sudah login per akun.
+    Cookie login dan koneksi keep-alive dipakai ulang, login ulang hanya
+    dilakukan jika session kadaluarsa (redirect ke halaman login / 401 / 403).
+    Semua session memakai satu HTTPAdapter, jadi session akun tidak pernah di-close()
+    (itu ikut menutup koneksi semua akun); adapter baru ditutup saat program selesai.
+    """
+
+    def __init__(self, pool_maxsize=POOL_MAXSIZE):
+        # Satu adapter untuk semua session, jadi koneksi TLS ke server dipakai bersama
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self._sessions = {}
+        self._dipakai = {}  # username -> time.monotonic() terakhir session terbukti masih login
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _lock_akun(self, username):
+        with self._lock:
+            if username not in self._locks:
+                self._locks[username] = threading.Lock()
+            return self._locks[username]
+
+    def _buat_session(self):
+        session = requests.Session()
+        session.mount("https://", self._adapter)
+        session.mount("http://", self._adapter)
+        return session
+
+    def login(self, username, password):
+        """
+        Login baru untuk akun dan simpan session-nya
+        Return: session jika berhasil, None jika login gagal
+        Exception jaringan diteruskan ke pemanggil (untuk execute_with_retry)
+        """
+        with self._lock_akun(username):
+            session = self._buat_session()
+            login_payload = {
+                "login": username,
+                "password": password
+            }
+            res = self._kirim(session, "POST", BASE_URL + "login/confirm", data=login_payload, timeout=REQUEST_TIMEOUT)
+            if res.status_code >= 500 or res.status_code == 429:
+                session.cookies.clear()
+                res.raise_for_status()  # Gangguan server sementara, biarkan di-retry
+
+            if not login_diterima(res):
+                session.cookies.clear()
+                self._lepas(username)
+                return None
+
+            self._sessions[username] = session
+            self._dipakai[username] = time.monotonic()
+            return session
+
+    def _kirim(self, session, method, url, **kwargs):
+        """Kirim satu request, catat latency/error per fase ke METRIK dan sampel jam server"""
+        fase = FASE_REQUEST.get(url[len(BASE_URL):], "lain")
+        mulai = time.perf_counter()
+        try:
+            res = session.request(method, url, **kwargs)
+        except RequestException as e:
+            METRIK.tambah("absensi_request_error_total", fase=fase, error=type(e).__name__)
+            raise
+
+        METRIK.amati("absensi_request_detik", time.perf_counter() - mulai, fase=fase)
+        if res.status_code >= 500 or res.status_code == 429:
+            METRIK.tambah("absensi_request_error_total", fase=fase, error=str(res.status_code))
+        KONEKSI_MONITOR.tandai_sukses()
+        JAM_SERVER.catat(res)
+        return res
+
+    def ambil(self, username, password):
+        """Ambil session yang sudah login, login dulu jika belum ada"""
+        session = self._sessions.get(username)
+        if session is not None:
+            return session
+        return self.login(username, password)
+
+    def ada(self, username):
+        """True jika akun sudah punya session login di cache"""
+        return username in self._sessions
+
+    def segar(self, username, detik):
+        """True jika session akun terbukti masih login dalam `detik` terakhir"""
+        dipakai = self._dipakai.get(username)
+        return (username in self._sessions and dipakai is not None
+                and time.monotonic() - dipakai <= detik)
+
+    def _lepas(self, username, session=None):
+        """Keluarkan session akun dari cache (hanya jika masih session yang sama, bila diisi)"""
+        if session is not None and self._sessions.get(username) is not session:
+            return
+        lama = self._sessions.pop(username, None)
+        self._dipakai.pop(username, None)
+        if lama is not None:
+            lama.cookies.clear()
+
+    def buang(self, username, session=None):
+        """Hapus session akun dari cache (session kadaluarsa), koneksi bersama tetap terbuka"""
+        with self._lock_akun(username):
+            self._lepas(username, session)
+
+    def tutup(self):
+        """Tutup koneksi bersama (saat program selesai)"""
+        with self._lock:
+            self._sessions.clear()
+            self._dipakai.clear()
+        self._adapter.close()
+
+    def request(self, username, password, method, path, **kwargs):
+        """
+        Kirim request dengan session akun, login ulang sekali jika session kadaluarsa
+        Return: response, atau None jika login gagal
+        """
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        url = BASE_URL + path
+
+        for _ in range(2):
+            session = self.ambil(username, password)
+            if session is None:
+                return None
+
+            res = self._kirim(session, method, url, **kwargs)
+            if not sesi_kadaluarsa(res, url):
+                if res.status_code < 500:
+                    self._dipakai[username] = time.monotonic()
+                return res
+
+            tulis_log("[INFO] Session login kadaluarsa, login ulang...")
+            res.close()
+            self.buang(username, session)
+
+        return None
+
+
+def sesi_kadaluarsa(res, url):
+    """Cek apakah response menandakan session sudah tidak login lagi"""
+    if res.status_code in (401, 403):
+        return True
+    # Server mengalihkan request yang belum login ke halaman login
+    return bool(res.history) and res.url.rstrip("/") != url.rstrip("/")
+
+
+SESSION_POOL = SessionPool()
+atexit.register(SESSION_POOL.tutup)
+
+# ======== PARSER RESPONSE =========
+# Dicari langsung di body bytes (res.content), tanpa salinan teks / lowercase seluruh body
+_POLA_GAGAL = re.compile(rb"gagal", re.IGNORECASE)
+# Body non-JSON hanya dipercaya jika berisi pesan hasil absen yang eksplisit,
+# bukan sekadar kata "success" (misal class CSS alert-success di halaman error)
+_POLA_PESAN_HIT = re.compile(rb"\babsen(?:si)?(?:\s+(?:datang|pulang|masuk|keluar))?\s+(berhasil|sukses|gagal)\b", re.IGNORECASE)
+_POLA_SUDAH = re.compile(r"\bsudah\s+(?:melakukan\s+)?absen", re.IGNORECASE)
+_POLA_JAM = re.compile(r"\b(?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d\b")
+_STATUS_SUKSES = ("success", "sukses", "berhasil", "ok", "true", "1")
+
+def login_diterima(res):
+    """True jika halaman hasil login/confirm tidak berisi pesan gagal"""
+    return _POLA_GAGAL.search(res.content) is None
+
+class HasilHit:
+    """
+    Hasil absensi/hit yang sudah di-parse
+    sukses: True/False, None jika response tidak bisa dipastikan (dicek ulang ke server)
+    jam:    jam absen yang dicatat server ("HH:MM:SS"), None jika tidak ada di response
+    sudah:  server menjawab sesi ini sudah diabsen sebelumnya (dianggap selesai)
+    """
+
+    __slots__ = ("sukses", "jam", "pesan", "sudah")
+
+    def __init__(self, sukses, jam=None, pesan="", sudah=False):
+        self.sukses = sukses
+        self.jam = jam
+        self.pesan = pesan
+        self.sudah = sudah
+
+def parse_hit(res):
+    """Parse response absensi/hit: JSON {status, message, jam}, selain itu cari pola di body"""
+    if res.status_code >= 400:
+        return HasilHit(False, pesan=f"HTTP {res.status_code}")
+
+    try:
+        data = json.loads(res.content)
+    except ValueError:
+        data = None
+
+    if isinstance(data, dict):
+        pesan = str(data.get("message") or data.get("pesan") or "")
+        jam = data.get("jam") or data.get("waktu")
+        cocok = _POLA_JAM.search(str(jam or pesan))
+        jam = cocok.group(0) if cocok else None
+        if _POLA_SUDAH.search(pesan):
+            # "Anda sudah absen datang": tidak tercatat ulang, tapi sesi ini sudah selesai
+            return HasilHit(True, jam, pesan, sudah=True)
+        status = data.get("status", data.get("success"))
+        if status is None:
+            sukses = None
+        else:
+            sukses = str(status).lower() in _STATUS_SUKSES
+        return HasilHit(sukses, jam, pesan)
+
+    # Bukan JSON (misal halaman HTML): hanya pesan hasil absen yang eksplisit, selain itu tidak pasti
+    body = res.content
+    teks = body.decode(res.encoding or "utf-8", errors="replace")
+    cocok = _POLA_JAM.search(teks)
+    jam = cocok.group(0) if cocok else None
+    pesan = f"{len(body)} byte non-JSON"
+    if _POLA_SUDAH.search(teks):
+        return HasilHit(True, jam, pesan, sudah=True)
+    hasil = _POLA_PESAN_HIT.search(body)
+    if hasil is None:
+        return HasilHit(None, jam, pesan)
+    return HasilHit(hasil.group(1).lower() != b"gagal", jam, hasil.group(0).decode("utf-8", errors="replace"))
+
 # ======== VERIFIKASI LOGIN =========
 def verifikasi_login():
-    """Verifikasi kredensial login ke server"""
+    """Verifikasi kredensial login ke server (session disimpan untuk dipakai ulang)"""
     try:
-        session = requests.Session()
-        login_payload = {
-            "login": USERNAME,
-            "password": PASSWORD
-        }
-        
-        login_url = BASE_URL + "login/confirm"
-        res = session.post(login_url, data=login_payload, timeout=REQUEST_TIMEOUT)
-        
-        if "gagal" in res.text.lower():
-            return False
-        
-        return True
+        return SESSION_POOL.login(USERNAME, PASSWORD) is not None
         
     except Exception as e:
         print(f"[ERROR] Tidak dapat terhubung ke server: {str(e)}")
@@ -91,7 +453,7 @@ def verifikasi_login():
 
 # ======== FUNGSI RANDOM JAM =========
 def random_jam(start_tuple, end_tuple):
-    today = datetime.now().date()
+    today = sekarang().date()
     start_time = datetime.combine(today, datetime.min.time()).replace(hour=start_tuple[0], minute=start_tuple[1])
     end_time   = datetime.combine(today, datetime.min.time()).replace(hour=end_tuple[0], minute=end_tuple[1])
 
@@ -99,75 +461,599 @@ def random_jam(start_tuple, end_tuple):
     random_seconds = random.randint(0, delta_seconds)
     return start_time + timedelta(seconds=random_seconds)
 
+# ======== STATE PERSISTEN =========
+_STATE_STORE = None
+_STATE_LOCK = threading.Lock()
+
+def state_store():
+    """StateStore untuk STATE_FILE (dibuka saat pertama dipakai), None jika nonaktif"""
+    global _STATE_STORE
+    if not STATE_FILE:
+        return None
+    with _STATE_LOCK:
+        if _STATE_STORE is None or _STATE_STORE.path != STATE_FILE:
+            _STATE_STORE = StateStore(STATE_FILE)
+        return _STATE_STORE
+
+def jadwal_hari_ini(username=None):
+    """
+    Jadwal absen pagi & sore hari ini untuk akun
+    Jadwal yang sudah dipilih sebelum restart dipakai lagi (tidak diacak ulang)
+    """
+    username = username or USERNAME
+    hari_ini = sekarang().date()
+    store = state_store()
+
+    if store:
+        jadwal = store.jadwal(username, hari_ini)
+        if jadwal:
+            tulis_log("[INFO] Memakai jadwal hari ini yang tersimpan")
+            return jadwal
+
+    rencana = _JADWAL_RENCANA.get(username)
+    if rencana and rencana[0] == hari_ini:
+        return tuple(datetime.fromtimestamp(detik) for detik in rencana[1])
+
+    waktu_pagi = random_jam(PAGI_START, PAGI_END)
+    waktu_sore = random_jam(SORE_START, SORE_END)
+    if store:
+        store.simpan_jadwal(username, hari_ini, waktu_pagi, waktu_sore)
+    return waktu_pagi, waktu_sore
+
+_JADWAL_RENCANA = {}    # username -> (tanggal, (epoch pagi, epoch sore)), dipakai jika state nonaktif
+
+def rencanakan_jadwal(daftar_username, per_detik=None):
+    """
+    Bagi jadwal hari ini untuk semua akun sekaligus (lihat bagi_slot_epoch):
+    tiap akun tetap dapat waktu acak, tetapi beban tersebar rata di jendela
+    pagi/sore dengan maksimal per_detik akun per detik. Akun yang sudah
+    punya jadwal hari ini (misal sebelum restart) tidak diubah.
+    Jadwal dibuat sebagai kolom epoch detik (tanpa datetime per akun).
+    Return jumlah akun yang baru dijadwalkan.
+    """
+    per_detik = per_detik or SLOT_PER_DETIK
+    hari_ini = sekarang().date()
+    store = state_store()
+
+    tersimpan = store.jadwal_semua(hari_ini) if store else {}
+    terpakai_pagi, terpakai_sore = Counter(), Counter()
+    baru = []
+    for username in daftar_username:
+        jadwal = tersimpan.get(username)
+        if jadwal is None:
+            baru.append(username)
+            continue
+        terpakai_pagi[int(jadwal[0].timestamp())] += 1
+        terpakai_sore[int(jadwal[1].timestamp())] += 1
+    if not baru:
+        return 0
+
+    def jendela(start_tuple, end_tuple):
+        awal = datetime.combine(hari_ini, datetime.min.time())
+        return (awal.replace(hour=start_tuple[0], minute=start_tuple[1]),
+                awal.replace(hour=end_tuple[0], minute=end_tuple[1]))
+
+    epoch_pagi = bagi_slot_epoch(len(baru), *jendela(PAGI_START, PAGI_END), per_detik, terpakai_pagi)
+    epoch_sore = bagi_slot_epoch(len(baru), *jendela(SORE_START, SORE_END), per_detik, terpakai_sore)
+
+    if store:
+        store.simpan_jadwal_banyak(hari_ini, baru, iso_lokal(epoch_pagi), iso_lokal(epoch_sore))
+    else:
+        _JADWAL_RENCANA.clear()
+        _JADWAL_RENCANA.update((username, (hari_ini, (int(pagi), int(sore))))
+                               for username, pagi, sore in zip(baru, epoch_pagi, epoch_sore))
+
+    tulis_log(f"[SCHEDULE] Jadwal {len(baru)} akun dibagi rata (maks {per_detik} akun/detik)")
+    return len(baru)
+
+def simpan_tunda(username, tunda):
+    """Simpan status tunda hari ini ke state"""
+    store = state_store()
+    if store:
+        store.simpan_tunda(username, sekarang().date(), tunda)
+
+def tandai_terlewat(username, sesi):
+    """Catat di state bahwa jendela sesi hari ini sudah lewat tanpa hit"""
+    store = state_store()
+    if store:
+        store.tandai_terlewat(username, sekarang().date(), sesi)
+
+def tunda_tersimpan(username):
+    """Cek apakah hari ini akun ditunda menurut state (untuk dipulihkan saat start)"""
+    store = state_store()
+    return bool(store and store.tunda(username, sekarang().date()))
+
+def bersihkan_state():
+    store = state_store()
+    if store:
+        jumlah = store.bersihkan(STATE_SIMPAN_HARI, sekarang().date(), HISTORY_SIMPAN_HARI)
+        if jumlah:
+            tulis_log(f"[INFO] {jumlah} data state lama dihapus")
+
 # ======== SIMPAN LOG =========
+class LogWriter:
+    """
+    Penulis log di thread terpisah.
+    tulis_log hanya memasukkan baris ke antrian; thread ini menulis per batch
+    dengan file handle yang tetap terbuka dan menangani rotasi file.
+    Handle log per akun dibatasi LOG_HANDLE_MAKS (yang paling lama tidak
+    dipakai ditutup) agar ribuan akun tidak menghabiskan file descriptor.
+    """
+
+    BATCH_MAX = 500
+
+    def __init__(self):
+        self._antrian = queue.SimpleQueue()
+        self._files = OrderedDict()     # path -> handle, urut dari yang paling lama tidak dipakai
+        self._tanggal = {}              # path -> tanggal file mulai ditulis (untuk rotasi harian)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def tulis(self, baris, akun=None):
+        """Masukkan baris log ke antrian (tidak pernah menunggu I/O)"""
+        if self._thread is None:
+            self._mulai()
+        self._antrian.put((baris, akun))
+
+    def flush(self, timeout=5):
+        """Tunggu sampai semua baris di antrian sudah ditulis"""
+        if self._thread is None:
+            return
+        selesai = threading.Event()
+        self._antrian.put(selesai)
+        selesai.wait(timeout)
+
+    def tutup(self):
+        """Flush antrian lalu tutup semua file log"""
+        self.flush()
+        with self._lock:
+            for handle in self._files.values():
+                handle.close()
+            self._files.clear()
+
+    def _mulai(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            batch = [self._antrian.get()]
+            while len(batch) < self.BATCH_MAX:
+                try:
+                    batch.append(self._antrian.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._proses(batch)
+            except Exception as e:
+                print(f"[ERROR] Gagal menulis log: {str(e)}", file=sys.stderr, flush=True)
+
+    def _proses(self, batch):
+        per_akun = {}
+        konsol = []
+        events = []
+
+        for item in batch:
+            if isinstance(item, threading.Event):
+                events.append(item)
+                continue
+            baris, akun = item
+            konsol.append(baris)
+            if LOG_DIR_AKUN and akun:
+                per_akun.setdefault(akun, []).append(baris)
+
+        try:
+            with self._lock:
+                # Gagal menulis satu file tidak membuang baris untuk file lain / console
+                for akun, daftar in [(None, konsol)] + list(per_akun.items()):
+                    if not daftar:
+                        continue
+                    try:
+                        self._tulis_file(path_log_akun(akun) if akun else LOG_FILE, daftar)
+                    except OSError as e:
+                        print(f"[ERROR] Gagal menulis log {akun or LOG_FILE}: {str(e)}", file=sys.stderr, flush=True)
+                self._batasi_handle()
+
+            if konsol:
+                print("\n".join(konsol), flush=True)
+        finally:
+            for selesai in events:
+                selesai.set()
+
+    def _tulis_file(self, path, daftar):
+        hari_ini = sekarang().date()
+        tanggal = self._tanggal.get(path)
+        if LOG_ROTASI_HARIAN and tanggal is not None and tanggal != hari_ini:
+            self._rotasi(path, suffix=tanggal.isoformat())
+        if path not in self._files:
+            # errors="replace" menggantikan fallback ASCII lama untuk karakter khusus
+            self._files[path] = open(path, "a", encoding="utf-8", errors="replace")
+            self._tanggal.setdefault(path, hari_ini)
+        self._files.move_to_end(path)
+
+        handle = self._files[path]
+        handle.write("\n".join(daftar) + "\n")
+        handle.flush()
+
+        if LOG_MAX_BYTES and handle.tell() >= LOG_MAX_BYTES:
+            self._rotasi(path)
+
+    def _batasi_handle(self):
+        """Tutup handle log per akun yang paling lama tidak dipakai di atas LOG_HANDLE_MAKS"""
+        akun = [path for path in self._files if path != LOG_FILE]
+        for path in akun[:max(0, len(akun) - LOG_HANDLE_MAKS)]:
+            self._files.pop(path).close()
+
+    def _rotasi(self, path, suffix=None):
+        handle = self._files.pop(path, None)
+        if handle is not None:
+            handle.close()
+        self._tanggal.pop(path, None)
+
+        if suffix:
+            os.replace(path, f"{path}.{suffix}")
+            return
+
+        # absensi_log.txt -> .1, .1 -> .2, ... (yang paling lama dibuang)
+        for i in range(LOG_BACKUP_COUNT - 1, 0, -1):
+            if os.path.exists(f"{path}.{i}"):
+                os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+        if LOG_BACKUP_COUNT > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+
+def path_log_akun(akun):
+    """Path file log khusus untuk satu akun di LOG_DIR_AKUN"""
+    os.makedirs(LOG_DIR_AKUN, exist_ok=True)
+    nama = "".join(c if c.isalnum() or c in "-_." else "_" for c in akun)
+    return os.path.join(LOG_DIR_AKUN, f"{nama}.txt")
+
+
+LOG_WRITER = LogWriter()
+atexit.register(LOG_WRITER.tutup)
+
 def tulis_log(pesan):
-    waktu = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
-    log_message = f"{waktu} {pesan}"
-    
-    # Tulis ke file dengan encoding UTF-8
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"{log_message}\n")
-    except Exception as e:
-        # Fallback: tulis tanpa karakter khusus
-        safe_message = log_message.encode('ascii', 'ignore').decode('ascii')
-        with open(LOG_FILE, "a") as f:
-            f.write(f"{safe_message}\n")
+    waktu = sekarang().strftime("[%Y-%m-%d %H:%M:%S]")
+    akun = AKUN_AKTIF.get()
+    if akun:
+        log_message = f"{waktu} [{akun}] {pesan}"
+    else:
+        log_message = f"{waktu} {pesan}"
     
-    print(log_message, flush=True)
+    # Penulisan file & console dilakukan thread LogWriter
+    LOG_WRITER.tulis(log_message, akun)
 
 # ======== CEK KONEKSI INTERNET =========
-def cek_koneksi_internet():
-    """Cek apakah ada koneksi internet"""
-    try:
-        # Test dengan Google DNS yang lebih reliable
-        response = requests.get("https://8.8.8.8", timeout=5)
-        return True
-    except:
-        try:
-            # Backup test dengan cloudflare DNS
-            response = requests.get("https://1.1.1.1", timeout=5)
+class KoneksiMonitor:
+    """
+    Cek koneksi internet dengan probe paralel (yang pertama sukses menang)
+    dan hasil yang di-cache selama KONEKSI_CACHE_TTL. Response sukses dari
+    BASE_URL lewat SessionPool dihitung sebagai tanda koneksi hidup, jadi
+    selama session aktif tidak perlu probe tambahan.
+    """
+
+    def __init__(self, ttl=KONEKSI_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._executor = None
+        self._hasil = None
+        self._waktu_hasil = 0
+        self._sukses_server = 0
+
+    def _targets(self):
+        # Google DNS, Cloudflare DNS, lalu website utama
+        return [("https://8.8.8.8", 5), ("https://1.1.1.1", 5), (BASE_URL, 10)]
+
+    def tandai_sukses(self):
+        """Catat bahwa ada request ke BASE_URL yang baru saja berhasil"""
+        self._sukses_server = time.monotonic()
+
+    def cek(self, paksa=False):
+        """Return True jika ada koneksi (pakai cache kecuali paksa=True)"""
+        if not paksa and self._masih_valid():
+            return self._hasil_cache()
+
+        with self._lock:
+            # Thread lain mungkin baru saja selesai probe
+            if not paksa and self._masih_valid():
+                return self._hasil_cache()
+
+            mulai = time.perf_counter()
+            hasil = self._probe()
+            METRIK.amati("absensi_probe_detik", time.perf_counter() - mulai)
+            METRIK.tambah("absensi_probe_total", hasil="ada" if hasil else "tidak_ada")
+            self._hasil = hasil
+            self._waktu_hasil = time.monotonic()
+            return hasil
+
+    def _masih_valid(self):
+        sekarang = time.monotonic()
+        if self._sukses_server and sekarang - self._sukses_server < self.ttl:
             return True
-        except:
-            try:
-                # Test dengan website utama
-                response = requests.get(BASE_URL, timeout=10)
+        return self._hasil is not None and sekarang - self._waktu_hasil < self.ttl
+
+    def _hasil_cache(self):
+        if self._sukses_server and time.monotonic() - self._sukses_server < self.ttl:
+            return True
+        return self._hasil
+
+    def _probe(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="probe-koneksi")
+
+        targets = self._targets()
+        pending = {self._executor.submit(_probe_url, url, timeout) for url, timeout in targets}
+        batas = time.monotonic() + max(timeout for _, timeout in targets)
+
+        while pending:
+            sisa = batas - time.monotonic()
+            if sisa <= 0:
+                break
+            selesai, pending = wait(pending, timeout=sisa, return_when=FIRST_COMPLETED)
+            if any(f.result() for f in selesai):
                 return True
-            except:
-                return False
+        return False
+
+
+def _probe_url(url, timeout):
+    try:
+        requests.head(url, timeout=timeout, allow_redirects=False)
+        return True
+    except Exception:
+        return False
+
+
+KONEKSI_MONITOR = KoneksiMonitor()
+
+def cek_koneksi_internet(paksa=False):
+    """Cek apakah ada koneksi internet"""
+    return KONEKSI_MONITOR.cek(paksa)
 
 # ======== FUNGSI RETRY DENGAN ERROR HANDLING =========
-def execute_with_retry(func, *args, **kwargs):
+class RetryPolicy:
+    """
+    Kebijakan retry: exponential backoff dengan full jitter, dibatasi
+    jumlah percobaan dan deadline absolut (misal akhir jendela sesi absen).
+    """
+
+    def __init__(self, max_attempt=MAX_RETRY, base_delay=RETRY_BASE_DELAY,
+                 max_delay=RETRY_MAX_DELAY, deadline=None):
+        self.max_attempt = max_attempt
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def jeda(self, attempt):
+        """Jeda sebelum percobaan berikutnya (full jitter: acak 0..batas)"""
+        batas = min(self.max_delay, self.base_delay * (2 ** min(attempt, 30)))
+        return random.uniform(0, batas)
+
+    def sisa_waktu(self):
+        """Detik tersisa sampai deadline (None jika tanpa deadline)"""
+        if self.deadline is None:
+            return None
+        return (self.deadline - sekarang()).total_seconds()
+
+    def boleh_retry(self, error):
+        """Klasifikasi error: hanya gangguan sementara yang layak di-retry"""
+        if isinstance(error, (ConnectionError, Timeout)):
+            return True
+        if isinstance(error, HTTPError):
+            status = error.response.status_code if error.response is not None else 0
+            return status == 429 or status >= 500
+        if isinstance(error, json.JSONDecodeError):
+            # Biasanya halaman maintenance/HTML saat server bermasalah
+            return True
+        # URL salah, redirect loop, bug di kode, dll tidak akan sembuh dengan retry
+        return False
+
+
+def mulai_sesi(sesi, tanggal=None):
+    """Awal jendela sesi absen ("Pagi" -> PAGI_START, selain itu SORE_START), default hari ini"""
+    jam, menit = PAGI_START if sesi == "Pagi" else SORE_START
+    return datetime.combine(tanggal or sekarang().date(), datetime.min.time()).replace(hour=jam, minute=menit)
+
+def batas_sesi(sesi):
+    """Deadline hari ini untuk sesi absen ("Pagi" -> PAGI_END, selain itu SORE_END)"""
+    jam, menit = PAGI_END if sesi == "Pagi" else SORE_END
+    return datetime.combine(sekarang().date(), datetime.min.time()).replace(hour=jam, minute=menit)
+
+# ======== CIRCUIT BREAKER =========
+class CircuitBreaker:
+    """
+    Circuit breaker bersama untuk semua akun yang memakai server yang sama.
+
+    tertutup  : request berjalan normal
+    terbuka   : server dianggap down, semua request menunggu cooldown
+    setengah  : satu request percobaan dikirim, yang lain tetap menunggu
+                hasilnya (sukses -> tertutup, gagal -> terbuka lagi)
+    """
+
+    TERTUTUP = "tertutup"
+    TERBUKA = "terbuka"
+    SETENGAH = "setengah-terbuka"
+
+    def __init__(self, nama, ambang=BREAKER_AMBANG, cooldown=BREAKER_COOLDOWN, cooldown_max=BREAKER_COOLDOWN_MAX):
+        self.nama = nama
+        self.ambang = ambang
+        self.cooldown_awal = cooldown
+        self.cooldown_max = cooldown_max
+        self.state = self.TERTUTUP
+        self.gagal_berturut = 0
+        self._cooldown = cooldown
+        self._buka_sampai = 0
+        self._cond = threading.Condition()
+
+    def status(self):
+        with self._cond:
+            return {
+                "state": self.state,
+                "gagal_berturut": self.gagal_berturut,
+                "sisa_cooldown": max(0, self._buka_sampai - absensi_jadwal.JAM.waktu()) if self.state == self.TERBUKA else 0,
+            }
+
+    def izin(self, batas_detik=None):
+        """
+        Tunggu sampai request boleh dikirim
+        Return True jika boleh, False jika batas_detik habis saat menunggu
+        """
+        batas = None if batas_detik is None else absensi_jadwal.JAM.waktu() + batas_detik
+        with self._cond:
+            while True:
+                if self.state == self.TERTUTUP:
+                    return True
+
+                waktu_kini = absensi_jadwal.JAM.waktu()
+                if self.state == self.TERBUKA and waktu_kini >= self._buka_sampai:
+                    # Thread ini yang mengirim request percobaan
+                    self.state = self.SETENGAH
+                    tulis_log(f"[CIRCUIT] Mengirim satu request percobaan ke {self.nama}")
+                    return True
+
+                tunggu = self._buka_sampai - waktu_kini if self.state == self.TERBUKA else None
+                if batas is not None:
+                    sisa = batas - waktu_kini
+                    if sisa <= 0:
+                        return False
+                    tunggu = sisa if tunggu is None else min(tunggu, sisa)
+                if absensi_jadwal.JAM.virtual and self.state == self.TERBUKA:
+                    # Jam virtual: cooldown dilewati dengan memajukan jam
+                    absensi_jadwal.JAM.maju(tunggu)
+                else:
+                    self._cond.wait(tunggu)
+
+    def sukses(self):
+        with self._cond:
+            if self.state != self.TERTUTUP:
+                tulis_log(f"[CIRCUIT] Server {self.nama} pulih, request dilanjutkan")
+            self.state = self.TERTUTUP
+            self.gagal_berturut = 0
+            self._cooldown = self.cooldown_awal
+            self._cond.notify_all()
+
+    def gagal(self):
+        with self._cond:
+            self.gagal_berturut += 1
+            if self.state == self.SETENGAH:
+                self._cooldown = min(self.cooldown_max, self._cooldown * 2)
+                self._buka("Request percobaan gagal")
+            elif self.state == self.TERTUTUP and self.gagal_berturut >= self.ambang:
+                self._buka(f"{self.gagal_berturut} kegagalan berturut-turut")
+
+    def netral(self):
+        """Request selesai tanpa bukti server hidup/mati (misal bug lokal): lepas slot percobaan"""
+        with self._cond:
+            if self.state == self.SETENGAH:
+                self.state = self.TERBUKA
+                self._buka_sampai = absensi_jadwal.JAM.waktu()
+                self._cond.notify_all()
+
+    def _buka(self, alasan):
+        self.state = self.TERBUKA
+        self._buka_sampai = absensi_jadwal.JAM.waktu() + self._cooldown
+        tulis_log(f"[CIRCUIT] {alasan} ke {self.nama}, semua request ditahan {self._cooldown:.0f} detik")
+        self._cond.notify_all()
+
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+def circuit_breaker(base_url=None):
+    """Circuit breaker untuk server (default BASE_URL), satu per proses"""
+    base_url = base_url or BASE_URL
+    with _BREAKERS_LOCK:
+        if base_url not in _BREAKERS:
+            _BREAKERS[base_url] = CircuitBreaker(base_url)
+        return _BREAKERS[base_url]
+
+def _metrik_circuit(metrik):
+    with _BREAKERS_LOCK:
+        daftar = list(_BREAKERS.values())
+    for breaker in daftar:
+        state = breaker.status()["state"]
+        for nama in (CircuitBreaker.TERTUTUP, CircuitBreaker.TERBUKA, CircuitBreaker.SETENGAH):
+            metrik.atur("absensi_circuit_state", 1 if state == nama else 0, server=breaker.nama, state=nama)
+
+METRIK.pengumpul(_metrik_circuit)
+
+def execute_with_retry(func, *args, policy=None, **kwargs):
     """Eksekusi fungsi dengan retry otomatis jika ada error jaringan"""
-    for attempt in range(MAX_RETRY):
+    if policy is None:
+        policy = RetryPolicy()
+    breaker = circuit_breaker()
+
+    for attempt in range(policy.max_attempt):
+        # Deadline dicek sebelum tiap percobaan, termasuk yang pertama
+        sisa = policy.sisa_waktu()
+        if sisa is not None and sisa <= 0:
+            tulis_log("[FAILED] Batas waktu sesi sudah lewat, request tidak dikirim")
+            return None
+
+        # Saat server down, tunggu giliran di circuit breaker (tanpa request)
+        if not breaker.izin(sisa):
+            tulis_log("[FAILED] Batas waktu sesi lewat saat menunggu server pulih")
+            return None
+
         try:
-            return func(*args, **kwargs)
+            hasil = func(*args, **kwargs)
+            breaker.sukses()
+            return hasil
         except (ConnectionError, Timeout, RequestException) as e:
             error_msg = str(e)
             if "NameResolutionError" in error_msg or "No address associated with hostname" in error_msg:
-                tulis_log(f"[NETWORK ERROR] Tidak dapat resolve hostname (attempt {attempt + 1}/{MAX_RETRY})")
+                tulis_log(f"[NETWORK ERROR] Tidak dapat resolve hostname (attempt {attempt + 1}/{policy.max_attempt})")
             elif "ConnectionError" in error_msg:
-                tulis_log(f"[NETWORK ERROR] Koneksi gagal (attempt {attempt + 1}/{MAX_RETRY})")
+                tulis_log(f"[NETWORK ERROR] Koneksi gagal (attempt {attempt + 1}/{policy.max_attempt})")
             elif "Timeout" in error_msg:
-                tulis_log(f"[NETWORK ERROR] Request timeout (attempt {attempt + 1}/{MAX_RETRY})")
-            else:
-                tulis_log(f"[NETWORK ERROR] {error_msg} (attempt {attempt + 1}/{MAX_RETRY})")
-            
-            if attempt < MAX_RETRY - 1:
-                tulis_log(f"[RETRY] Menunggu {RETRY_DELAY} detik sebelum retry...")
-                time.sleep(RETRY_DELAY)
+                tulis_log(f"[NETWORK ERROR] Request timeout (attempt {attempt + 1}/{policy.max_attempt})")
             else:
-                tulis_log(f"[FAILED] Gagal setelah {MAX_RETRY} percobaan")
-                return None
+                tulis_log(f"[NETWORK ERROR] {error_msg} (attempt {attempt + 1}/{policy.max_attempt})")
+            error = e
         except Exception as e:
-            tulis_log(f"[UNEXPECTED ERROR] {str(e)} (attempt {attempt + 1}/{MAX_RETRY})")
-            if attempt < MAX_RETRY - 1:
-                time.sleep(RETRY_DELAY)
-            else:
+            tulis_log(f"[UNEXPECTED ERROR] {str(e)} (attempt {attempt + 1}/{policy.max_attempt})")
+            error = e
+
+        if not policy.boleh_retry(error):
+            breaker.netral()
+            tulis_log(f"[FAILED] Error tidak dapat di-retry: {type(error).__name__}")
+            return None
+
+        breaker.gagal()
+        METRIK.tambah("absensi_retry_total", akun=AKUN_AKTIF.get() or USERNAME)
+
+        if attempt >= policy.max_attempt - 1:
+            tulis_log(f"[FAILED] Gagal setelah {policy.max_attempt} percobaan")
+            return None
+
+        jeda = policy.jeda(attempt)
+        sisa = policy.sisa_waktu()
+        if sisa is not None:
+            if sisa <= 0:
+                tulis_log("[FAILED] Batas waktu sesi sudah lewat, berhenti retry")
                 return None
+            # Jangan tidur melewati deadline, sisakan satu percobaan terakhir
+            jeda = min(jeda, sisa)
+
+        if breaker.state != CircuitBreaker.TERTUTUP:
+            # Circuit breaker yang mengatur kapan request berikutnya boleh dikirim
+            continue
+
+        tulis_log(f"[RETRY] Menunggu {jeda:.1f} detik sebelum retry...")
+        tidur(jeda)
     return None
 
 # ======== FUNGSI INPUT TUNDA =========
+def test_koneksi():
+    if cek_koneksi_internet(paksa=True):
+        tulis_log("[TEST] ✓ Koneksi internet OK")
+    else:
+        tulis_log("[TEST] ✗ Tidak ada koneksi internet")
+
 def input_listener():
     """Thread untuk mendengar input pengguna"""
     global TUNDA_ABSENSI, TANGGAL_TUNDA
@@ -177,9 +1063,11 @@ def input_listener():
             user_input = input().strip().lower()
             
             if user_input == "tunda":
-                hari_ini = datetime.now().date()
+                hari_ini = sekarang().date()
                 TANGGAL_TUNDA = hari_ini
                 TUNDA_ABSENSI = True
+                TUNDA_EVENT.set()
+                simpan_tunda(USERNAME, True)
                 tulis_log(f"[TUNDA] Absensi hari ini ({hari_ini}) ditunda!")
                 tulis_log("[INFO] Ketik 'status' untuk melihat status tunda, atau 'batal' untuk membatalkan tunda.")
                 
@@ -193,28 +1081,37 @@ def input_listener():
                 if TUNDA_ABSENSI:
                     TUNDA_ABSENSI = False
                     TANGGAL_TUNDA = None
+                    TUNDA_EVENT.clear()
+                    simpan_tunda(USERNAME, False)
                     tulis_log("[BATAL] Tunda absensi dibatalkan!")
                 else:
                     tulis_log("[INFO] Tidak ada tunda absensi yang aktif")
                     
             elif user_input == "test":
                 tulis_log("[TEST] Testing koneksi internet...")
-                if cek_koneksi_internet():
-                    tulis_log("[TEST] ✓ Koneksi internet OK")
-                else:
-                    tulis_log("[TEST] ✗ Tidak ada koneksi internet")
+                # Jalankan di thread sendiri agar perintah lain tidak ikut menunggu
+                threading.Thread(target=test_koneksi, daemon=True).start()
                     
+            elif user_input.partition(" ")[0] in absensi_profil.PERINTAH:
+                perintah, _, aksi = user_input.partition(" ")
+                _, baris = absensi_profil.jalankan(perintah, aksi.strip())
+                for teks in baris:
+                    tulis_log(f"[PROFIL] {teks}")
+
             elif user_input == "help":
                 tulis_log("[HELP] Perintah yang tersedia:")
                 tulis_log("  - tunda : Tunda absensi hari ini")
                 tulis_log("  - status : Lihat status tunda")
                 tulis_log("  - batal : Batalkan tunda absensi")
                 tulis_log("  - test : Test koneksi internet")
+                for nama, keterangan in absensi_profil.PERINTAH.items():
+                    tulis_log(f"  - {nama} : {keterangan}")
                 tulis_log("  - help : Tampilkan bantuan ini")
                 tulis_log("  - exit : Keluar dari program")
                 
             elif user_input == "exit":
                 tulis_log("[EXIT] Program dihentikan oleh pengguna")
+                LOG_WRITER.tutup()
                 os._exit(0)
                 
         except (EOFError, KeyboardInterrupt):
@@ -226,7 +1123,7 @@ def cek_tunda_absensi():
     """Cek apakah hari ini absensi ditunda"""
     global TUNDA_ABSENSI, TANGGAL_TUNDA
     
-    hari_ini = datetime.now().date()
+    hari_ini = sekarang().date()
     
     if TUNDA_ABSENSI and TANGGAL_TUNDA == hari_ini:
         return True
@@ -235,85 +1132,150 @@ def cek_tunda_absensi():
     if TANGGAL_TUNDA and hari_ini > TANGGAL_TUNDA:
         TUNDA_ABSENSI = False
         TANGGAL_TUNDA = None
+        TUNDA_EVENT.clear()
         tulis_log("[INFO] Reset status tunda karena tanggal sudah lewat")
     
     return False
 
 # ======== CEK STATUS ABSENSI HARI INI =========
-def cek_status_absensi():
+def cek_status_absensi(username=None, password=None):
     """
     Mengecek status absensi hari ini dari API
+    username/password: kredensial akun (default: USERNAME/PASSWORD global)
     Return: dict dengan status jam_datang dan jam_pulang
     """
+    akun_user = username or USERNAME
+    akun_pass = password or PASSWORD
+    hari_ini = sekarang().date()
+    store = state_store()
+
+    # Status yang sudah dicek hari ini (dan hit kita sendiri) tidak perlu diambil ulang
+    if store:
+        status = store.status(akun_user, hari_ini)
+        if status is not None:
+            tulis_log(f"[INFO] Status dari state lokal: jam_datang={status['jam_datang']}, jam_pulang={status['jam_pulang']}")
+            return status
+
+        # Record hari ini yang sudah lengkap di cache history tidak akan berubah lagi
+        status = store.history(akun_user, hari_ini)
+        if status is not None and status["jam_datang"] and status["jam_pulang"]:
+            tulis_log(f"[INFO] Status dari cache history: jam_datang={status['jam_datang']}, jam_pulang={status['jam_pulang']}")
+            return status
+
     def _cek_status():
-        session = requests.Session()
-        
-        # Login dulu
-        login_payload = {
-            "login": USERNAME,
-            "password": PASSWORD
-        }
-        login_url = BASE_URL + "login/confirm"
-        res = session.post(login_url, data=login_payload, timeout=REQUEST_TIMEOUT)
+        # Ambil data history absensi (login otomatis lewat session pool), dibaca per potongan
+        history_res = SESSION_POOL.request(akun_user, akun_pass, "GET", "absensi/history/kemarin", stream=True)
         
-        if "gagal" in res.text.lower():
+        if history_res is None:
             tulis_log("[ERROR] Login gagal saat cek status absensi")
             return None
-            
-        # Ambil data history absensi
-        history_url = BASE_URL + "absensi/history/kemarin"
-        history_res = session.get(history_url, timeout=REQUEST_TIMEOUT)
-        
-        if history_res.status_code != 200:
-            tulis_log(f"[ERROR] Gagal mengambil data history: {history_res.status_code}")
-            return None
-            
-        data = json.loads(history_res.text)
-        hari_ini = datetime.now().strftime("%Y-%m-%d")
-        
-        # Cari data hari ini
-        for record in data:
-            tanggal_record = record.get('tanggal', '').split(' ')[0]  # Ambil tanggal saja
-            if tanggal_record == hari_ini:
-                tulis_log(f"[INFO] Data absensi hari ini: jam_datang={record.get('jam_datang')}, jam_pulang={record.get('jam_pulang')}")
-                return {
-                    'jam_datang': record.get('jam_datang'),
-                    'jam_pulang': record.get('jam_pulang')
-                }
-        
+
+        with history_res:
+            if history_res.status_code >= 500 or history_res.status_code == 429:
+                history_res.raise_for_status()  # Gangguan server sementara, biarkan di-retry
+
+            if history_res.status_code != 200:
+                tulis_log(f"[ERROR] Gagal mengambil data history: {history_res.status_code}")
+                return None
+
+            tanggal_hari_ini = hari_ini.isoformat()
+            # Record sebelum tanggal terbaru di cache sudah final, cukup dilewati
+            terakhir = store.history_terakhir(akun_user) if store else None
+            baru = []
+            status = None
+
+            # Cari data hari ini, berhenti membaca begitu ketemu
+            potongan = history_res.iter_content(absensi_history.HISTORY_CHUNK)
+            records = absensi_history.baca_records(potongan, history_res.encoding or "utf-8")
+            for record in records:
+                tanggal_record = absensi_history.tanggal_record(record)
+                if store and (terakhir is None or tanggal_record >= terakhir):
+                    baru.append((tanggal_record, record.get('jam_datang'), record.get('jam_pulang')))
+                if tanggal_record == tanggal_hari_ini:
+                    status = {
+                        'jam_datang': record.get('jam_datang'),
+                        'jam_pulang': record.get('jam_pulang')
+                    }
+                    break
+
+        if store:
+            store.simpan_history(akun_user, baru)
+
+        if status is not None:
+            tulis_log(f"[INFO] Data absensi hari ini: jam_datang={status['jam_datang']}, jam_pulang={status['jam_pulang']}")
+            return status
+
         # Jika tidak ada data hari ini
         tulis_log("[INFO] Belum ada data absensi untuk hari ini")
         return {'jam_datang': None, 'jam_pulang': None}
     
-    return execute_with_retry(_cek_status)
+    # Status masih berguna selama jendela absen sore belum tutup
+    status = execute_with_retry(_cek_status, policy=RetryPolicy(deadline=batas_sesi("Sore")))
+    if status is not None and store:
+        store.simpan_status(akun_user, hari_ini, status)
+    return status
 
 # ======== LOGIN & ABSEN =========
-def login_dan_absen(sesi):
-    def _login_dan_absen():
-        session = requests.Session()
-        login_payload = {
-            "login": USERNAME,
-            "password": PASSWORD
-        }
+def login_dan_absen(sesi, username=None, password=None):
+    akun_user = username or USERNAME
+    akun_pass = password or PASSWORD
+    hari_ini = sekarang().date()
+    store = state_store()
 
-        login_url = BASE_URL + "login/confirm"
-        res = session.post(login_url, data=login_payload, timeout=REQUEST_TIMEOUT)
-
-        if "gagal" in res.text.lower():
+    def _login_dan_absen():
+        login_baru = not SESSION_POOL.ada(akun_user)
+        if SESSION_POOL.ambil(akun_user, akun_pass) is None:
             tulis_log(f"[ERROR] Login gagal untuk sesi {sesi}")
             return False
 
-        tulis_log(f"[SUCCESS] Login sukses untuk sesi {sesi}")
+        if login_baru:
+            tulis_log(f"[SUCCESS] Login sukses untuk sesi {sesi}")
 
-        absen_url = BASE_URL + "absensi/hit"
         absen_payload = {}
-        absen_res = session.post(absen_url, data=absen_payload, timeout=REQUEST_TIMEOUT)
+        absen_res = SESSION_POOL.request(akun_user, akun_pass, "POST", "absensi/hit", data=absen_payload)
 
-        tulis_log(f"[RESPONSE] Response absensi ({sesi}): {absen_res.text.strip()}")
-        return True
+        if absen_res is None:
+            tulis_log(f"[ERROR] Login gagal untuk sesi {sesi}")
+            return False
+        if absen_res.status_code >= 500 or absen_res.status_code == 429:
+            absen_res.raise_for_status()  # Gangguan server sementara, biarkan di-retry
+
+        hasil = parse_hit(absen_res)
+        tulis_log(f"[RESPONSE] Response absensi ({sesi}): {hasil.pesan or '-'} (jam {hasil.jam or '-'})")
+        if hasil.sudah:
+            tulis_log(f"[COMPLETE] Absen {sesi.lower()} sudah tercatat di server sebelumnya")
+        elif hasil.sukses is False:
+            tulis_log(f"[FAILED] Absen {sesi.lower()} ditolak server")
+        return hasil
     
-    result = execute_with_retry(_login_dan_absen)
-    return result if result is not None else False
+    # Tandai hit sedang diproses: jika crash sebelum selesai, status dicek ulang ke server
+    if store:
+        store.mulai_hit(akun_user, hari_ini, sesi)
+
+    result = execute_with_retry(_login_dan_absen, policy=RetryPolicy(deadline=batas_sesi(sesi)))
+
+    if result is None:
+        hasil = "gagal"
+    elif result is False or result.sukses is False:
+        hasil = "ditolak"
+    elif result.sudah:
+        hasil = "sudah"
+    else:
+        hasil = "sukses" if result.sukses else "tidak_pasti"
+    METRIK.tambah("absensi_hit_total", akun=akun_user, sesi=sesi, hasil=hasil)
+
+    if store:
+        if hasil == "sukses":
+            # Jam dari response server; jika tidak ada, perkiraan jam server (bukan jam lokal)
+            jam = result.jam or JAM_SERVER.waktu_server().strftime("%H:%M:%S")
+            store.catat_hit(akun_user, hari_ini, sesi, jam)
+        elif hasil == "sudah" and result.jam:
+            store.catat_hit(akun_user, hari_ini, sesi, result.jam)
+        elif hasil == "ditolak":
+            store.batal_hit(akun_user, hari_ini)
+        # gagal jaringan / tidak pasti / sudah tanpa jam: tanda proses dibiarkan,
+        # jam sebenarnya dicek ulang ke server (history)
+    return hasil in ("sukses", "sudah", "tidak_pasti")
 
 # ======== WAIT WITH NETWORK CHECK =========
 def wait_with_network_check(target_time, check_interval=300):
@@ -323,23 +1285,79 @@ def wait_with_network_check(target_time, check_interval=300):
     """
     last_network_check = 0
     
-    while datetime.now() < target_time:
+    while True:
         if cek_tunda_absensi():
             tulis_log("[TUNDA] Absensi ditunda saat menunggu")
             return False
             
-        current_time = time.time()
+        sisa = (target_time - sekarang()).total_seconds()
+        if sisa <= 0:
+            break
+            
+        current_time = absensi_jadwal.JAM.waktu()
         
         # Cek jaringan setiap check_interval
         if current_time - last_network_check >= check_interval:
             if not cek_koneksi_internet():
                 tulis_log("[WARNING] Tidak ada koneksi internet, tetap menunggu...")
             last_network_check = current_time
-            
-        time.sleep(30)
+        
+        # Tidur sampai target / cek jaringan berikutnya, langsung bangun jika ada tunda
+        sampai_cek = check_interval - (absensi_jadwal.JAM.waktu() - last_network_check)
+        absensi_jadwal.JAM.tunggu_event(TUNDA_EVENT, min(sisa, sampai_cek))
     
     return True
 
+def panaskan_koneksi(username=None, password=None):
+    """
+    Siapkan session dari SESSION_POOL sesaat sebelum jadwal hit: resolve DNS, buka
+    koneksi keep-alive dan pastikan session masih login lewat satu HEAD ke history
+    (login ulang hanya jika session kadaluarsa), jadi saat jadwal tiba hit cukup
+    satu request. Session yang baru saja terbukti login tidak dicek lagi.
+    Return True jika berhasil (gagal tidak fatal, hit tetap login sendiri)
+    """
+    akun_user = username or USERNAME
+    akun_pass = password or PASSWORD
+
+    if circuit_breaker().state != CircuitBreaker.TERTUTUP:
+        tulis_log("[PEMANASAN] Server sedang down, pemanasan koneksi dilewati")
+        return False
+
+    try:
+        # Belum ada session: login di sini sekaligus jadi pemanasannya
+        if SESSION_POOL.ambil(akun_user, akun_pass) is None:
+            tulis_log("[PEMANASAN] Login gagal saat memanaskan koneksi")
+            return False
+        if SESSION_POOL.segar(akun_user, SESI_SEGAR_DETIK):
+            tulis_log("[PEMANASAN] Session baru saja dipakai, koneksi dan session siap untuk hit")
+            return True
+
+        res = SESSION_POOL.request(akun_user, akun_pass, "HEAD", "absensi/history/kemarin")
+        if res is None:
+            tulis_log("[PEMANASAN] Login gagal saat memanaskan koneksi")
+            return False
+        res.close()
+        if res.status_code >= 400:
+            tulis_log(f"[PEMANASAN] Server membalas HTTP {res.status_code} saat memanaskan koneksi")
+            return False
+    except RequestException as e:
+        tulis_log(f"[PEMANASAN] Gagal memanaskan koneksi: {type(e).__name__}")
+        return False
+
+    tulis_log("[PEMANASAN] Koneksi dan session siap untuk hit")
+    return True
+
+def tunggu_dengan_pemanasan(target_time, sesi):
+    """wait_with_network_check, dengan panaskan_koneksi PEMANASAN_DETIK sebelum target"""
+    if not wait_with_network_check(waktu_tembak(target_time, sesi, laporkan=False) - timedelta(seconds=PEMANASAN_DETIK)):
+        return False
+    panaskan_koneksi()
+    tembak = waktu_tembak(target_time, sesi)
+    if not wait_with_network_check(tembak):
+        return False
+    METRIK.amati("absensi_jadwal_lag_detik", max(0, absensi_jadwal.JAM.waktu() - tembak.timestamp()))
+    return True
+
 # ======== PROSES ABSENSI PER HARI =========
 def absensi_harian():
     # Cek apakah absensi hari ini ditunda
@@ -347,7 +1365,7 @@ def absensi_harian():
         tulis_log("[TUNDA] Absensi hari ini ditunda. Skip absensi.")
         return
         
-    hari_ini = datetime.now().strftime("%A").lower()
+    hari_ini = sekarang().strftime("%A").lower()
     hari_allowed = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
 
     if hari_ini not in hari_allowed:
@@ -370,8 +1388,7 @@ def absensi_harian():
     jam_datang = status.get('jam_datang')
     jam_pulang = status.get('jam_pulang')
     
-    waktu_pagi = random_jam(PAGI_START, PAGI_END)
-    waktu_sore = random_jam(SORE_START, SORE_END)
+    waktu_pagi, waktu_sore = jadwal_hari_ini()
     
     tulis_log(f"[SCHEDULE] Jadwal absen pagi: {waktu_pagi.strftime('%H:%M:%S')}")
     tulis_log(f"[SCHEDULE] Jadwal absen sore: {waktu_sore.strftime('%H:%M:%S')}")
@@ -380,7 +1397,7 @@ def absensi_harian():
     if jam_datang is None:
         # Belum absen masuk, tunggu jadwal pagi
         tulis_log("[WAITING] Status: Belum absen masuk, menunggu waktu absen pagi...")
-        if not wait_with_network_check(waktu_pagi):
+        if not tunggu_dengan_pemanasan(waktu_pagi, "Pagi"):
             return
         
         if cek_tunda_absensi():  # Cek sekali lagi sebelum absen
@@ -394,7 +1411,7 @@ def absensi_harian():
         
         # Setelah absen pagi, tunggu waktu sore
         tulis_log("[WAITING] Absen pagi selesai, menunggu waktu absen sore...")
-        if not wait_with_network_check(waktu_sore):
+        if not tunggu_dengan_pemanasan(waktu_sore, "Sore"):
             return
         
         if cek_tunda_absensi():  # Cek sekali lagi sebelum absen
@@ -409,7 +1426,7 @@ def absensi_harian():
     elif jam_datang is not None and jam_pulang is None:
         # Sudah absen masuk, belum absen pulang
         tulis_log(f"[WAITING] Status: Sudah absen masuk ({jam_datang}), belum absen pulang. Menunggu waktu absen sore...")
-        if not wait_with_network_check(waktu_sore):
+        if not tunggu_dengan_pemanasan(waktu_sore, "Sore"):
             return
         
         if cek_tunda_absensi():  # Cek sekali lagi sebelum absen
@@ -444,24 +1461,33 @@ def main():
     tulis_log("  - Ketik 'exit' untuk keluar")
     tulis_log("[INFO] ========================================")
     
+    # Pulihkan tunda hari ini jika program sempat restart
+    global TUNDA_ABSENSI, TANGGAL_TUNDA
+    if tunda_tersimpan(USERNAME):
+        TUNDA_ABSENSI = True
+        TANGGAL_TUNDA = sekarang().date()
+        TUNDA_EVENT.set()
+        tulis_log(f"[TUNDA] Status tunda hari ini ({TANGGAL_TUNDA}) dipulihkan dari state")
+    
     # Jalankan input listener di thread terpisah
     input_thread = threading.Thread(target=input_listener, daemon=True)
     input_thread.start()
     
     while True:
         try:
+            bersihkan_state()
             absensi_harian()
         except Exception as e:
             tulis_log(f"[CRITICAL ERROR] Error tidak terduga: {str(e)}")
             tulis_log("[INFO] Melanjutkan ke hari berikutnya...")
 
         # Tunggu sampai hari berikutnya jam 00:05
-        besok = datetime.now().date() + timedelta(days=1)
+        besok = sekarang().date() + timedelta(days=1)
         target = datetime.combine(besok, datetime.min.time()) + timedelta(minutes=5)
-        tunggu = (target - datetime.now()).total_seconds()
+        tunggu = (target - sekarang()).total_seconds()
 
         tulis_log(f"[WAIT] Menunggu hari berikutnya ({tunggu/3600:.2f} jam)")
-        time.sleep(max(0, tunggu))
+        tidur(max(0, tunggu))
 
 if __name__ == "__main__":
     main()
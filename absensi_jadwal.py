@@ -0,0 +1,280 @@
+import asyncio
+from array import array
+from datetime import datetime, timedelta, timezone
+import heapq
+import itertools
+import random
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:     # opsional: tanpa NumPy jadwal dibuat dengan array + loop Python
+    np = None
+
+# ======== JAM (CLOCK) =========
+class JamSistem:
+    """Jam asli: datetime.now() / time.sleep()"""
+
+    virtual = False
+
+    def sekarang(self):
+        return datetime.now()
+
+    def waktu(self):
+        return time.time()
+
+    def tidur(self, detik):
+        time.sleep(max(0, detik))
+
+    def tunggu_event(self, event, timeout):
+        return event.wait(max(0, timeout))
+
+
+class JamVirtual:
+    """
+    Jam simulasi: waktu hanya maju saat ada yang tidur/menunggu, dan
+    langsung lompat ke deadline berikutnya. Satu hari selesai dalam milidetik.
+    """
+
+    virtual = True
+
+    def __init__(self, mulai=None):
+        self._sekarang = mulai or datetime.now()
+        self._lock = threading.Lock()
+
+    def sekarang(self):
+        return self._sekarang
+
+    def waktu(self):
+        return self._sekarang.timestamp()
+
+    def maju(self, detik):
+        with self._lock:
+            self._sekarang += timedelta(seconds=max(0, detik))
+
+    def lompat_ke(self, target):
+        with self._lock:
+            if target > self._sekarang:
+                self._sekarang = target
+
+    def tidur(self, detik):
+        self.maju(detik)
+
+    def tunggu_event(self, event, timeout):
+        if event.is_set():
+            return True
+        self.maju(timeout)
+        return event.is_set()
+
+
+JAM = JamSistem()
+
+def pakai_jam(jam):
+    """Ganti jam global (misal JamVirtual untuk simulasi/testing)"""
+    global JAM
+    JAM = jam
+    return jam
+
+def sekarang():
+    return JAM.sekarang()
+
+def tidur(detik):
+    JAM.tidur(detik)
+
+# ======== PEMBAGIAN SLOT =========
+def bagi_slot_epoch(jumlah, mulai, akhir, per_detik, terpakai=None):
+    """
+    Pilih jumlah waktu acak (epoch detik) di antara mulai..akhir (datetime)
+    yang tersebar rata, tiap detik dipakai maksimal per_detik kali (termasuk
+    yang sudah ada di terpakai, dict epoch detik -> jumlah).
+
+    Semua slot yang masih kosong dijajarkan berurutan (detik d muncul sisa[d]
+    kali), dibagi menjadi jumlah bagian sama besar, lalu dari tiap bagian
+    diambil satu slot acak dan urutannya diacak. Batas per detik otomatis
+    terpenuhi tanpa menggeser waktu satu per satu. Dengan NumPy semua langkah
+    berupa operasi vektor (hasil ndarray int64), tanpa NumPy hasilnya array('q').
+    """
+    total_detik = int((akhir - mulai).total_seconds()) + 1
+    if jumlah <= 0 or total_detik <= 0:
+        return np.empty(0, dtype=np.int64) if np is not None else array("q")
+
+    awal = int(mulai.timestamp())
+    sisa = [int(per_detik)] * total_detik
+    for detik, n in (terpakai or {}).items():
+        if 0 <= detik - awal < total_detik:
+            sisa[detik - awal] -= n
+
+    # Kapasitas tidak cukup: naikkan batas per detik seperlunya
+    kurang = jumlah - sum(max(0, n) for n in sisa)
+    while kurang > 0:
+        tambah = -(-kurang // total_detik)
+        sisa = [n + tambah for n in sisa]
+        kurang = jumlah - sum(max(0, n) for n in sisa)
+
+    if np is not None:
+        # Seed dari modul random agar random.seed() (simulasi.py) tetap berlaku
+        rng = np.random.default_rng(random.getrandbits(64))
+        slot = np.repeat(np.arange(total_detik, dtype=np.int64), np.clip(sisa, 0, None))
+        i = np.arange(jumlah, dtype=np.int64)
+        pilih = rng.integers(i * len(slot) // jumlah, (i + 1) * len(slot) // jumlah)
+        hasil = slot[pilih] + awal
+        rng.shuffle(hasil)
+        return hasil
+
+    slot = array("q")
+    for detik, n in enumerate(sisa):
+        if n > 0:
+            slot.extend(array("q", [detik]) * n)
+    kapasitas = len(slot)
+    hasil = array("q", (awal + slot[random.randrange(i * kapasitas // jumlah, (i + 1) * kapasitas // jumlah)]
+                        for i in range(jumlah)))
+    random.shuffle(hasil)
+    return hasil
+
+def iso_lokal(daftar_epoch):
+    """Epoch detik -> string ISO jam lokal ('2026-01-05T07:51:02'), sekaligus jika ada NumPy"""
+    if np is None or not len(daftar_epoch):
+        return [datetime.fromtimestamp(int(detik)).isoformat(timespec="seconds") for detik in daftar_epoch]
+
+    epoch = np.asarray(daftar_epoch, dtype=np.int64)
+    # Selisih zona waktu lokal, dianggap tetap dalam satu jendela absen
+    acuan = int(epoch[0])
+    selisih = datetime.fromtimestamp(acuan) - datetime.fromtimestamp(acuan, timezone.utc).replace(tzinfo=None)
+    lokal = (epoch + int(selisih.total_seconds())).astype("datetime64[s]")
+    return np.datetime_as_string(lokal, unit="s").tolist()
+
+# ======== PENJADWAL DEADLINE =========
+class Penjadwal:
+    """
+    Penjadwal berbasis heap untuk semua akun dalam satu event loop.
+
+    Hanya ada satu timer aktif (untuk deadline paling dekat), jadi proses
+    tidak bangun berkala hanya untuk membandingkan jam. Penantian bisa
+    dibangunkan lebih awal lewat bangunkan() (misal saat ada perintah tunda).
+
+    Dengan JamVirtual, waktu langsung dilompatkan ke deadline berikutnya
+    begitu tidak ada pekerjaan yang sedang berjalan (lihat mulai_sibuk()).
+    """
+
+    def __init__(self):
+        self._heap = []         # (deadline_epoch, seq, future)
+        self._seq = itertools.count()
+        self._menunggu = {}     # username -> {future: set alasan bangun}
+        self._timer = None
+        self._timer_deadline = None
+        self._sibuk = 0
+        self._lompat_dijadwalkan = False
+
+    def mulai_sibuk(self):
+        """Tandai ada pekerjaan berjalan (request jaringan) agar jam virtual tidak melompat"""
+        self._sibuk += 1
+
+    def selesai_sibuk(self):
+        self._sibuk -= 1
+        if self._sibuk == 0 and JAM.virtual:
+            self._jadwalkan_lompat()
+
+    def jumlah_menunggu(self):
+        return sum(len(v) for v in self._menunggu.values())
+
+    async def tunggu_sampai(self, username, target_time, bangun_saat=("tunda",)):
+        """
+        Tunggu sampai target_time (datetime) untuk akun username
+        Return True jika deadline tercapai, False jika dibangunkan lebih awal
+        """
+        loop = asyncio.get_running_loop()
+        deadline = target_time.timestamp()
+        if deadline <= JAM.waktu():
+            return True
+
+        fut = loop.create_future()
+        heapq.heappush(self._heap, (deadline, next(self._seq), fut))
+        self._menunggu.setdefault(username, {})[fut] = set(bangun_saat)
+        self._atur_timer()
+
+        try:
+            return await fut
+        finally:
+            if fut.done() and not fut.cancelled():
+                # Task yang dibangunkan sudah lanjut jalan (lihat _selesaikan)
+                self.selesai_sibuk()
+            daftar = self._menunggu.get(username)
+            if daftar is not None:
+                daftar.pop(fut, None)
+                if not daftar:
+                    del self._menunggu[username]
+
+    def bangunkan(self, username, alasan):
+        """Bangunkan penantian akun yang menerima alasan ini (return jumlah yang dibangunkan)"""
+        jumlah = 0
+        for fut, bangun_saat in list(self._menunggu.get(username, {}).items()):
+            if alasan in bangun_saat and not fut.done():
+                self._selesaikan(fut, False)
+                jumlah += 1
+        return jumlah
+
+    def _selesaikan(self, fut, hasil):
+        # Task yang dibangunkan belum sempat jalan, anggap sibuk sampai ia lanjut
+        # agar jam virtual tidak melompat melewati pekerjaannya
+        self._sibuk += 1
+        fut.set_result(hasil)
+
+    def _buang_selesai(self):
+        # Entry yang sudah dibangunkan/dibatalkan dibuang secara lazy
+        while self._heap and self._heap[0][2].done():
+            heapq.heappop(self._heap)
+
+    def _atur_timer(self):
+        if JAM.virtual:
+            self._jadwalkan_lompat()
+            return
+
+        self._buang_selesai()
+        if not self._heap:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+                self._timer_deadline = None
+            return
+
+        deadline = self._heap[0][0]
+        if self._timer is not None and self._timer_deadline == deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(max(0, deadline - JAM.waktu()), self._jalankan)
+        self._timer_deadline = deadline
+
+    def _jadwalkan_lompat(self):
+        if not self._lompat_dijadwalkan:
+            self._lompat_dijadwalkan = True
+            asyncio.get_running_loop().call_soon(self._lompat)
+
+    def _lompat(self):
+        # Callback ini antri di belakang task yang sudah siap jalan, jadi
+        # semua akun sempat mendaftarkan deadline-nya sebelum jam dilompatkan
+        self._lompat_dijadwalkan = False
+        self._buang_selesai()
+        if self._sibuk or not self._heap:
+            return
+        deadline = self._heap[0][0]
+        JAM.lompat_ke(datetime.fromtimestamp(deadline))
+        # max() menghindari selisih pembulatan float saat konversi epoch <-> datetime
+        self._jalankan(max(JAM.waktu(), deadline))
+
+    def _jalankan(self, sekarang=None):
+        self._timer = None
+        self._timer_deadline = None
+        if sekarang is None:
+            sekarang = JAM.waktu()
+
+        # Selesaikan semua deadline yang sudah lewat
+        while self._heap and self._heap[0][0] <= sekarang:
+            _, _, fut = heapq.heappop(self._heap)
+            if not fut.done():
+                self._selesaikan(fut, True)
+
+        self._atur_timer()
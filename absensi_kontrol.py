@@ -0,0 +1,267 @@
+"""
+Control API lokal untuk engine multi akun (absensi_multi.py).
+
+Engine membuka Unix domain socket KONTROL_SOCKET (atau loopback TCP
+127.0.0.1:KONTROL_PORT jika platform tidak punya AF_UNIX). Protokolnya satu
+baris JSON per request dan satu baris JSON per response:
+
+    {"perintah": "tunda", "akun": "budi"}
+    {"ok": true, "hasil": {...}}
+
+"akun" boleh username, list username, "semua", atau dikosongkan (= semua).
+Untuk perintah profiling (profil/memori/dump) "akun" berisi aksinya,
+misal {"perintah": "profil", "akun": "mulai"}.
+Baris teks biasa seperti "tunda budi" juga diterima.
+
+Dari terminal:
+    python absensi_kontrol.py status
+    python absensi_kontrol.py tunda budi
+    python absensi_kontrol.py batal semua
+    python absensi_kontrol.py metrik
+    python absensi_kontrol.py profil mulai
+"""
+import asyncio
+import errno
+import json
+import os
+import socket
+import sys
+
+import absensi_profil
+from absensi_jadwal import sekarang
+
+# ======== KONFIGURASI =========
+KONTROL_SOCKET = "absensi_kontrol.sock"
+KONTROL_PORT = 8765     # dipakai jika AF_UNIX tidak tersedia (Windows)
+
+PERINTAH = {
+    "tunda": "Tunda absensi hari ini",
+    "batal": "Batalkan tunda absensi",
+    "status": "Lihat status tunda/jadwal/absen",
+    "test": "Test koneksi internet",
+    "metrik": "Tampilkan metrik (format Prometheus)",
+    **absensi_profil.PERINTAH,
+    "help": "Tampilkan bantuan ini",
+    "exit": "Hentikan engine",
+}
+
+def pakai_unix_socket():
+    return hasattr(socket, "AF_UNIX")
+
+# ======== PEMROSES PERINTAH =========
+class Kontrol:
+    """Eksekusi perintah kontrol di dalam event loop engine (tanpa thread lain)"""
+
+    def __init__(self, daftar_akun, penjadwal):
+        self.daftar_akun = list(daftar_akun)
+        self.akun = {akun.username.lower(): akun for akun in self.daftar_akun}
+        self.penjadwal = penjadwal
+
+    def pilih(self, target):
+        """Return (akun terpilih, username yang tidak ditemukan)"""
+        if isinstance(target, str):
+            target = [target]
+        if not target or "semua" in target:
+            return list(self.daftar_akun), []
+
+        terpilih, hilang = [], []
+        for nama in target:
+            akun = self.akun.get(str(nama).lower())
+            if akun is None:
+                hilang.append(nama)
+            else:
+                terpilih.append(akun)
+        return terpilih, hilang
+
+    async def jalankan(self, perintah, target=None):
+        """Jalankan satu perintah, return dict hasil (selalu ada key 'ok')"""
+        # Import di sini agar modul ini tidak ikut memuat requests saat dipakai sebagai client
+        from absensi_inp import tulis_log, cek_koneksi_internet, state_store, circuit_breaker, JAM_SERVER
+
+        if perintah not in PERINTAH:
+            return {"ok": False, "error": f"Perintah tidak dikenal: {perintah}"}
+
+        if perintah == "help":
+            return {"ok": True, "hasil": PERINTAH}
+
+        if perintah == "test":
+            # Probe berjalan di thread, perintah lain tetap dilayani
+            ada = await asyncio.to_thread(cek_koneksi_internet, True)
+            return {"ok": True, "hasil": {"koneksi": ada}}
+
+        if perintah == "exit":
+            return {"ok": True, "hasil": "Engine dihentikan"}
+
+        if perintah in absensi_profil.PERINTAH:
+            aksi = target if isinstance(target, str) else " ".join(map(str, target or []))
+            ok, baris = absensi_profil.jalankan(perintah, aksi, asyncio.get_running_loop())
+            tulis_log(f"[PROFIL] {perintah} {aksi}: {baris[0]}")
+            return {"ok": True, "hasil": baris} if ok else {"ok": False, "error": "; ".join(baris)}
+
+        if perintah == "metrik":
+            from absensi_metrik import METRIK
+            return {"ok": True, "hasil": METRIK.format_prometheus()}
+
+        terpilih, hilang = self.pilih(target)
+        if hilang:
+            return {"ok": False, "error": f"Akun tidak ditemukan: {', '.join(map(str, hilang))}"}
+
+        if perintah == "tunda":
+            for akun in terpilih:
+                await akun.set_tunda()
+            tulis_log(f"[TUNDA] Absensi hari ini ditunda untuk {len(terpilih)} akun")
+            return {"ok": True, "hasil": {"ditunda": len(terpilih)}}
+
+        if perintah == "batal":
+            jumlah = 0
+            for akun in terpilih:
+                jumlah += await akun.batal_tunda()
+            tulis_log(f"[BATAL] Tunda dibatalkan untuk {jumlah} akun")
+            return {"ok": True, "hasil": {"dibatalkan": jumlah}}
+
+        # status
+        store = state_store()
+        hari_ini = sekarang().date()
+
+        def baca_state():
+            return {akun.username: store.ambil(akun.username, hari_ini) for akun in terpilih} if store else {}
+
+        # Query SQLite di thread agar event loop (penjadwal hit) tidak ikut menunggu
+        semua_state = await asyncio.to_thread(baca_state)
+        detail = {}
+        for akun in terpilih:
+            state = semua_state.get(akun.username)
+            detail[akun.username] = {
+                "tunda": akun.cek_tunda(),
+                "waktu_pagi": state["waktu_pagi"] if state else None,
+                "waktu_sore": state["waktu_sore"] if state else None,
+                "jam_datang": state["jam_datang"] if state else None,
+                "jam_pulang": state["jam_pulang"] if state else None,
+            }
+        return {"ok": True, "hasil": {
+            "akun": len(terpilih),
+            "ditunda": sum(1 for d in detail.values() if d["tunda"]),
+            "penantian_aktif": self.penjadwal.jumlah_menunggu(),
+            "circuit": circuit_breaker().status(),
+            "jam_server": JAM_SERVER.status(),
+            "detail": detail,
+        }}
+
+# ======== SERVER =========
+def parse_request(baris):
+    """Terima JSON {"perintah", "akun"} atau teks 'perintah [akun ...]'"""
+    baris = baris.strip()
+    if baris.startswith("{"):
+        data = json.loads(baris)
+        return str(data.get("perintah", "")).lower(), data.get("akun")
+    bagian = baris.lower().split()
+    if not bagian:
+        return "", None
+    return bagian[0], (bagian[1:] or None)
+
+async def _layani(kontrol, reader, writer):
+    from absensi_inp import tulis_log, LOG_WRITER
+
+    try:
+        while True:
+            baris = await reader.readline()
+            if not baris:
+                break
+
+            try:
+                perintah, target = parse_request(baris.decode("utf-8"))
+                hasil = await kontrol.jalankan(perintah, target)
+            except Exception as e:
+                perintah, hasil = None, {"ok": False, "error": str(e)}
+
+            writer.write((json.dumps(hasil, default=str) + "\n").encode("utf-8"))
+            await writer.drain()
+
+            if perintah == "exit" and hasil.get("ok"):
+                tulis_log("[EXIT] Program dihentikan lewat control API")
+                writer.close()
+                LOG_WRITER.tutup()
+                os._exit(0)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+def socket_hidup(path):
+    """True jika ada proses yang masih mendengarkan di Unix socket path"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        return True
+    except OSError:
+        return False    # tidak ada yang listen (sisa proses yang sudah mati) / bukan socket
+    finally:
+        sock.close()
+
+async def mulai_server(kontrol, alamat=None):
+    """
+    Mulai server kontrol di event loop yang sedang berjalan
+    OSError jika socket masih dipakai engine lain
+    """
+    handler = lambda reader, writer: _layani(kontrol, reader, writer)
+
+    if pakai_unix_socket():
+        path = alamat or KONTROL_SOCKET
+        if os.path.exists(path):
+            if socket_hidup(path):
+                raise OSError(errno.EADDRINUSE, f"Engine lain masih aktif di {path}")
+            os.remove(path)     # sisa proses sebelumnya
+        # Socket langsung dibuat 0600 (chmod setelah bind masih menyisakan celah)
+        umask_lama = os.umask(0o077)
+        try:
+            return await asyncio.start_unix_server(handler, path=path)
+        finally:
+            os.umask(umask_lama)
+
+    return await asyncio.start_server(handler, host="127.0.0.1", port=alamat or KONTROL_PORT)
+
+# ======== CLIENT =========
+def kirim(perintah, akun=None, alamat=None, timeout=30):
+    """Kirim satu perintah ke engine yang berjalan, return dict response"""
+    if pakai_unix_socket():
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(alamat or KONTROL_SOCKET)
+    else:
+        sock = socket.create_connection(("127.0.0.1", alamat or KONTROL_PORT), timeout=timeout)
+
+    with sock:
+        sock.sendall((json.dumps({"perintah": perintah, "akun": akun}) + "\n").encode("utf-8"))
+        data = b""
+        while not data.endswith(b"\n"):
+            potongan = sock.recv(65536)
+            if not potongan:
+                break
+            data += potongan
+    return json.loads(data.decode("utf-8"))
+
+def main():
+    if len(sys.argv) < 2:
+        print("Penggunaan: python absensi_kontrol.py <perintah> [username ...|semua]")
+        for nama, keterangan in PERINTAH.items():
+            print(f"  - {nama} : {keterangan}")
+        sys.exit(1)
+
+    perintah = sys.argv[1].lower()
+    akun = sys.argv[2:] or None
+    try:
+        hasil = kirim(perintah, akun)
+    except OSError as e:
+        print(f"[ERROR] Tidak dapat terhubung ke engine: {str(e)}")
+        sys.exit(1)
+
+    if perintah == "metrik" and hasil.get("ok"):
+        print(hasil["hasil"], end="")
+    elif perintah in absensi_profil.PERINTAH and hasil.get("ok"):
+        print("\n".join(hasil["hasil"]))
+    else:
+        print(json.dumps(hasil, indent=2, default=str))
+    sys.exit(0 if hasil.get("ok") else 1)
+
+if __name__ == "__main__":
+    main()
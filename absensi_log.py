@@ -0,0 +1,267 @@
+"""
+Query cepat untuk absensi_log.txt (dan file rotasinya) tanpa grep seluruh file.
+
+Baris log selalu diawali timestamp "[YYYY-mm-dd HH:MM:SS]" dan urut waktu,
+jadi file di-mmap lalu posisi tanggal/jam dicari dengan binary search.
+Indeks offset awal tiap tanggal disimpan di file sidecar <log>.idx dan
+hanya diperbarui untuk bagian file yang baru bertambah (dibangun ulang
+otomatis jika file sudah dirotasi).
+
+Contoh:
+    python absensi_log.py --akun budi --tanggal 2026-01-05 --tag RESPONSE
+    python absensi_log.py --dari "2026-01-05 07:45" --sampai "2026-01-05 08:15" --tag "NETWORK ERROR"
+    python absensi_log.py --tag SUCCESS --tag FAILED --jumlah absensi_log.txt absensi_log.txt.1
+    python absensi_log.py --tag TUNDA --ikuti
+    python absensi_log.py --hari
+"""
+import argparse
+import bisect
+import mmap
+import os
+import re
+import sys
+import time
+
+# ======== KONFIGURASI =========
+LOG_FILE = "absensi_log.txt"
+IKUTI_INTERVAL = 0.5    # detik antar cek file saat --ikuti
+
+_POLA_WAKTU = re.compile(rb"^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\]", re.MULTILINE)
+
+def _cari(mm, kunci, awal, akhir):
+    """Offset baris pertama di [awal, akhir) dengan timestamp >= kunci (binary search, baris urut waktu)"""
+    lo, hi = awal, akhir
+    while lo < hi:
+        tengah = (lo + hi) // 2
+        # '^' hanya cocok di awal baris, jadi ini baris pertama yang mulai di/sesudah tengah
+        m = _POLA_WAKTU.search(mm, tengah, akhir)
+        if m is None or m.group(1) >= kunci:
+            hi = tengah
+        else:
+            lo = m.start() + 1
+    m = _POLA_WAKTU.search(mm, lo, akhir)
+    return m.start() if m else akhir
+
+# ======== INDEKS TANGGAL =========
+class IndeksLog:
+    """
+    Offset awal tiap tanggal di file log, disimpan di <log>.idx:
+        # <inode> <ukuran terindeks>
+        2026-01-05 0
+        2026-01-06 48213
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.path_idx = path + ".idx"
+        self.inode = None
+        self.ukuran = 0
+        self.tanggal = []   # bytes 'YYYY-MM-DD', urut
+        self.offset = []
+
+    def _muat(self):
+        try:
+            with open(self.path_idx, "rb") as f:
+                baris = f.read().splitlines()
+        except OSError:
+            return
+        try:
+            _, inode, ukuran = baris[0].split()
+            tanggal, offset = [], []
+            for item in baris[1:]:
+                tgl, posisi = item.split()
+                tanggal.append(tgl)
+                offset.append(int(posisi))
+        except (IndexError, ValueError):
+            return  # indeks rusak: dibangun ulang
+        self.inode, self.ukuran = int(inode), int(ukuran)
+        self.tanggal, self.offset = tanggal, offset
+
+    def _simpan(self):
+        isi = [f"# {self.inode} {self.ukuran}".encode()]
+        isi += [tgl + b" " + str(posisi).encode() for tgl, posisi in zip(self.tanggal, self.offset)]
+        sementara = f"{self.path_idx}.{os.getpid()}.tmp"
+        try:
+            with open(sementara, "wb") as f:
+                f.write(b"\n".join(isi) + b"\n")
+            os.replace(sementara, self.path_idx)
+        except OSError:
+            pass    # folder read-only: indeks tetap dipakai di memori
+
+    def perbarui(self, mm, stat):
+        """Indeks bagian file yang belum terindeks (hanya baris yang sudah lengkap)"""
+        self._muat()
+        if self.inode != stat.st_ino or self.ukuran > len(mm):
+            # File baru / sudah dirotasi: mulai dari awal
+            self.inode, self.ukuran = stat.st_ino, 0
+            self.tanggal, self.offset = [], []
+
+        akhir = mm.rfind(b"\n") + 1
+        if akhir <= self.ukuran:
+            return
+
+        posisi = self.ukuran
+        while posisi < akhir:
+            m = _POLA_WAKTU.search(mm, posisi, akhir)
+            if m is None:
+                break
+            tgl = m.group(1)[:10]
+            if not self.tanggal or tgl > self.tanggal[-1]:
+                self.tanggal.append(tgl)
+                self.offset.append(m.start())
+            # Lompat ke baris pertama tanggal berikutnya ('~' lebih besar dari ' ' dan angka)
+            posisi = _cari(mm, tgl + b"~", m.start(), akhir)
+        self.ukuran = akhir
+        self._simpan()
+
+    def rentang(self, dari, sampai, ukuran):
+        """Offset [awal, akhir) untuk tanggal dari..sampai (bytes 'YYYY-MM-DD', None = tanpa batas)"""
+        awal, akhir = 0, ukuran
+        if dari is not None:
+            i = bisect.bisect_left(self.tanggal, dari)
+            awal = self.offset[i] if i < len(self.offset) else ukuran
+        if sampai is not None:
+            i = bisect.bisect_right(self.tanggal, sampai)
+            akhir = self.offset[i] if i < len(self.offset) else ukuran
+        return awal, max(awal, akhir)
+
+# ======== QUERY =========
+def pola_filter(akun=None, tag=None, teks=None):
+    """Regex satu baris log: akun persis, salah satu tag, dan teks (tanpa beda huruf besar/kecil)"""
+    pola = rb"^\[\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\] "
+    if akun:
+        pola += rb"\[" + re.escape(akun.encode()) + rb"\] "
+    if tag:
+        daftar = [t.strip("[]").upper().encode() for t in ([tag] if isinstance(tag, str) else tag)]
+        pola += rb"(?=[^\n]*\[(?:" + b"|".join(re.escape(t) for t in daftar) + rb")\])"
+    if teks:
+        pola += rb"(?=[^\n]*(?i:" + re.escape(teks.encode()) + rb"))"
+    return re.compile(pola + rb"[^\n]*", re.MULTILINE)
+
+def _kunci_waktu(teks, akhir=False):
+    """'2026-01-05' / '2026-01-05 07:45[:00]' -> (tanggal, kunci timestamp) dalam bytes"""
+    teks = teks.strip().replace("T", " ")
+    if not re.fullmatch(r"\d{4}-\d\d-\d\d( \d\d:\d\d(:\d\d)?)?", teks):
+        raise ValueError(f"Format waktu tidak dikenal: {teks} (YYYY-mm-dd [HH:MM[:SS]])")
+    kunci = teks.encode()
+    # Batas akhir inklusif: '~' lebih besar dari semua sisa timestamp dengan awalan sama
+    return kunci[:10], (kunci + b"~" if akhir else kunci)
+
+def cari(path, dari=None, sampai=None, akun=None, tag=None, teks=None):
+    """Generator baris log (str) di path yang cocok dengan filter"""
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            indeks = IndeksLog(path)
+            indeks.perbarui(mm, stat)
+
+            tanggal_dari, kunci_dari = _kunci_waktu(dari) if dari else (None, None)
+            tanggal_sampai, kunci_sampai = _kunci_waktu(sampai, akhir=True) if sampai else (None, None)
+            awal, akhir = indeks.rentang(tanggal_dari, tanggal_sampai, len(mm))
+            # Indeks per tanggal, jam di dalam tanggal dicari langsung di mmap
+            if kunci_dari and len(kunci_dari) > 10:
+                awal = _cari(mm, kunci_dari, awal, akhir)
+            if kunci_sampai and len(kunci_sampai) > 11:
+                akhir = _cari(mm, kunci_sampai, awal, akhir)
+
+            for m in pola_filter(akun, tag, teks).finditer(mm, awal, akhir):
+                yield m.group(0).decode("utf-8", errors="replace")
+
+def daftar_hari(path):
+    """Return list (tanggal, byte) per tanggal dari indeks"""
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            indeks = IndeksLog(path)
+            indeks.perbarui(mm, stat)
+            batas = indeks.offset[1:] + [indeks.ukuran]
+            return [(tgl.decode(), akhir - awal) for tgl, awal, akhir in zip(indeks.tanggal, indeks.offset, batas)]
+
+def ikuti(path, pola, cetak=print):
+    """Seperti tail -f: cetak baris baru yang cocok, ikut pindah jika file dirotasi"""
+    try:
+        stat = os.stat(path)
+        inode, posisi = stat.st_ino, stat.st_size   # mulai dari akhir file yang sudah ada
+    except FileNotFoundError:
+        inode, posisi = None, 0
+    f, sisa = None, b""
+    try:
+        while True:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                time.sleep(IKUTI_INTERVAL)
+                continue
+
+            if stat.st_ino != inode or stat.st_size < posisi:
+                # File baru setelah rotasi: baca dari awal
+                inode, posisi, sisa = stat.st_ino, 0, b""
+                if f is not None:
+                    f.close()
+                    f = None
+            if f is None:
+                f = open(path, "rb")
+
+            if stat.st_size > posisi:
+                f.seek(posisi)
+                data = sisa + f.read(stat.st_size - posisi)
+                posisi = stat.st_size
+                batas = data.rfind(b"\n") + 1
+                data, sisa = data[:batas], data[batas:]
+                for m in pola.finditer(data):
+                    cetak(m.group(0).decode("utf-8", errors="replace"))
+            else:
+                time.sleep(IKUTI_INTERVAL)
+    finally:
+        if f is not None:
+            f.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Cari baris absensi_log.txt per tanggal/jam, akun dan tag")
+    parser.add_argument("file", nargs="*", default=[LOG_FILE], help="file log (default absensi_log.txt)")
+    parser.add_argument("--tanggal", help="satu tanggal (YYYY-mm-dd)")
+    parser.add_argument("--dari", help="mulai dari (YYYY-mm-dd [HH:MM[:SS]])")
+    parser.add_argument("--sampai", help="sampai dengan, inklusif (YYYY-mm-dd [HH:MM[:SS]])")
+    parser.add_argument("--akun", help="hanya baris akun ini (engine multi akun)")
+    parser.add_argument("--tag", action="append", help="tag level, misal SUCCESS atau 'NETWORK ERROR' (boleh berulang)")
+    parser.add_argument("--cari", help="teks yang harus ada di baris")
+    parser.add_argument("--jumlah", action="store_true", help="hanya tampilkan jumlah baris yang cocok")
+    parser.add_argument("--hari", action="store_true", help="tampilkan tanggal yang ada di log beserta ukurannya")
+    parser.add_argument("--ikuti", action="store_true", help="setelah query, ikuti baris baru (seperti tail -f)")
+    args = parser.parse_args()
+
+    dari = args.dari or args.tanggal
+    sampai = args.sampai or args.tanggal
+
+    try:
+        if args.hari:
+            for path in args.file:
+                for tanggal, ukuran in daftar_hari(path):
+                    print(f"{path} {tanggal} {ukuran / 1024:.0f} KiB")
+            return
+
+        total = 0
+        for path in args.file:
+            if args.ikuti and not os.path.exists(path):
+                continue    # file belum dibuat, langsung diikuti
+            for baris in cari(path, dari, sampai, args.akun, args.tag, args.cari):
+                total += 1
+                if not args.jumlah:
+                    print(baris)
+        if args.jumlah:
+            print(total)
+
+        if args.ikuti:
+            ikuti(args.file[0], pola_filter(args.akun, args.tag, args.cari), lambda baris: print(baris, flush=True))
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Metrik bot absensi dalam format teks Prometheus.
+
+Counter, gauge dan histogram latency disimpan di memori (METRIK) lalu
+diekspor sebagai textfile untuk node_exporter (METRIK_FILE, ditulis ulang
+setiap METRIK_INTERVAL detik oleh engine multi akun) atau lewat control API:
+    python absensi_kontrol.py metrik
+
+Contoh query:
+    histogram_quantile(0.99, rate(absensi_request_detik_bucket{fase="hit"}[5m]))
+    sum by (akun) (increase(absensi_retry_total[1d]))
+"""
+import os
+import threading
+
+# ======== KONFIGURASI =========
+METRIK_FILE = "absensi_metrik.prom"   # None = tidak menulis textfile
+METRIK_INTERVAL = 15                  # detik
+
+# Batas bucket histogram latency (detik)
+BUCKET_DEFAULT = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# ======== REGISTRY =========
+class Metrik:
+    """Registry metrik thread-safe (dipanggil dari thread request dan event loop)"""
+
+    def __init__(self, bucket=BUCKET_DEFAULT):
+        self.bucket = tuple(bucket)
+        self._counter = {}      # (nama, label) -> nilai
+        self._gauge = {}        # (nama, label) -> nilai
+        self._histogram = {}    # (nama, label) -> [jumlah per bucket..., total, count]
+        self._keterangan = {}   # nama -> (tipe, help)
+        self._pengumpul = []    # fungsi yang dipanggil sebelum ekspor (mengisi gauge)
+        self._label_tetap = ()  # label yang ikut di semua seri (misal shard di worker)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _kunci(nama, label):
+        return nama, tuple(sorted((k, str(v)) for k, v in label.items() if v is not None))
+
+    def daftar(self, nama, tipe, keterangan):
+        """Daftarkan HELP/TYPE untuk satu nama metrik"""
+        self._keterangan[nama] = (tipe, keterangan)
+
+    def label_tetap(self, **label):
+        """
+        Tambahkan label ke semua seri saat ekspor, misal shard="3" di worker
+        absensi_shard agar seri dari file metrik per shard tidak bentrok
+        """
+        self._label_tetap = self._kunci("", label)[1]
+
+    def pengumpul(self, fungsi):
+        """Daftarkan fungsi(metrik) yang mengisi gauge sesaat sebelum ekspor"""
+        self._pengumpul.append(fungsi)
+
+    def tambah(self, nama, nilai=1, **label):
+        kunci = self._kunci(nama, label)
+        with self._lock:
+            self._counter[kunci] = self._counter.get(kunci, 0) + nilai
+
+    def atur(self, nama, nilai, **label):
+        kunci = self._kunci(nama, label)
+        with self._lock:
+            self._gauge[kunci] = nilai
+
+    def amati(self, nama, nilai, **label):
+        """Catat satu nilai ke histogram"""
+        kunci = self._kunci(nama, label)
+        with self._lock:
+            data = self._histogram.get(kunci)
+            if data is None:
+                data = self._histogram[kunci] = [0] * (len(self.bucket) + 2)
+            for i, batas in enumerate(self.bucket):
+                if nilai <= batas:
+                    data[i] += 1
+            data[-2] += nilai
+            data[-1] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counter.clear()
+            self._gauge.clear()
+            self._histogram.clear()
+
+    # ---- ekspor ----
+    def snapshot(self):
+        """
+        Jalankan pengumpul lalu salin semua nilai.
+        Pengumpul membaca struktur milik event loop (penjadwal, antrian susulan),
+        jadi panggil dari thread event loop; format/tulis file boleh di thread lain.
+        """
+        for fungsi in self._pengumpul:
+            try:
+                fungsi(self)
+            except Exception as e:
+                # Metrik tidak boleh menjatuhkan engine, tapi kegagalannya harus terlihat
+                from absensi_inp import tulis_log
+                tulis_log(f"[WARNING] Pengumpul metrik {getattr(fungsi, '__name__', fungsi)} gagal: {type(e).__name__}: {str(e)}")
+
+        with self._lock:
+            return (dict(self._counter), dict(self._gauge),
+                    {kunci: list(data) for kunci, data in self._histogram.items()})
+
+    def format_prometheus(self, snapshot=None):
+        """Teks format Prometheus dari snapshot (default: snapshot baru di thread ini)"""
+        counter, gauge, histogram = snapshot or self.snapshot()
+
+        per_nama = {}
+        for (nama, label), nilai in counter.items():
+            per_nama.setdefault(nama, []).append((nama, label, nilai))
+        for (nama, label), nilai in gauge.items():
+            per_nama.setdefault(nama, []).append((nama, label, nilai))
+        for (nama, label), data in histogram.items():
+            baris = per_nama.setdefault(nama, [])
+            for batas, jumlah in zip(self.bucket, data):
+                baris.append((nama + "_bucket", label + (("le", _angka(batas)),), jumlah))
+            baris.append((nama + "_bucket", label + (("le", "+Inf"),), data[-1]))
+            baris.append((nama + "_sum", label, data[-2]))
+            baris.append((nama + "_count", label, data[-1]))
+
+        hasil = []
+        for nama in sorted(per_nama):
+            if nama in self._keterangan:
+                tipe, keterangan = self._keterangan[nama]
+                hasil.append(f"# HELP {nama} {keterangan}")
+                hasil.append(f"# TYPE {nama} {tipe}")
+            for nama_seri, label, nilai in per_nama[nama]:
+                hasil.append(f"{nama_seri}{_format_label(self._label_tetap + label)} {_angka(nilai)}")
+        return "\n".join(hasil) + "\n"
+
+    def tulis_textfile(self, path=None, snapshot=None):
+        """Tulis metrik ke textfile secara atomik (node_exporter tidak membaca file setengah jadi)"""
+        path = path or METRIK_FILE
+        if not path:
+            return
+        sementara = f"{path}.{os.getpid()}.tmp"
+        with open(sementara, "w", encoding="utf-8") as f:
+            f.write(self.format_prometheus(snapshot))
+        os.replace(sementara, path)
+
+
+def _angka(nilai):
+    if isinstance(nilai, float) and nilai.is_integer():
+        return str(int(nilai))
+    return repr(nilai) if isinstance(nilai, float) else str(nilai)
+
+def _escape(nilai):
+    return nilai.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_label(label):
+    if not label:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in label) + "}"
+
+def gabung_prometheus(daftar_teks):
+    """
+    Gabungkan teks Prometheus dari beberapa proses (worker absensi_shard,
+    seri sudah dibedakan label shard) jadi satu: HELP/TYPE tiap metrik hanya
+    sekali, seri dari semua proses dikelompokkan di bawahnya
+    """
+    per_nama = {}   # nama metrik -> (baris HELP/TYPE, baris seri)
+    for teks in daftar_teks:
+        nama_aktif = None
+        for baris in teks.splitlines():
+            if baris.startswith(("# HELP ", "# TYPE ")):
+                nama_aktif = baris.split()[2]
+                kepala, _ = per_nama.setdefault(nama_aktif, ([], []))
+                if baris not in kepala:
+                    kepala.append(baris)
+            elif baris.startswith("#") or not baris.strip():
+                continue
+            else:
+                nama_seri = baris.split("{", 1)[0].split(" ", 1)[0]
+                # _bucket/_sum/_count histogram ikut metrik di atasnya
+                if nama_seri not in (nama_aktif, f"{nama_aktif}_bucket", f"{nama_aktif}_sum", f"{nama_aktif}_count"):
+                    nama_aktif = nama_seri
+                per_nama.setdefault(nama_aktif, ([], []))[1].append(baris)
+
+    hasil = []
+    for nama in sorted(per_nama):
+        kepala, seri = per_nama[nama]
+        hasil.extend(kepala)
+        hasil.extend(seri)
+    return "\n".join(hasil) + "\n"
+
+
+METRIK = Metrik()
+
+METRIK.daftar("absensi_request_detik", "histogram", "Latency request ke server per fase (login, history, hit)")
+METRIK.daftar("absensi_request_error_total", "counter", "Request ke server yang gagal per fase dan jenis error")
+METRIK.daftar("absensi_probe_detik", "histogram", "Durasi cek koneksi internet")
+METRIK.daftar("absensi_probe_total", "counter", "Cek koneksi internet per hasil")
+METRIK.daftar("absensi_retry_total", "counter", "Retry karena error jaringan per akun")
+METRIK.daftar("absensi_hit_total", "counter", "Hasil absen per akun, sesi dan hasil")
+METRIK.daftar("absensi_jadwal_lag_detik", "histogram", "Selisih waktu hit benar-benar dikirim terhadap waktu tembak yang dijadwalkan")
+METRIK.daftar("absensi_circuit_state", "gauge", "State circuit breaker (1 = state aktif)")
+METRIK.daftar("absensi_antrian_susulan", "gauge", "Hit yang menunggu atau sedang dikirim lewat antrian susulan")
+METRIK.daftar("absensi_penantian_aktif", "gauge", "Penantian deadline yang aktif di penjadwal")
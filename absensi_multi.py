@@ -0,0 +1,493 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from datetime import datetime, timedelta
+import heapq
+import itertools
+import json
+import os
+import sys
+import threading
+
+import absensi_inp
+import absensi_jadwal
+import absensi_metrik
+import absensi_profil
+from absensi_metrik import METRIK
+from absensi_jadwal import Penjadwal, sekarang
+from absensi_kontrol import Kontrol, mulai_server, parse_request
+from absensi_inp import (
+    tulis_log,
+    cek_koneksi_internet,
+    cek_status_absensi,
+    login_dan_absen,
+    panaskan_koneksi,
+    waktu_tembak,
+    jadwal_hari_ini,
+    rencanakan_jadwal,
+    simpan_tunda,
+    tandai_terlewat,
+    tunda_tersimpan,
+    bersihkan_state,
+    batas_sesi,
+    circuit_breaker,
+    CircuitBreaker,
+    AKUN_AKTIF,
+)
+
+# ======== KONFIGURASI =========
+AKUN_FILE = "akun.json"
+
+# Maksimal request jaringan yang berjalan bersamaan (semua akun)
+MAX_KONKUREN = 20
+
+HARI_ALLOWED = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+
+# Hit susulan setelah server down: maksimal request bersamaan dan request per detik
+SUSULAN_KONKUREN = 5
+SUSULAN_PER_DETIK = 2.0
+
+PENJADWAL = Penjadwal()
+_KUNCI_TUNDA = threading.Lock()    # urutkan penulisan tunda ke state dari thread
+
+# ======== DATA AKUN =========
+class Akun:
+    """State per akun (pengganti global USERNAME/PASSWORD/TUNDA_ABSENSI/TANGGAL_TUNDA)"""
+
+    # Tanpa __dict__ per objek: ratusan ribu akun tetap hemat memori
+    __slots__ = ("username", "password", "tunda", "tanggal_tunda")
+
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+        self.tunda = False
+        self.tanggal_tunda = None
+
+    def cek_tunda(self):
+        """Cek apakah absensi akun ini ditunda hari ini"""
+        hari_ini = sekarang().date()
+
+        if self.tunda and self.tanggal_tunda == hari_ini:
+            return True
+
+        # Reset tunda jika tanggalnya sudah lewat
+        if self.tanggal_tunda and hari_ini > self.tanggal_tunda:
+            self.tunda = False
+            self.tanggal_tunda = None
+            tulis_log("[INFO] Reset status tunda karena tanggal sudah lewat")
+
+        return False
+
+    async def set_tunda(self):
+        """Tunda absensi hari ini dan bangunkan penantian akun ini segera"""
+        self.tunda = True
+        self.tanggal_tunda = sekarang().date()
+        PENJADWAL.bangunkan(self.username, "tunda")
+        await di_thread(self._simpan_tunda)
+
+    async def batal_tunda(self):
+        """Batalkan tunda; jika hari ini sempat di-skip, proses hari ini dijalankan ulang"""
+        if not self.tunda:
+            return False
+        self.tunda = False
+        self.tanggal_tunda = None
+        PENJADWAL.bangunkan(self.username, "batal")
+        await di_thread(self._simpan_tunda)
+        return True
+
+    def _simpan_tunda(self):
+        # Di thread: yang ditulis nilai tunda terkini, jadi tunda lalu batal yang
+        # berurutan cepat tidak bisa tersimpan terbalik
+        with _KUNCI_TUNDA:
+            simpan_tunda(self.username, self.tunda)
+
+
+def muat_akun(path=AKUN_FILE):
+    """
+    Membaca daftar akun dari file JSON
+    Format: [{"username": "...", "password": "..."}, ...]
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    daftar = []
+    for item in data:
+        username = str(item.get("username", "")).strip()
+        password = str(item.get("password", "")).strip()
+        if not username or not password:
+            tulis_log(f"[WARNING] Akun tanpa username/password dilewati: {item.get('username')}")
+            continue
+        daftar.append(Akun(username, password))
+    return daftar
+
+# ======== ANTRIAN SUSULAN =========
+class AntrianSusulan:
+    """
+    Antrian hit yang terlewat saat server down.
+
+    Setelah server pulih, hit tidak dikirim serentak tetapi bergiliran
+    mulai dari batas jendela paling dekat (PAGI_END sebelum SORE_END),
+    dibatasi SUSULAN_KONKUREN request bersamaan dan SUSULAN_PER_DETIK.
+    Selama circuit breaker belum tertutup hanya satu hit yang jalan
+    (sekaligus menjadi request percobaan). Hit yang jendelanya sudah
+    lewat saat gilirannya tiba tidak dikirim.
+    """
+
+    def __init__(self, konkuren=SUSULAN_KONKUREN, per_detik=SUSULAN_PER_DETIK):
+        self.konkuren = konkuren
+        self.per_detik = per_detik
+        self._heap = []         # (batas_epoch, seq, future)
+        self._seq = itertools.count()
+        self._aktif = 0
+        self._kirim_berikutnya = 0
+        self._slot = None
+        self._task = None
+
+    def jumlah(self):
+        """Jumlah hit yang masih antri atau sedang dikirim"""
+        return len(self._heap) + self._aktif
+
+    async def giliran(self, sesi):
+        """
+        Antri sampai giliran mengirim hit susulan
+        Return True jika boleh dikirim (panggil selesai() sesudahnya), False jika jendela sudah lewat
+        """
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (batas_sesi(sesi).timestamp(), next(self._seq), fut))
+        if self._slot is None:
+            self._slot = asyncio.Event()
+        self._slot.set()
+        if self._task is None or self._task.done():
+            # Context kosong agar log penyalur tidak berlabel akun yang kebetulan memulainya
+            self._task = asyncio.create_task(self._salurkan(), context=contextvars.Context())
+
+        try:
+            return await fut
+        finally:
+            if fut.done() and not fut.cancelled():
+                PENJADWAL.selesai_sibuk()
+
+    def selesai(self):
+        self._aktif -= 1
+        self._slot.set()
+
+    def _batas_aktif(self):
+        # Server belum terbukti pulih: cukup satu hit yang mencoba
+        return self.konkuren if circuit_breaker().state == CircuitBreaker.TERTUTUP else 1
+
+    def _beri(self, fut, hasil):
+        # Sama seperti Penjadwal._selesaikan: akun yang dibangunkan dianggap sibuk
+        # sampai ia lanjut jalan, agar jam virtual tidak melompat
+        PENJADWAL.mulai_sibuk()
+        fut.set_result(hasil)
+
+    async def _salurkan(self):
+        while self._heap:
+            if self._aktif >= self._batas_aktif():
+                self._slot.clear()
+                await self._slot.wait()
+                continue
+
+            if self._kirim_berikutnya > absensi_jadwal.JAM.waktu():
+                await PENJADWAL.tunggu_sampai("__susulan__", datetime.fromtimestamp(self._kirim_berikutnya), bangun_saat=())
+
+            batas, _, fut = heapq.heappop(self._heap)
+            if fut.done():
+                continue
+            if batas <= absensi_jadwal.JAM.waktu():
+                self._beri(fut, False)
+                continue
+
+            self._aktif += 1
+            self._kirim_berikutnya = absensi_jadwal.JAM.waktu() + 1 / self.per_detik
+            self._beri(fut, True)
+
+        if self._kirim_berikutnya:
+            tulis_log("[SUSULAN] Antrian hit susulan selesai")
+            self._kirim_berikutnya = 0
+
+
+ANTRIAN_SUSULAN = AntrianSusulan()
+
+def _metrik_engine(metrik):
+    metrik.atur("absensi_antrian_susulan", ANTRIAN_SUSULAN.jumlah())
+    metrik.atur("absensi_penantian_aktif", PENJADWAL.jumlah_menunggu())
+
+METRIK.pengumpul(_metrik_engine)
+
+# ======== EKSEKUSI BLOCKING =========
+async def jalankan_blocking(semaphore, func, *args):
+    """Jalankan fungsi blocking (requests) di thread pool, dibatasi semaphore"""
+    # Ditandai sibuk sejak antri semaphore agar jam virtual tidak melompat
+    PENJADWAL.mulai_sibuk()
+    try:
+        async with semaphore:
+            return await asyncio.to_thread(func, *args)
+    finally:
+        PENJADWAL.selesai_sibuk()
+
+async def di_thread(func, *args):
+    """Jalankan fungsi blocking lokal (SQLite state) di thread tanpa antri semaphore jaringan"""
+    PENJADWAL.mulai_sibuk()
+    try:
+        return await asyncio.to_thread(func, *args)
+    finally:
+        PENJADWAL.selesai_sibuk()
+
+async def tunggu_sampai(akun, target_time):
+    """
+    Menunggu sampai waktu target tanpa memblokir akun lain
+    Return False jika absensi ditunda saat menunggu
+    """
+    if akun.cek_tunda() or not await PENJADWAL.tunggu_sampai(akun.username, target_time):
+        tulis_log("[TUNDA] Absensi ditunda saat menunggu")
+        return False
+
+    return True
+
+async def kirim_hit(akun, semaphore, sesi):
+    """Jalankan login_dan_absen, lewat antrian susulan jika server sedang down"""
+    if circuit_breaker().state == CircuitBreaker.TERTUTUP and not ANTRIAN_SUSULAN.jumlah():
+        return await jalankan_blocking(semaphore, login_dan_absen, sesi, akun.username, akun.password)
+
+    tulis_log(f"[SUSULAN] Server belum pulih, absen {sesi.lower()} masuk antrian susulan")
+    if not await ANTRIAN_SUSULAN.giliran(sesi):
+        tulis_log(f"[FAILED] Jendela absen {sesi.lower()} sudah lewat sebelum giliran susulan")
+        return False
+
+    try:
+        if akun.cek_tunda():
+            tulis_log(f"[TUNDA] Absensi {sesi.lower()} ditunda saat antri susulan")
+            return False
+        return await jalankan_blocking(semaphore, login_dan_absen, sesi, akun.username, akun.password)
+    finally:
+        ANTRIAN_SUSULAN.selesai()
+
+async def absen_sesi(akun, semaphore, sesi, target_time):
+    """
+    Tunggu jadwal lalu jalankan login_dan_absen untuk satu sesi
+    Return True jika berhasil, None jika jendela sesi sudah lewat (sesi dilewati,
+    sesi berikutnya tetap dikerjakan), False jika gagal/ditunda
+    """
+    if sekarang() >= batas_sesi(sesi):
+        # Misal setelah batal tunda di siang hari: jangan tembak pagi di luar jendela
+        tulis_log(f"[SKIP] Jendela absen {sesi.lower()} sudah lewat, sesi dilewati")
+        await di_thread(tandai_terlewat, akun.username, sesi)
+        return None
+
+    pemanasan = waktu_tembak(target_time, sesi, laporkan=False) - timedelta(seconds=absensi_inp.PEMANASAN_DETIK)
+    if not await tunggu_sampai(akun, pemanasan):
+        return False
+    await jalankan_blocking(semaphore, panaskan_koneksi, akun.username, akun.password)
+
+    tembak = waktu_tembak(target_time, sesi)
+    if not await tunggu_sampai(akun, tembak):
+        return False
+    METRIK.amati("absensi_jadwal_lag_detik", max(0, absensi_jadwal.JAM.waktu() - tembak.timestamp()))
+
+    if akun.cek_tunda():  # Cek sekali lagi sebelum absen
+        tulis_log(f"[TUNDA] Absensi {sesi.lower()} ditunda sebelum eksekusi")
+        return False
+
+    tulis_log(f"[ACTION] Waktu absen {sesi.lower()} tiba!")
+    if not await kirim_hit(akun, semaphore, sesi):
+        tulis_log(f"[FAILED] Gagal absen {sesi.lower()} karena masalah jaringan")
+        return False
+
+    return True
+
+# ======== PROSES ABSENSI PER AKUN =========
+async def absensi_harian_akun(akun, semaphore):
+    """Versi coroutine dari absensi_harian untuk satu akun"""
+    if akun.cek_tunda():
+        tulis_log("[TUNDA] Absensi hari ini ditunda. Skip absensi.")
+        return
+
+    hari_ini = sekarang().strftime("%A").lower()
+    if hari_ini not in HARI_ALLOWED:
+        tulis_log(f"[SKIP] Hari ini ({hari_ini.capitalize()}) bukan jadwal absensi.")
+        return
+
+    status = await jalankan_blocking(semaphore, cek_status_absensi, akun.username, akun.password)
+    if status is None:
+        tulis_log("[ERROR] Tidak dapat mengecek status absensi karena masalah jaringan, skip hari ini")
+        return
+
+    jam_datang = status.get('jam_datang')
+    jam_pulang = status.get('jam_pulang')
+
+    waktu_pagi, waktu_sore = await di_thread(jadwal_hari_ini, akun.username)
+
+    tulis_log(f"[SCHEDULE] Jadwal absen pagi: {waktu_pagi.strftime('%H:%M:%S')}")
+    tulis_log(f"[SCHEDULE] Jadwal absen sore: {waktu_sore.strftime('%H:%M:%S')}")
+
+    if jam_datang is None:
+        tulis_log("[WAITING] Status: Belum absen masuk, menunggu waktu absen pagi...")
+        hasil_pagi = await absen_sesi(akun, semaphore, "Pagi", waktu_pagi)
+        if hasil_pagi is False:
+            return
+
+        if hasil_pagi:
+            tulis_log("[WAITING] Absen pagi selesai, menunggu waktu absen sore...")
+        if not await absen_sesi(akun, semaphore, "Sore", waktu_sore) or hasil_pagi is None:
+            return
+
+    elif jam_pulang is None:
+        tulis_log(f"[WAITING] Status: Sudah absen masuk ({jam_datang}), belum absen pulang. Menunggu waktu absen sore...")
+        if not await absen_sesi(akun, semaphore, "Sore", waktu_sore):
+            return
+
+    else:
+        tulis_log(f"[COMPLETE] Sudah absen lengkap hari ini - Masuk: {jam_datang}, Pulang: {jam_pulang}")
+        return
+
+    tulis_log("[SUCCESS] Semua absensi hari ini selesai.")
+
+async def loop_akun(akun, semaphore):
+    """Loop harian untuk satu akun (setara loop di main() absensi_inp)"""
+    AKUN_AKTIF.set(akun.username)
+
+    # Pulihkan tunda hari ini jika program sempat restart
+    if await di_thread(tunda_tersimpan, akun.username):
+        akun.tunda = True
+        akun.tanggal_tunda = sekarang().date()
+        tulis_log("[TUNDA] Status tunda hari ini dipulihkan dari state")
+
+    while True:
+        try:
+            await absensi_harian_akun(akun, semaphore)
+        except Exception as e:
+            tulis_log(f"[CRITICAL ERROR] Error tidak terduga: {str(e)}")
+            tulis_log("[INFO] Melanjutkan ke hari berikutnya...")
+
+        # Tunggu sampai hari berikutnya jam 00:05 (atau sampai tunda dibatalkan)
+        while True:
+            besok = sekarang().date() + timedelta(days=1)
+            target = datetime.combine(besok, datetime.min.time()) + timedelta(minutes=5)
+            if await PENJADWAL.tunggu_sampai(akun.username, target, bangun_saat=("batal",)):
+                break
+            if not akun.cek_tunda():
+                tulis_log("[BATAL] Tunda dibatalkan, menjalankan ulang absensi hari ini...")
+                break
+
+async def pemeliharaan_harian(daftar_akun):
+    """Setiap hari jam 00:01: bersihkan state lama dan bagi jadwal semua akun"""
+    while True:
+        besok = sekarang().date() + timedelta(days=1)
+        target = datetime.combine(besok, datetime.min.time()) + timedelta(minutes=1)
+        await PENJADWAL.tunggu_sampai("__pemeliharaan__", target, bangun_saat=())
+        # SQLite di thread agar penantian hit akun lain tidak ikut tertahan
+        await di_thread(bersihkan_state)
+        await di_thread(rencanakan_jadwal, [akun.username for akun in daftar_akun])
+
+async def ekspor_metrik():
+    """Tulis ulang textfile metrik setiap METRIK_INTERVAL detik (jam asli, bukan jam virtual)"""
+    if not absensi_metrik.METRIK_FILE:
+        return
+    while True:
+        try:
+            # Snapshot di event loop (pemilik PENJADWAL/ANTRIAN_SUSULAN), format dan tulis file di thread
+            snapshot = METRIK.snapshot()
+            await asyncio.to_thread(METRIK.tulis_textfile, None, snapshot)
+        except OSError as e:
+            tulis_log(f"[WARNING] Gagal menulis file metrik: {str(e)}")
+        await asyncio.sleep(absensi_metrik.METRIK_INTERVAL)
+
+# ======== INPUT LISTENER =========
+def tampilkan_hasil(perintah, hasil):
+    """Tulis hasil perintah kontrol ke log (untuk input dari terminal)"""
+    if not hasil.get("ok"):
+        tulis_log(f"[ERROR] {hasil.get('error')}")
+        return
+
+    data = hasil["hasil"]
+    if perintah == "status":
+        tulis_log(f"[STATUS] {data['akun']} akun, {data['ditunda']} ditunda, {data['penantian_aktif']} penantian aktif")
+        for username, detail in data["detail"].items():
+            if detail["tunda"]:
+                tulis_log(f"  - {username} ditunda")
+    elif perintah == "test":
+        if data["koneksi"]:
+            tulis_log("[TEST] ✓ Koneksi internet OK")
+        else:
+            tulis_log("[TEST] ✗ Tidak ada koneksi internet")
+    elif perintah in absensi_profil.PERINTAH:
+        for baris in data:
+            tulis_log(f"[PROFIL] {baris}")
+    elif perintah == "metrik":
+        for baris in data.splitlines():
+            if not baris.startswith("#"):
+                tulis_log(f"[METRIK] {baris}")
+    elif perintah == "help":
+        tulis_log("[HELP] Perintah yang tersedia (juga lewat: python absensi_kontrol.py <perintah>):")
+        for nama, keterangan in data.items():
+            tulis_log(f"  - {nama} : {keterangan}")
+
+def input_listener(loop, kontrol):
+    """Thread untuk mendengar input pengguna (perintah dijalankan di event loop)"""
+    while True:
+        try:
+            perintah, target = parse_request(input())
+            if not perintah:
+                continue
+
+            if perintah == "exit":
+                tulis_log("[EXIT] Program dihentikan oleh pengguna")
+                absensi_inp.LOG_WRITER.tutup()
+                os._exit(0)
+
+            future = asyncio.run_coroutine_threadsafe(kontrol.jalankan(perintah, target), loop)
+            tampilkan_hasil(perintah, future.result())
+
+        except (EOFError, KeyboardInterrupt):
+            break
+        except Exception as e:
+            tulis_log(f"[ERROR] Error pada input listener: {str(e)}")
+
+# ======== MAIN =========
+async def main_async(daftar_akun, max_konkuren=MAX_KONKUREN):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max_konkuren))
+    semaphore = asyncio.Semaphore(max_konkuren)
+
+    tulis_log(f"[START] Engine multi akun dimulai ({len(daftar_akun)} akun, maks {max_konkuren} request bersamaan).")
+
+    await di_thread(bersihkan_state)
+    await di_thread(rencanakan_jadwal, [akun.username for akun in daftar_akun])
+
+    kontrol = Kontrol(daftar_akun, PENJADWAL)
+    try:
+        await mulai_server(kontrol)
+        tulis_log("[INFO] Control API aktif (python absensi_kontrol.py help)")
+    except OSError as e:
+        tulis_log(f"[WARNING] Control API tidak dapat dibuka: {str(e)}")
+
+    # Input dari terminal tetap didukung jika ada TTY
+    input_thread = threading.Thread(target=input_listener, args=(loop, kontrol), daemon=True)
+    input_thread.start()
+
+    if not await asyncio.to_thread(cek_koneksi_internet):
+        tulis_log("[WARNING] Tidak ada koneksi internet saat start, tetap melanjutkan...")
+
+    await asyncio.gather(pemeliharaan_harian(daftar_akun), ekspor_metrik(), *(loop_akun(akun, semaphore) for akun in daftar_akun))
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else AKUN_FILE
+
+    try:
+        daftar_akun = muat_akun(path)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Tidak dapat membaca file akun {path}: {str(e)}")
+        sys.exit(1)
+
+    if not daftar_akun:
+        print("[ERROR] Tidak ada akun yang valid!")
+        sys.exit(1)
+
+    try:
+        asyncio.run(main_async(daftar_akun))
+    except KeyboardInterrupt:
+        tulis_log("[EXIT] Program dihentikan oleh pengguna")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Profiling on-demand untuk proses bot yang sedang berjalan (tanpa restart).
+
+    profil mulai|stop     sampling stack semua thread + cProfile thread pemanggil
+    memori mulai|snapshot|stop
+                          tracemalloc: top alokasi dan selisih terhadap snapshot sebelumnya
+    dump                  stack tiap thread dan state tiap task asyncio
+
+Hasil ditulis ke folder PROFIL_DIR, ringkasannya dikembalikan sebagai list
+baris teks. Dipakai oleh control API engine multi akun
+(python absensi_kontrol.py profil mulai) dan input terminal absensi_inp.py.
+"""
+import asyncio
+import cProfile
+import io
+import os
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from datetime import datetime
+
+# ======== KONFIGURASI =========
+PROFIL_DIR = "profil"
+PROFIL_INTERVAL = 0.005     # detik antar sampel stack
+PROFIL_TOP = 20             # jumlah baris teratas di ringkasan
+MEMORI_FRAME = 25           # kedalaman traceback tracemalloc
+
+PERINTAH = {
+    "profil": "Profiling CPU: profil mulai|stop",
+    "memori": "Alokasi memori: memori mulai|snapshot|stop",
+    "dump": "Dump stack thread dan task asyncio",
+}
+
+def _path(nama, ekstensi):
+    os.makedirs(PROFIL_DIR, exist_ok=True)
+    return os.path.join(PROFIL_DIR, f"{nama}_{datetime.now():%Y%m%d_%H%M%S}.{ekstensi}")
+
+def _nama_frame(frame):
+    kode = frame.f_code
+    return f"{kode.co_name} ({os.path.basename(kode.co_filename)}:{frame.f_lineno})"
+
+# ======== SAMPLING CPU =========
+class Sampler:
+    """
+    Profiler sampling: setiap PROFIL_INTERVAL stack semua thread diambil
+    (sys._current_frames), jadi thread request/retry ikut terukur. Hasilnya
+    format collapsed stack (bisa langsung dipakai flamegraph.pl / speedscope).
+    cProfile tambahan dipasang di thread yang memulai (event loop engine).
+    """
+
+    def __init__(self, interval=PROFIL_INTERVAL):
+        self.interval = interval
+        self._stack = {}
+        self._sampel = 0
+        self._mulai = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._cprofile = None
+
+    @property
+    def aktif(self):
+        return self._thread is not None
+
+    def mulai(self):
+        self._stack.clear()
+        self._sampel = 0
+        self._mulai = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="profil-sampler", daemon=True)
+        self._thread.start()
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def stop(self):
+        """Hentikan profiling, tulis file hasil, return ringkasan (list baris)"""
+        self._cprofile.disable()
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        durasi = time.perf_counter() - self._mulai
+
+        path_stack = _path("profil_stack", "txt")
+        with open(path_stack, "w", encoding="utf-8") as f:
+            for stack, jumlah in sorted(self._stack.items(), key=lambda x: -x[1]):
+                f.write(f"{stack} {jumlah}\n")
+
+        path_pstats = _path("profil_loop", "pstats")
+        self._cprofile.dump_stats(path_pstats)
+
+        # Fungsi teratas menurut sampel (self time = frame paling dalam)
+        self_time = {}
+        for stack, jumlah in self._stack.items():
+            fungsi = stack.rsplit(";", 1)[-1]
+            self_time[fungsi] = self_time.get(fungsi, 0) + jumlah
+
+        # Persen terhadap total stack tersampel (semua thread, termasuk yang idle menunggu)
+        total = max(1, sum(self_time.values()))
+        hasil = [f"{self._sampel} sampel dalam {durasi:.1f} detik",
+                 f"Stack: {path_stack}", f"cProfile thread pemanggil: {path_pstats}"]
+        for fungsi, jumlah in sorted(self_time.items(), key=lambda x: -x[1])[:PROFIL_TOP]:
+            hasil.append(f"{jumlah / total * 100:5.1f}%  {fungsi}")
+        return hasil
+
+    def _loop(self):
+        sendiri = threading.get_ident()
+        nama_thread = {}
+        while not self._stop.wait(self.interval):
+            for t in threading.enumerate():
+                nama_thread[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == sendiri:
+                    continue
+                bagian = []
+                while frame is not None:
+                    bagian.append(_nama_frame(frame))
+                    frame = frame.f_back
+                bagian.append(nama_thread.get(ident, str(ident)))
+                stack = ";".join(reversed(bagian))
+                self._stack[stack] = self._stack.get(stack, 0) + 1
+            self._sampel += 1
+
+
+SAMPLER = Sampler()
+
+def profil(aksi):
+    if aksi == "mulai":
+        if SAMPLER.aktif:
+            return False, ["Profiling sudah berjalan"]
+        SAMPLER.mulai()
+        return True, [f"Profiling dimulai (sampel tiap {SAMPLER.interval * 1000:.0f} ms)"]
+    if aksi == "stop":
+        if not SAMPLER.aktif:
+            return False, ["Profiling belum dimulai"]
+        return True, SAMPLER.stop()
+    return False, [PERINTAH["profil"]]
+
+# ======== TRACEMALLOC =========
+_SNAPSHOT_TERAKHIR = None
+
+def memori(aksi):
+    global _SNAPSHOT_TERAKHIR
+
+    if aksi == "mulai":
+        if tracemalloc.is_tracing():
+            return False, ["tracemalloc sudah berjalan"]
+        tracemalloc.start(MEMORI_FRAME)
+        _SNAPSHOT_TERAKHIR = None
+        return True, [f"tracemalloc dimulai ({MEMORI_FRAME} frame)"]
+
+    if aksi == "stop":
+        if not tracemalloc.is_tracing():
+            return False, ["tracemalloc belum dimulai"]
+        tracemalloc.stop()
+        _SNAPSHOT_TERAKHIR = None
+        return True, ["tracemalloc dihentikan"]
+
+    if aksi == "snapshot":
+        if not tracemalloc.is_tracing():
+            return False, ["tracemalloc belum dimulai (memori mulai)"]
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        path = _path("memori", "snapshot")
+        snapshot.dump(path)     # bisa dibuka lagi: tracemalloc.Snapshot.load(path)
+
+        sekarang, puncak = tracemalloc.get_traced_memory()
+        hasil = [f"Terpakai {sekarang / 1024:.0f} KiB (puncak {puncak / 1024:.0f} KiB)", f"Snapshot: {path}"]
+        if _SNAPSHOT_TERAKHIR is None:
+            hasil.append("Top alokasi:")
+            for stat in snapshot.statistics("lineno")[:PROFIL_TOP]:
+                hasil.append(f"  {stat}")
+        else:
+            hasil.append("Selisih terhadap snapshot sebelumnya:")
+            for stat in snapshot.compare_to(_SNAPSHOT_TERAKHIR, "lineno")[:PROFIL_TOP]:
+                hasil.append(f"  {stat}")
+        _SNAPSHOT_TERAKHIR = snapshot
+        return True, hasil
+
+    return False, [PERINTAH["memori"]]
+
+# ======== DUMP THREAD & TASK =========
+def dump(loop=None):
+    """Tulis stack semua thread (dan task asyncio jika ada loop) ke file"""
+    tulisan = io.StringIO()
+    hasil = []
+
+    frames = sys._current_frames()
+    threads = threading.enumerate()
+    hasil.append(f"{len(threads)} thread")
+    for t in threads:
+        frame = frames.get(t.ident)
+        posisi = _nama_frame(frame) if frame is not None else "-"
+        hasil.append(f"  {t.name} ({'daemon' if t.daemon else 'non-daemon'}): {posisi}")
+        tulisan.write(f"=== Thread {t.name} (ident {t.ident}) ===\n")
+        if frame is not None:
+            tulisan.write("".join(traceback.format_stack(frame)))
+        tulisan.write("\n")
+
+    if loop is not None:
+        tasks = asyncio.all_tasks(loop)
+        per_coro = {}
+        for task in tasks:
+            coro = task.get_coro()
+            nama = getattr(coro, "__qualname__", repr(coro))
+            per_coro[nama] = per_coro.get(nama, 0) + 1
+            tulisan.write(f"=== Task {task.get_name()} {nama} ({'selesai' if task.done() else 'berjalan'}) ===\n")
+            task.print_stack(file=tulisan)
+            tulisan.write("\n")
+        hasil.append(f"{len(tasks)} task asyncio")
+        for nama, jumlah in sorted(per_coro.items(), key=lambda x: -x[1]):
+            hasil.append(f"  {jumlah:6d}  {nama}")
+
+    path = _path("dump", "txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(tulisan.getvalue())
+    hasil.append(f"Detail: {path}")
+    return True, hasil
+
+# ======== PINTU MASUK =========
+def jalankan(perintah, aksi=None, loop=None):
+    """Jalankan perintah profiling, return (ok, list baris ringkasan)"""
+    if isinstance(aksi, (list, tuple)):
+        aksi = aksi[0] if aksi else None
+    aksi = (aksi or "").lower()
+    try:
+        if perintah == "profil":
+            return profil(aksi)
+        if perintah == "memori":
+            return memori(aksi)
+        if perintah == "dump":
+            return dump(loop)
+    except OSError as e:
+        return False, [f"Gagal menulis hasil profiling: {str(e)}"]
+    return False, [f"Perintah tidak dikenal: {perintah}"]
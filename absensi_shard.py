@@ -0,0 +1,431 @@
+"""
+Koordinator multi proses untuk armada akun yang sangat besar.
+
+Akun dibagi ke beberapa worker process (default: jumlah core). Tiap worker
+menjalankan engine absensi_multi sendiri (event loop, session pool, log
+dan file metrik per shard), sedangkan koordinator:
+  - membagi akun secara stabil (hash username) ke shard,
+  - membuat jadwal harian seluruh armada sekaligus (batas per detik tetap
+    berlaku untuk semua shard bersama, lihat rencanakan_jadwal),
+  - memantau detak (heartbeat) tiap worker dan me-restart worker yang mati
+    atau macet,
+  - melayani control API (python absensi_kontrol.py ...) dan meneruskan
+    perintah ke shard pemilik akun, status digabung dari semua shard;
+    profil/memori/dump dijalankan di semua worker, hasilnya per shard,
+    dan metrik semua worker digabung jadi satu teks Prometheus.
+
+Contoh:
+    python absensi_shard.py akun.json --worker 8
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import zlib
+
+import absensi_inp
+import absensi_metrik
+import absensi_multi
+import absensi_profil
+from absensi_inp import tulis_log, bersihkan_state, rencanakan_jadwal
+from absensi_jadwal import Penjadwal, sekarang
+from absensi_kontrol import Kontrol, mulai_server
+
+# ======== KONFIGURASI =========
+DETAK_DETIK = 5             # interval heartbeat worker -> koordinator
+DETAK_TIMEOUT = 60          # worker tanpa detak selama ini dianggap macet
+RESTART_JEDA = 1            # detik, jeda restart pertama (digandakan jika mati lagi)
+RESTART_JEDA_MAX = 60
+RESTART_STABIL = 600        # worker yang hidup selama ini dianggap sehat lagi
+PERINTAH_TIMEOUT = 30       # detik menunggu jawaban worker
+
+PERINTAH = {
+    "tunda": "Tunda absensi hari ini",
+    "batal": "Batalkan tunda absensi",
+    "status": "Lihat status gabungan semua shard",
+    "test": "Test koneksi internet",
+    "metrik": "Tampilkan metrik gabungan semua shard (format Prometheus)",
+    **absensi_profil.PERINTAH,
+    "help": "Tampilkan bantuan ini",
+    "exit": "Hentikan semua worker dan koordinator",
+}
+
+def nomor_shard(username, jumlah_shard):
+    """Shard pemilik akun (stabil antar restart, tidak tergantung PYTHONHASHSEED)"""
+    return zlib.crc32(username.lower().encode("utf-8")) % jumlah_shard
+
+def nama_file_shard(path, indeks):
+    """absensi_log.txt -> absensi_log.shard3.txt"""
+    dasar, ekstensi = os.path.splitext(path)
+    return f"{dasar}.shard{indeks}{ekstensi}"
+
+# ======== WORKER =========
+def jalankan_worker(indeks, akun_data, koneksi, pengaturan, max_konkuren):
+    """Entry point worker process: engine absensi_multi untuk akun di shard ini"""
+    for nama, nilai in pengaturan.items():
+        setattr(absensi_inp, nama, nilai)
+    absensi_inp.LOG_FILE = nama_file_shard(absensi_inp.LOG_FILE, indeks)
+    if absensi_metrik.METRIK_FILE:
+        absensi_metrik.METRIK_FILE = nama_file_shard(absensi_metrik.METRIK_FILE, indeks)
+    absensi_metrik.METRIK.label_tetap(shard=indeks)
+    # File profiling per shard agar worker yang menulis di detik yang sama tidak saling timpa
+    absensi_profil.PROFIL_DIR = os.path.join(absensi_profil.PROFIL_DIR, f"shard{indeks}")
+
+    daftar_akun = [absensi_multi.Akun(username, password) for username, password in akun_data]
+    try:
+        asyncio.run(_worker_async(indeks, daftar_akun, koneksi, max_konkuren))
+    except KeyboardInterrupt:
+        pass
+
+async def _worker_async(indeks, daftar_akun, koneksi, max_konkuren):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max_konkuren))
+    semaphore = asyncio.Semaphore(max_konkuren)
+    kontrol = Kontrol(daftar_akun, absensi_multi.PENJADWAL)
+    kunci_kirim = threading.Lock()
+
+    def kirim(pesan):
+        with kunci_kirim:
+            koneksi.send(pesan)
+
+    def balas(id_perintah, future):
+        try:
+            hasil = future.result()
+        except Exception as e:
+            hasil = {"ok": False, "error": str(e)}
+        try:
+            kirim({"jenis": "hasil", "id": id_perintah, "hasil": hasil})
+        except OSError:
+            pass
+
+    def pendengar():
+        while True:
+            try:
+                pesan = koneksi.recv()
+            except (EOFError, OSError):
+                # Koordinator sudah tidak ada, worker ikut berhenti
+                absensi_inp.LOG_WRITER.tutup()
+                os._exit(0)
+            future = asyncio.run_coroutine_threadsafe(kontrol.jalankan(pesan["perintah"], pesan["target"]), loop)
+            future.add_done_callback(lambda f, id_perintah=pesan["id"]: balas(id_perintah, f))
+
+    async def detak():
+        while True:
+            kirim({"jenis": "detak", "status": {
+                "akun": len(daftar_akun),
+                "ditunda": sum(1 for akun in daftar_akun if akun.cek_tunda()),
+                "penantian_aktif": absensi_multi.PENJADWAL.jumlah_menunggu(),
+                "antrian_susulan": absensi_multi.ANTRIAN_SUSULAN.jumlah(),
+                "circuit": absensi_inp.circuit_breaker().state,
+            }})
+            await asyncio.sleep(DETAK_DETIK)
+
+    tulis_log(f"[SHARD] Worker {indeks} dimulai ({len(daftar_akun)} akun, pid {os.getpid()})")
+    threading.Thread(target=pendengar, name="pendengar-koordinator", daemon=True).start()
+    await asyncio.gather(detak(), absensi_multi.ekspor_metrik(),
+                         *(absensi_multi.loop_akun(akun, semaphore) for akun in daftar_akun))
+
+# ======== KOORDINATOR =========
+class Shard:
+    """Satu worker process beserta pipe dan status terakhirnya"""
+
+    def __init__(self, indeks, akun_data):
+        self.indeks = indeks
+        self.akun_data = akun_data
+        self.usernames = {username.lower() for username, _ in akun_data}
+        self.proses = None
+        self.koneksi = None
+        self.detak = 0
+        self.status = None
+        self.restart = 0
+        self.jeda_restart = RESTART_JEDA
+        self.mulai_pada = 0
+        self.restart_pada = None
+
+    def hidup(self):
+        return self.proses is not None and self.proses.is_alive()
+
+
+class Koordinator:
+    """Kelola worker process dan layani control API (antarmuka sama dengan Kontrol)"""
+
+    def __init__(self, daftar_akun, jumlah_shard, max_konkuren):
+        self.jumlah_shard = max(1, min(jumlah_shard, len(daftar_akun)))
+        self.max_konkuren = max_konkuren
+        self.daftar_akun = daftar_akun
+        self.penjadwal = Penjadwal()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._seq = itertools.count()
+        self._menunggu = {}     # id perintah -> future
+        self._loop = None
+
+        per_shard = [[] for _ in range(self.jumlah_shard)]
+        for username, password in daftar_akun:
+            per_shard[nomor_shard(username, self.jumlah_shard)].append((username, password))
+        self.shards = [Shard(i, akun) for i, akun in enumerate(per_shard)]
+
+    # ---- worker ----
+    def mulai_worker(self, shard):
+        ujung_koordinator, ujung_worker = self._ctx.Pipe()
+        pengaturan = {nama: getattr(absensi_inp, nama) for nama in ("BASE_URL", "STATE_FILE", "LOG_FILE")}
+        shard.proses = self._ctx.Process(
+            target=jalankan_worker,
+            args=(shard.indeks, shard.akun_data, ujung_worker, pengaturan, self.max_konkuren),
+            name=f"absensi-shard{shard.indeks}",
+        )
+        shard.proses.start()
+        ujung_worker.close()
+        shard.koneksi = ujung_koordinator
+        shard.detak = time.monotonic()
+        shard.mulai_pada = time.monotonic()
+        shard.restart_pada = None
+        threading.Thread(target=self._baca, args=(shard, ujung_koordinator), daemon=True,
+                         name=f"baca-shard{shard.indeks}").start()
+
+    def _baca(self, shard, koneksi):
+        # Satu thread per shard: pesan diteruskan ke event loop koordinator
+        while True:
+            try:
+                pesan = koneksi.recv()
+            except (EOFError, OSError):
+                return
+            self._loop.call_soon_threadsafe(self._terima, shard, pesan)
+
+    def _terima(self, shard, pesan):
+        if pesan["jenis"] == "detak":
+            shard.detak = time.monotonic()
+            shard.status = pesan["status"]
+        elif pesan["jenis"] == "hasil":
+            future = self._menunggu.pop(pesan["id"], None)
+            if future is not None and not future.done():
+                future.set_result(pesan["hasil"])
+
+    def hentikan_worker(self, shard):
+        """Hentikan worker (blocking sampai 5 detik, dari event loop panggil lewat asyncio.to_thread)"""
+        if shard.proses is None:
+            return
+        if shard.proses.is_alive():
+            shard.proses.terminate()
+            shard.proses.join(5)
+            if shard.proses.is_alive():
+                shard.proses.kill()
+        shard.koneksi.close()
+
+    def hentikan_semua(self):
+        for shard in self.shards:
+            self.hentikan_worker(shard)
+
+    async def awasi(self):
+        """Cek kesehatan worker berkala, restart yang mati atau tidak berdetak"""
+        while True:
+            await asyncio.sleep(DETAK_DETIK)
+            waktu = time.monotonic()
+            for shard in self.shards:
+                if shard.restart_pada is not None:
+                    if waktu >= shard.restart_pada:
+                        self.mulai_worker(shard)
+                    continue
+
+                if not shard.hidup():
+                    alasan = f"mati (exit code {shard.proses.exitcode})"
+                elif waktu - shard.detak > DETAK_TIMEOUT:
+                    alasan = f"tidak berdetak selama {waktu - shard.detak:.0f} detik"
+                else:
+                    continue
+
+                if waktu - shard.mulai_pada >= RESTART_STABIL:
+                    shard.jeda_restart = RESTART_JEDA
+                tulis_log(f"[SHARD] Worker {shard.indeks} {alasan}, restart dalam {shard.jeda_restart} detik")
+                await asyncio.to_thread(self.hentikan_worker, shard)
+                shard.restart += 1
+                shard.status = None
+                shard.restart_pada = waktu + shard.jeda_restart
+                shard.jeda_restart = min(RESTART_JEDA_MAX, shard.jeda_restart * 2)
+
+    async def kirim(self, shard, perintah, target):
+        """Kirim perintah kontrol ke satu shard, tunggu jawabannya"""
+        if not shard.hidup():
+            return {"ok": False, "error": f"Worker {shard.indeks} sedang tidak berjalan"}
+
+        id_perintah = next(self._seq)
+        future = self._loop.create_future()
+        self._menunggu[id_perintah] = future
+        try:
+            shard.koneksi.send({"id": id_perintah, "perintah": perintah, "target": target})
+            return await asyncio.wait_for(future, PERINTAH_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            return {"ok": False, "error": f"Worker {shard.indeks} tidak menjawab: {type(e).__name__}"}
+        finally:
+            self._menunggu.pop(id_perintah, None)
+
+    # ---- control API ----
+    async def jalankan(self, perintah, target=None):
+        """Dipanggil oleh server control API (absensi_kontrol.mulai_server)"""
+        if perintah not in PERINTAH:
+            return {"ok": False, "error": f"Perintah tidak dikenal: {perintah}"}
+
+        if perintah == "help":
+            return {"ok": True, "hasil": PERINTAH}
+
+        if perintah == "exit":
+            tulis_log("[EXIT] Menghentikan semua worker")
+            await asyncio.to_thread(self.hentikan_semua)
+            return {"ok": True, "hasil": "Engine dihentikan"}
+
+        if perintah == "test":
+            hidup = [shard for shard in self.shards if shard.hidup()]
+            if not hidup:
+                return {"ok": False, "error": "Tidak ada worker yang berjalan"}
+            return await self.kirim(hidup[0], "test", None)
+
+        if perintah in absensi_profil.PERINTAH:
+            # Tiap worker memprofil prosesnya sendiri, "akun" berisi aksinya (mulai/stop/...)
+            hidup = [shard for shard in self.shards if shard.hidup()]
+            if not hidup:
+                return {"ok": False, "error": "Tidak ada worker yang berjalan"}
+            hasil_shard = await asyncio.gather(*(self.kirim(shard, perintah, target) for shard in hidup))
+            return self._gabung_per_shard(hidup, hasil_shard)
+
+        if perintah == "metrik":
+            hidup = [shard for shard in self.shards if shard.hidup()]
+            if not hidup:
+                return {"ok": False, "error": "Tidak ada worker yang berjalan"}
+            hasil_shard = await asyncio.gather(*(self.kirim(shard, "metrik", None) for shard in hidup))
+            teks = absensi_metrik.gabung_prometheus([h["hasil"] for h in hasil_shard if h.get("ok")])
+            # Shard yang gagal dicatat sebagai komentar (diabaikan parser Prometheus)
+            gagal = [f"# shard {shard.indeks}: {h['error']}\n" for shard, h in zip(hidup, hasil_shard) if not h.get("ok")]
+            return {"ok": True, "hasil": "".join(gagal) + teks}
+
+        # tunda / batal / status: teruskan ke shard pemilik akun
+        if isinstance(target, str):
+            target = [target]
+        if not target or "semua" in target:
+            tujuan = {shard.indeks: None for shard in self.shards}
+        else:
+            tujuan, hilang = {}, []
+            for nama in target:
+                indeks = nomor_shard(str(nama), self.jumlah_shard)
+                if str(nama).lower() not in self.shards[indeks].usernames:
+                    hilang.append(nama)
+                else:
+                    tujuan.setdefault(indeks, []).append(nama)
+            if hilang:
+                return {"ok": False, "error": f"Akun tidak ditemukan: {', '.join(map(str, hilang))}"}
+
+        hasil_shard = await asyncio.gather(*(self.kirim(self.shards[i], perintah, t) for i, t in tujuan.items()))
+        return self._gabung(perintah, hasil_shard)
+
+    def _gabung(self, perintah, hasil_shard):
+        error = [h["error"] for h in hasil_shard if not h.get("ok")]
+        sukses = [h["hasil"] for h in hasil_shard if h.get("ok")]
+
+        if perintah == "status":
+            gabungan = {"akun": 0, "ditunda": 0, "penantian_aktif": 0, "detail": {}}
+            for hasil in sukses:
+                for kunci in ("akun", "ditunda", "penantian_aktif"):
+                    gabungan[kunci] += hasil[kunci]
+                gabungan["detail"].update(hasil["detail"])
+            gabungan["shard"] = self.status_shard()
+            if error:
+                gabungan["error"] = error
+            return {"ok": True, "hasil": gabungan}
+
+        if error and not sukses:
+            return {"ok": False, "error": "; ".join(error)}
+        kunci = "ditunda" if perintah == "tunda" else "dibatalkan"
+        gabungan = {kunci: sum(hasil[kunci] for hasil in sukses)}
+        if error:
+            gabungan["error"] = error
+        return {"ok": True, "hasil": gabungan}
+
+    def _gabung_per_shard(self, shards, hasil_shard):
+        """Ringkasan profiling tiap shard (list baris) disusun berurutan dengan judul shard"""
+        baris = []
+        for shard, hasil in zip(shards, hasil_shard):
+            baris.append(f"[shard {shard.indeks}]")
+            if hasil.get("ok"):
+                baris.extend(hasil["hasil"])
+            else:
+                baris.append(f"ERROR: {hasil['error']}")
+        if not any(hasil.get("ok") for hasil in hasil_shard):
+            return {"ok": False, "error": "; ".join(hasil["error"] for hasil in hasil_shard)}
+        return {"ok": True, "hasil": baris}
+
+    def status_shard(self):
+        waktu = time.monotonic()
+        return [{
+            "shard": shard.indeks,
+            "pid": shard.proses.pid if shard.proses else None,
+            "hidup": shard.hidup(),
+            "akun": len(shard.akun_data),
+            "restart": shard.restart,
+            "detak_terakhir": round(waktu - shard.detak, 1),
+            "status": shard.status,
+        } for shard in self.shards]
+
+    # ---- jadwal harian ----
+    async def pemeliharaan_harian(self):
+        """Jam 00:01: bersihkan state dan bagi jadwal seluruh armada (worker mulai 00:05)"""
+        usernames = [username for username, _ in self.daftar_akun]
+        while True:
+            besok = sekarang().date() + timedelta(days=1)
+            target = datetime.combine(besok, datetime.min.time()) + timedelta(minutes=1)
+            await self.penjadwal.tunggu_sampai("__pemeliharaan__", target, bangun_saat=())
+            await asyncio.to_thread(bersihkan_state)
+            await asyncio.to_thread(rencanakan_jadwal, usernames)
+
+    async def jalankan_semua(self):
+        self._loop = asyncio.get_running_loop()
+
+        # Jadwal hari ini dibuat sebelum worker mulai, jadi worker memakai jadwal yang tersimpan
+        await asyncio.to_thread(bersihkan_state)
+        await asyncio.to_thread(rencanakan_jadwal, [username for username, _ in self.daftar_akun])
+
+        for shard in self.shards:
+            self.mulai_worker(shard)
+        tulis_log(f"[SHARD] {len(self.daftar_akun)} akun dibagi ke {self.jumlah_shard} worker")
+
+        try:
+            await mulai_server(self)
+            tulis_log("[INFO] Control API aktif (python absensi_kontrol.py help)")
+        except OSError as e:
+            tulis_log(f"[WARNING] Control API tidak dapat dibuka: {str(e)}")
+
+        try:
+            await asyncio.gather(self.awasi(), self.pemeliharaan_harian())
+        finally:
+            self.hentikan_semua()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan engine absensi multi akun di beberapa worker process")
+    parser.add_argument("akun", nargs="?", default=absensi_multi.AKUN_FILE, help="file akun JSON")
+    parser.add_argument("--worker", type=int, default=os.cpu_count() or 1, help="jumlah worker process")
+    parser.add_argument("--konkuren", type=int, default=absensi_multi.MAX_KONKUREN, help="maksimal request bersamaan per worker")
+    args = parser.parse_args()
+
+    try:
+        daftar_akun = [(akun.username, akun.password) for akun in absensi_multi.muat_akun(args.akun)]
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Tidak dapat membaca file akun {args.akun}: {str(e)}")
+        sys.exit(1)
+
+    if not daftar_akun:
+        print("[ERROR] Tidak ada akun yang valid!")
+        sys.exit(1)
+
+    koordinator = Koordinator(daftar_akun, args.worker, args.konkuren)
+    try:
+        asyncio.run(koordinator.jalankan_semua())
+    except KeyboardInterrupt:
+        tulis_log("[EXIT] Program dihentikan oleh pengguna")
+        koordinator.hentikan_semua()
+
+if __name__ == "__main__":
+    main()
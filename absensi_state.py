@@ -0,0 +1,215 @@
+import itertools
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# ======== STATE STORE =========
+class StateStore:
+    """
+    Penyimpanan state harian per akun di SQLite (mode WAL).
+
+    Per (username, tanggal) disimpan: jadwal pagi/sore yang sudah dipilih,
+    status tunda, hasil cek status dari server, jam absen yang berhasil,
+    dan sesi yang sedang di-hit. Setelah restart, bot bisa melanjutkan
+    jadwal yang sama tanpa login/download history ulang, dan hit yang
+    hasilnya belum pasti (crash di tengah request) dicek ulang ke server.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS harian (
+                username     TEXT NOT NULL,
+                tanggal      TEXT NOT NULL,
+                waktu_pagi   TEXT,
+                waktu_sore   TEXT,
+                tunda        INTEGER NOT NULL DEFAULT 0,
+                status_dicek INTEGER NOT NULL DEFAULT 0,
+                jam_datang   TEXT,
+                jam_pulang   TEXT,
+                proses       TEXT,
+                terlewat     TEXT,
+                diperbarui   TEXT,
+                PRIMARY KEY (username, tanggal)
+            )
+        """)
+        # Salinan lokal history absensi dari server, satu baris per (akun, tanggal)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                username     TEXT NOT NULL,
+                tanggal      TEXT NOT NULL,
+                jam_datang   TEXT,
+                jam_pulang   TEXT,
+                PRIMARY KEY (username, tanggal)
+            )
+        """)
+        # Database dari versi sebelumnya belum punya kolom terlewat
+        kolom = {row["name"] for row in self._conn.execute("PRAGMA table_info(harian)")}
+        if "terlewat" not in kolom:
+            self._conn.execute("ALTER TABLE harian ADD COLUMN terlewat TEXT")
+
+    def tutup(self):
+        with self._lock:
+            self._conn.close()
+
+    def _update(self, username, tanggal, **kolom):
+        kolom["diperbarui"] = datetime.now().isoformat(timespec="seconds")
+        nama = ", ".join(kolom)
+        tanda = ", ".join("?" for _ in kolom)
+        update = ", ".join(f"{k} = excluded.{k}" for k in kolom)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO harian (username, tanggal, {nama}) VALUES (?, ?, {tanda}) "
+                f"ON CONFLICT (username, tanggal) DO UPDATE SET {update}",
+                (username, str(tanggal), *kolom.values()),
+            )
+
+    def ambil(self, username, tanggal):
+        """Return dict state akun untuk tanggal tersebut, atau None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM harian WHERE username = ? AND tanggal = ?", (username, str(tanggal))
+            ).fetchone()
+        return dict(row) if row else None
+
+    # ---- jadwal ----
+    def jadwal(self, username, tanggal):
+        """Return (waktu_pagi, waktu_sore) yang tersimpan, atau None"""
+        state = self.ambil(username, tanggal)
+        if not state or not state["waktu_pagi"] or not state["waktu_sore"]:
+            return None
+        return datetime.fromisoformat(state["waktu_pagi"]), datetime.fromisoformat(state["waktu_sore"])
+
+    def simpan_jadwal(self, username, tanggal, waktu_pagi, waktu_sore):
+        self._update(username, tanggal,
+                     waktu_pagi=waktu_pagi.isoformat(timespec="seconds"),
+                     waktu_sore=waktu_sore.isoformat(timespec="seconds"))
+
+    def jadwal_semua(self, tanggal):
+        """Return {username: (waktu_pagi, waktu_sore)} semua akun yang sudah punya jadwal, dalam satu query"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT username, waktu_pagi, waktu_sore FROM harian "
+                "WHERE tanggal = ? AND waktu_pagi IS NOT NULL AND waktu_sore IS NOT NULL",
+                (str(tanggal),),
+            ).fetchall()
+        return {row["username"]: (datetime.fromisoformat(row["waktu_pagi"]), datetime.fromisoformat(row["waktu_sore"]))
+                for row in rows}
+
+    def simpan_jadwal_banyak(self, tanggal, usernames, waktu_pagi, waktu_sore):
+        """Simpan jadwal banyak akun sekaligus dalam satu transaksi (kolom sejajar, waktu berupa string ISO)"""
+        diperbarui = datetime.now().isoformat(timespec="seconds")
+        tanggal = str(tanggal)
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT INTO harian (username, tanggal, waktu_pagi, waktu_sore, diperbarui) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (username, tanggal) DO UPDATE SET waktu_pagi = excluded.waktu_pagi, "
+                    "waktu_sore = excluded.waktu_sore, diperbarui = excluded.diperbarui",
+                    zip(usernames, itertools.repeat(tanggal), waktu_pagi, waktu_sore, itertools.repeat(diperbarui)),
+                )
+
+    # ---- tunda ----
+    def tunda(self, username, tanggal):
+        state = self.ambil(username, tanggal)
+        return bool(state and state["tunda"])
+
+    def simpan_tunda(self, username, tanggal, tunda):
+        self._update(username, tanggal, tunda=1 if tunda else 0)
+
+    # ---- status & hit ----
+    def status(self, username, tanggal):
+        """
+        Status absensi yang bisa dipercaya tanpa cek ke server:
+        hanya jika hari ini status sudah pernah dicek dan tidak ada hit
+        yang hasilnya belum pasti. Return dict jam_datang/jam_pulang atau None.
+        """
+        state = self.ambil(username, tanggal)
+        if not state or not state["status_dicek"] or state["proses"]:
+            return None
+        return {"jam_datang": state["jam_datang"], "jam_pulang": state["jam_pulang"]}
+
+    def simpan_status(self, username, tanggal, status):
+        self._update(username, tanggal, status_dicek=1, proses=None,
+                     jam_datang=status.get("jam_datang"), jam_pulang=status.get("jam_pulang"))
+
+    def mulai_hit(self, username, tanggal, sesi):
+        """Catat niat hit sebelum request dikirim (untuk deteksi crash di tengah hit)"""
+        self._update(username, tanggal, proses=sesi)
+
+    def catat_hit(self, username, tanggal, sesi, jam):
+        kolom = "jam_datang" if sesi == "Pagi" else "jam_pulang"
+        self._update(username, tanggal, proses=None, **{kolom: jam})
+
+    def batal_hit(self, username, tanggal):
+        """Hit pasti tidak terkirim (misal login gagal), hapus tanda proses"""
+        self._update(username, tanggal, proses=None)
+
+    def tandai_terlewat(self, username, tanggal, sesi):
+        """Jendela sesi sudah lewat tanpa hit, jangan dicoba lagi hari ini"""
+        state = self.ambil(username, tanggal)
+        daftar = set(filter(None, (state["terlewat"] or "").split(","))) if state else set()
+        daftar.add(sesi)
+        self._update(username, tanggal, terlewat=",".join(sorted(daftar)))
+
+    def terlewat(self, username, tanggal):
+        state = self.ambil(username, tanggal)
+        return set(filter(None, (state["terlewat"] or "").split(","))) if state else set()
+
+    # ---- cache history ----
+    def history(self, username, tanggal):
+        """Return dict jam_datang/jam_pulang dari cache history, atau None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT jam_datang, jam_pulang FROM history WHERE username = ? AND tanggal = ?",
+                (username, str(tanggal)),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def history_akun(self, username):
+        """Return list (tanggal, jam_datang, jam_pulang) semua record cache history akun, urut tanggal"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tanggal, jam_datang, jam_pulang FROM history WHERE username = ? ORDER BY tanggal",
+                (username,),
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def history_terakhir(self, username):
+        """Tanggal record history terbaru yang sudah di-cache (string ISO), atau None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(tanggal) AS tanggal FROM history WHERE username = ?", (username,)
+            ).fetchone()
+        return row["tanggal"]
+
+    def simpan_history(self, username, records):
+        """Gabungkan record history baru ke cache dalam satu transaksi: [(tanggal, jam_datang, jam_pulang)]"""
+        if not records:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT INTO history (username, tanggal, jam_datang, jam_pulang) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (username, tanggal) DO UPDATE SET "
+                    "jam_datang = excluded.jam_datang, jam_pulang = excluded.jam_pulang",
+                    [(username, str(tanggal), jam_datang, jam_pulang) for tanggal, jam_datang, jam_pulang in records],
+                )
+
+    # ---- compaction ----
+    def bersihkan(self, simpan_hari=60, hari_ini=None, simpan_history_hari=None):
+        """Hapus state yang lebih lama dari simpan_hari (cache history: simpan_history_hari)"""
+        hari_ini = hari_ini or datetime.now().date()
+        batas = (hari_ini - timedelta(days=simpan_hari)).isoformat()
+        batas_history = (hari_ini - timedelta(days=simpan_history_hari or simpan_hari)).isoformat()
+        with self._lock:
+            hasil = self._conn.execute("DELETE FROM harian WHERE tanggal < ?", (batas,))
+            self._conn.execute("DELETE FROM history WHERE tanggal < ?", (batas_history,))
+        return hasil.rowcount
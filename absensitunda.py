@@ -23,6 +23,9 @@ LOG_FILE = "absensi_log.txt"
 TUNDA_ABSENSI = False
 TANGGAL_TUNDA = None
 
+# Di-set saat ada perintah tunda agar penantian langsung bangun (tanpa polling)
+TUNDA_EVENT = threading.Event()
+
 # ======== FUNGSI RANDOM JAM =========
 def random_jam(start_tuple, end_tuple):
     today = datetime.now().date()
@@ -63,6 +66,7 @@ def input_listener():
                 hari_ini = datetime.now().date()
                 TANGGAL_TUNDA = hari_ini
                 TUNDA_ABSENSI = True
+                TUNDA_EVENT.set()
                 tulis_log(f"[TUNDA] Absensi hari ini ({hari_ini}) ditunda!")
                 tulis_log("[INFO] Ketik 'status' untuk melihat status tunda, atau 'batal' untuk membatalkan tunda.")
                 
@@ -76,6 +80,7 @@ def input_listener():
                 if TUNDA_ABSENSI:
                     TUNDA_ABSENSI = False
                     TANGGAL_TUNDA = None
+                    TUNDA_EVENT.clear()
                     tulis_log("[BATAL] Tunda absensi dibatalkan!")
                 else:
                     tulis_log("[INFO] Tidak ada tunda absensi yang aktif")
@@ -110,10 +115,24 @@ def cek_tunda_absensi():
     if TANGGAL_TUNDA and hari_ini > TANGGAL_TUNDA:
         TUNDA_ABSENSI = False
         TANGGAL_TUNDA = None
+        TUNDA_EVENT.clear()
         tulis_log("[INFO] Reset status tunda karena tanggal sudah lewat")
     
     return False
 
+def tunggu_sampai(target_time):
+    """
+    Menunggu sampai waktu target, langsung bangun jika ada perintah tunda
+    Return False jika absensi ditunda saat menunggu
+    """
+    while True:
+        if cek_tunda_absensi():
+            return False
+        sisa = (target_time - datetime.now()).total_seconds()
+        if sisa <= 0:
+            return True
+        TUNDA_EVENT.wait(sisa)
+
 # ======== CEK STATUS ABSENSI HARI INI =========
 def cek_status_absensi():
     """
@@ -223,11 +242,9 @@ def absensi_harian():
     if jam_datang is None:
         # Belum absen masuk, tunggu jadwal pagi
         tulis_log("[WAITING] Status: Belum absen masuk, menunggu waktu absen pagi...")
-        while datetime.now() < waktu_pagi:
-            if cek_tunda_absensi():  # Cek tunda saat menunggu
-                tulis_log("[TUNDA] Absensi ditunda saat menunggu waktu pagi")
-                return
-            time.sleep(30)
+        if not tunggu_sampai(waktu_pagi):  # Cek tunda saat menunggu
+            tulis_log("[TUNDA] Absensi ditunda saat menunggu waktu pagi")
+            return
         
         if cek_tunda_absensi():  # Cek sekali lagi sebelum absen
             tulis_log("[TUNDA] Absensi ditunda sebelum eksekusi pagi")
@@ -238,11 +255,9 @@ def absensi_harian():
         
         # Setelah absen pagi, tunggu waktu sore
         tulis_log("[WAITING] Absen pagi selesai, menunggu waktu absen sore...")
-        while datetime.now() < waktu_sore:
-            if cek_tunda_absensi():  # Cek tunda saat menunggu
-                tulis_log("[TUNDA] Absensi sore ditunda saat menunggu")
-                return
-            time.sleep(30)
+        if not tunggu_sampai(waktu_sore):  # Cek tunda saat menunggu
+            tulis_log("[TUNDA] Absensi sore ditunda saat menunggu")
+            return
         
         if cek_tunda_absensi():  # Cek sekali lagi sebelum absen
             tulis_log("[TUNDA] Absensi sore ditunda sebelum eksekusi")
@@ -254,11 +269,9 @@ def absensi_harian():
     elif jam_datang is not None and jam_pulang is None:
         # Sudah absen masuk, belum absen pulang
         tulis_log(f"[WAITING] Status: Sudah absen masuk ({jam_datang}), belum absen pulang. Menunggu waktu absen sore...")
-        while datetime.now() < waktu_sore:
-            if cek_tunda_absensi():  # Cek tunda saat menunggu
-                tulis_log("[TUNDA] Absensi sore ditunda saat menunggu")
-                return
-            time.sleep(30)
+        if not tunggu_sampai(waktu_sore):  # Cek tunda saat menunggu
+            tulis_log("[TUNDA] Absensi sore ditunda saat menunggu")
+            return
         
         if cek_tunda_absensi():  # Cek sekali lagi sebelum absen
             tulis_log("[TUNDA] Absensi sore ditunda sebelum eksekusi")
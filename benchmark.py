@@ -0,0 +1,212 @@
+"""
+Benchmark bot absensi terhadap server_mock lokal.
+
+Mengukur:
+  - latency per operasi (p50/p90/p99): tulis_log, random_jam,
+    cek_status_absensi (login + download + scan history)
+  - alur absensi_harian penuh untuk 1, 100, 1000, 10000 akun:
+    durasi per akun, request per akun per hari, peak RSS, CPU,
+    dan context switch (proxy jumlah wakeup) saat semua akun menunggu
+
+Setiap jumlah akun dijalankan di subprocess terpisah agar peak RSS tidak
+tercampur. Contoh:
+    python benchmark.py
+    python benchmark.py --akun 1,100 --history 365
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+import server_mock
+
+# ======== UTILITAS =========
+def persentil(data, p):
+    if not data:
+        return 0.0
+    data = sorted(data)
+    indeks = min(len(data) - 1, int(round(p / 100 * (len(data) - 1))))
+    return data[indeks]
+
+def ringkas(nama, sampel, satuan=1000, label="ms"):
+    return (f"{nama:<32} n={len(sampel):<6} "
+            f"p50={persentil(sampel, 50) * satuan:8.3f}{label} "
+            f"p90={persentil(sampel, 90) * satuan:8.3f}{label} "
+            f"p99={persentil(sampel, 99) * satuan:8.3f}{label}")
+
+def ukur(func, jumlah):
+    sampel = []
+    for _ in range(jumlah):
+        mulai = time.perf_counter()
+        func()
+        sampel.append(time.perf_counter() - mulai)
+    return sampel
+
+def pakai_mock(base_url, log_file):
+    import absensi_inp
+    absensi_inp.BASE_URL = base_url
+    absensi_inp.LOG_FILE = log_file
+    # State baru per proses agar jadwal/hit dari run sebelumnya tidak terbawa
+    absensi_inp.STATE_FILE = os.path.join(tempfile.mkdtemp(prefix="bench_state_"), "absensi_state.db")
+    return absensi_inp
+
+def diam_ke_devnull():
+    # Output console tulis_log tidak ikut diukur
+    sys.stdout = open(os.devnull, "w")
+
+# ======== MICRO BENCHMARK =========
+def bench_operasi(base_url, log_file, jumlah):
+    absensi_inp = pakai_mock(base_url, log_file)
+    stdout_asli = sys.stdout
+    diam_ke_devnull()
+    try:
+        hasil = [
+            ("tulis_log (enqueue)", ukur(lambda: absensi_inp.tulis_log("[BENCH] baris log benchmark"), jumlah)),
+            ("random_jam", ukur(lambda: absensi_inp.random_jam(absensi_inp.PAGI_START, absensi_inp.PAGI_END), jumlah)),
+        ]
+        absensi_inp.LOG_WRITER.flush(timeout=60)
+
+        absensi_inp.USERNAME = "bench_status"
+        absensi_inp.PASSWORD = "bench"
+        # Tanpa state: tiap iterasi benar-benar download + scan history, bukan jawaban dari cache
+        absensi_inp.STATE_FILE = None
+        jumlah_status = max(1, jumlah // 100)
+        hasil.append(("cek_status_absensi", ukur(absensi_inp.cek_status_absensi, jumlah_status)))
+        absensi_inp.LOG_WRITER.flush(timeout=60)
+    finally:
+        sys.stdout = stdout_asli
+    return hasil
+
+# ======== BENCHMARK ARMADA (SUBPROCESS) =========
+async def _jalankan_armada(jumlah_akun, sebar, idle_detik):
+    import absensi_inp
+    import absensi_multi
+
+    # Jadwal dipadatkan ke beberapa detik dari sekarang agar alur penuh bisa diukur
+    def jadwal_dekat(username=None):
+        mulai = datetime.now()
+        return (mulai + timedelta(seconds=random.uniform(0, sebar)),
+                mulai + timedelta(seconds=sebar + random.uniform(0, sebar)))
+    absensi_multi.jadwal_hari_ini = jadwal_dekat
+    # Jendela sesi dibuka sepanjang hari agar jadwal dekat tidak dianggap terlewat
+    absensi_inp.PAGI_START = absensi_inp.SORE_START = (0, 0)
+    absensi_inp.PAGI_END = absensi_inp.SORE_END = (23, 59)
+    absensi_multi.HARI_ALLOWED = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(absensi_multi.ThreadPoolExecutor(max_workers=absensi_multi.MAX_KONKUREN))
+    semaphore = asyncio.Semaphore(absensi_multi.MAX_KONKUREN)
+    daftar = [absensi_multi.Akun(f"bench{i:05d}", "bench") for i in range(jumlah_akun)]
+
+    durasi = []
+
+    async def satu_akun(akun):
+        absensi_inp.AKUN_AKTIF.set(akun.username)
+        mulai = time.perf_counter()
+        await absensi_multi.absensi_harian_akun(akun, semaphore)
+        durasi.append(time.perf_counter() - mulai)
+
+    cpu_awal = time.process_time()
+    mulai = time.perf_counter()
+    await asyncio.gather(*(satu_akun(akun) for akun in daftar))
+    total = time.perf_counter() - mulai
+    cpu_alur = time.process_time() - cpu_awal
+
+    # Fase idle: semua akun menunggu deadline yang sama jauhnya
+    target = datetime.now() + timedelta(seconds=idle_detik)
+    ru_awal = resource.getrusage(resource.RUSAGE_SELF)
+    await asyncio.gather(*(absensi_multi.PENJADWAL.tunggu_sampai(a.username, target) for a in daftar))
+    ru_akhir = resource.getrusage(resource.RUSAGE_SELF)
+
+    absensi_inp.LOG_WRITER.flush(timeout=120)
+    return {
+        "durasi": durasi,
+        "total_detik": total,
+        "cpu_alur_detik": cpu_alur,
+        "idle_detik": idle_detik,
+        "idle_cpu_detik": (ru_akhir.ru_utime + ru_akhir.ru_stime) - (ru_awal.ru_utime + ru_awal.ru_stime),
+        "idle_ctx_switch": (ru_akhir.ru_nvcsw + ru_akhir.ru_nivcsw) - (ru_awal.ru_nvcsw + ru_awal.ru_nivcsw),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def anak_armada(args):
+    pakai_mock(args.base_url, args.log_file)
+    if args.dns_gagal:
+        # Resolusi DNS terjadi di proses client ini, bukan di server mock
+        server_mock.simulasi_dns_gagal(args.dns_gagal, host=urlparse(args.base_url).hostname)
+    diam_ke_devnull()
+    hasil = asyncio.run(_jalankan_armada(args.anak, args.sebar, args.idle))
+    with open(args.hasil, "w", encoding="utf-8") as f:
+        json.dump(hasil, f)
+
+def bench_armada(server, base_url, log_file, jumlah_akun, sebar, idle, dns_gagal=0.0):
+    stats_awal = dict(server.state.stats)
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        path_hasil = f.name
+
+    perintah = [sys.executable, os.path.abspath(__file__), "--anak", str(jumlah_akun),
+                "--base-url", base_url, "--log-file", log_file, "--hasil", path_hasil,
+                "--sebar", str(sebar), "--idle", str(idle), "--dns-gagal", str(dns_gagal)]
+    subprocess.run(perintah, check=True)
+
+    with open(path_hasil, "r", encoding="utf-8") as f:
+        hasil = json.load(f)
+    os.remove(path_hasil)
+
+    total_request = sum(server.state.stats.values()) - sum(stats_awal.values())
+    hasil["request_per_akun"] = total_request / jumlah_akun
+    return hasil
+
+# ======== MAIN =========
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bot absensi terhadap server_mock lokal")
+    parser.add_argument("--akun", default="1,100,1000,10000", help="daftar jumlah akun, pisahkan dengan koma")
+    parser.add_argument("--operasi", type=int, default=10000, help="jumlah iterasi micro benchmark")
+    parser.add_argument("--history", type=int, default=90, help="hari history per akun di server mock")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency server mock (detik)")
+    parser.add_argument("--sebar", type=float, default=5.0, help="detik sebaran jadwal pagi/sore di benchmark armada")
+    parser.add_argument("--idle", type=float, default=5.0, help="detik fase idle untuk menghitung wakeup")
+    parser.add_argument("--dns-gagal", type=float, default=0.0, help="peluang resolusi DNS host server gagal di client (benchmark armada)")
+    # Argumen internal untuk subprocess
+    parser.add_argument("--anak", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--log-file", help=argparse.SUPPRESS)
+    parser.add_argument("--hasil", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.anak:
+        anak_armada(args)
+        return
+
+    server, base_url = server_mock.jalankan_di_background(
+        config={"latency": args.latency}, hari_history=args.history)
+    folder = tempfile.mkdtemp(prefix="bench_absensi_")
+    log_file = os.path.join(folder, "absensi_log.txt")
+
+    print(f"[BENCH] Server mock: {base_url} (history {args.history} hari, latency {args.latency}s)")
+    print("[BENCH] ===== Latency per operasi =====")
+    for nama, sampel in bench_operasi(base_url, log_file, args.operasi):
+        print("[BENCH] " + ringkas(nama, sampel))
+
+    print("[BENCH] ===== Alur absensi_harian per jumlah akun =====")
+    for jumlah in [int(x) for x in args.akun.split(",") if x.strip()]:
+        hasil = bench_armada(server, base_url, log_file, jumlah, args.sebar, args.idle, args.dns_gagal)
+        print(f"[BENCH] akun={jumlah}")
+        print("[BENCH]   " + ringkas("durasi alur per akun", hasil["durasi"], 1, "s"))
+        print(f"[BENCH]   total={hasil['total_detik']:.2f}s cpu={hasil['cpu_alur_detik']:.2f}s "
+              f"request/akun/hari={hasil['request_per_akun']:.2f} peak_rss={hasil['peak_rss_kb'] / 1024:.1f}MB")
+        print(f"[BENCH]   idle {hasil['idle_detik']:.0f}s: cpu={hasil['idle_cpu_detik'] * 1000:.1f}ms "
+              f"context_switch={hasil['idle_ctx_switch']}")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
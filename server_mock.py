@@ -0,0 +1,351 @@
+"""
+Server tiruan (mock) untuk endpoint naradaya yang dipakai bot absensi:
+  - POST login/confirm
+  - GET  absensi/history/kemarin (HEAD untuk cek session)
+  - POST absensi/hit
+
+Dipakai untuk load test / regression test tanpa menyentuh server asli.
+Latency, error rate, timeout, koneksi putus, session kadaluarsa dan
+selisih jam server bisa diatur lewat argumen CLI atau saat berjalan lewat
+POST /_mock/config (JSON). Statistik request ada di GET /_mock/stats.
+
+Contoh:
+    python server_mock.py --port 8099 --latency 0.2 --error-rate 0.05
+    ABSENSI_BASE_URL=http://127.0.0.1:8099/ python absensi_multi.py akun.json
+"""
+import argparse
+import email.utils
+import json
+import random
+import secrets
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# ======== KONFIGURASI DEFAULT =========
+CONFIG_DEFAULT = {
+    "latency": 0.0,         # detik, latency dasar setiap request
+    "jitter": 0.0,          # detik, tambahan latency acak 0..jitter
+    "error_rate": 0.0,      # peluang response 503
+    "timeout_rate": 0.0,    # peluang server diam selama timeout_detik
+    "timeout_detik": 35.0,  # lebih lama dari REQUEST_TIMEOUT client
+    "putus_rate": 0.0,      # peluang koneksi ditutup tanpa response
+    "sesi_ttl": 0,          # detik umur session login (0 = tidak kadaluarsa)
+    "clock_offset": 0.0,    # detik, selisih jam server terhadap jam lokal
+}
+
+
+class StateMock:
+    """Data akun, session dan history absensi di memori"""
+
+    def __init__(self, config, akun=None, hari_history=30, jam=None):
+        self.config = dict(config)
+        self.jam = jam or datetime.now   # bisa diganti jam virtual (simulasi.py)
+        self.akun = akun            # {username: password} atau None = terima semua
+        self.hari_history = hari_history
+        self.sesi = {}              # token -> (username, waktu login)
+        self.history = {}           # username -> {tanggal: record}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def sekarang(self):
+        return self.jam() + timedelta(seconds=self.config["clock_offset"])
+
+    def catat(self, kunci):
+        with self.lock:
+            self.stats[kunci] = self.stats.get(kunci, 0) + 1
+
+    def login(self, username, password):
+        if not username or not password:
+            return None
+        if self.akun is not None and self.akun.get(username) != password:
+            return None
+        token = secrets.token_hex(16)
+        with self.lock:
+            self.sesi[token] = (username, time.monotonic())
+        return token
+
+    def user_dari_token(self, token):
+        with self.lock:
+            data = self.sesi.get(token)
+            if data is None:
+                return None
+            username, waktu_login = data
+            ttl = self.config["sesi_ttl"]
+            if ttl and time.monotonic() - waktu_login > ttl:
+                del self.sesi[token]
+                return None
+            return username
+
+    def records(self, username):
+        with self.lock:
+            if username not in self.history:
+                self.history[username] = self._buat_history()
+            data = self.history[username]
+            return [data[k] for k in sorted(data)]
+
+    def _buat_history(self):
+        # Isi history hari-hari sebelumnya agar ukuran payload realistis
+        hari_ini = self.sekarang().date()
+        data = {}
+        for i in range(self.hari_history, 0, -1):
+            tanggal = hari_ini - timedelta(days=i)
+            if tanggal.weekday() == 6:
+                continue
+            data[tanggal.isoformat()] = {
+                "tanggal": f"{tanggal.isoformat()} 00:00:00",
+                "jam_datang": f"07:{random.randint(45, 59):02d}:{random.randint(0, 59):02d}",
+                "jam_pulang": f"17:{random.randint(10, 59):02d}:{random.randint(0, 59):02d}",
+            }
+        return data
+
+    def hit(self, username):
+        """Catat absen: jam_datang jika belum ada, selain itu jam_pulang"""
+        self.records(username)
+        sekarang = self.sekarang()
+        tanggal = sekarang.date().isoformat()
+        jam = sekarang.strftime("%H:%M:%S")
+
+        with self.lock:
+            data = self.history[username]
+            record = data.setdefault(tanggal, {
+                "tanggal": f"{tanggal} 00:00:00",
+                "jam_datang": None,
+                "jam_pulang": None,
+            })
+            if record["jam_datang"] is None:
+                record["jam_datang"] = jam
+                return "datang", jam
+            record["jam_pulang"] = jam
+            return "pulang", jam
+
+
+# ======== HANDLER HTTP =========
+class HandlerMock(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # header & body ditulis terpisah, hindari delay 40ms
+    state = None    # di-set oleh buat_server()
+
+    def log_message(self, format, *args):
+        pass
+
+    def date_time_string(self, timestamp=None):
+        # Header Date mengikuti jam server (termasuk clock_offset)
+        if timestamp is None:
+            timestamp = self.state.sekarang().timestamp()
+        return email.utils.formatdate(timestamp, usegmt=True)
+
+    # ---- utilitas ----
+    def _kirim(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for nama, nilai in (headers or {}).items():
+            self.send_header(nama, nilai)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _kirim_json(self, status, data):
+        self._kirim(status, json.dumps(data), "application/json")
+
+    def _redirect_login(self):
+        self._kirim(302, "", headers={"Location": "/"})
+
+    def _baca_form(self):
+        panjang = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(panjang).decode("utf-8") if panjang else ""
+        return {k: v[0] for k, v in parse_qs(body).items()}
+
+    def _user(self):
+        cookie = self.headers.get("Cookie", "")
+        for bagian in cookie.split(";"):
+            nama, _, nilai = bagian.strip().partition("=")
+            if nama == "ci_session":
+                return self.state.user_dari_token(nilai)
+        return None
+
+    def _gangguan(self):
+        """Terapkan latency dan fault injection. Return True jika request sudah ditangani"""
+        config = self.state.config
+        jeda = config["latency"] + random.uniform(0, config["jitter"])
+        if jeda > 0:
+            time.sleep(jeda)
+
+        if random.random() < config["putus_rate"]:
+            self.state.catat("fault_putus")
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return True
+        if random.random() < config["timeout_rate"]:
+            self.state.catat("fault_timeout")
+            time.sleep(config["timeout_detik"])
+            self.close_connection = True
+            return True
+        if random.random() < config["error_rate"]:
+            self.state.catat("fault_error")
+            self._kirim(503, "Service Unavailable")
+            return True
+        return False
+
+    # ---- routing ----
+    def do_GET(self):
+        path = self.path.split("?")[0].strip("/")
+
+        if path == "_mock/stats":
+            with self.state.lock:
+                self._kirim_json(200, dict(self.state.stats))
+            return
+        if path == "":
+            self._kirim(200, "<html><body><form action='login/confirm'>Login</form></body></html>")
+            return
+
+        self.state.catat(f"GET {path}")
+        if self._gangguan():
+            return
+
+        if path == "absensi/history/kemarin":
+            username = self._user()
+            if username is None:
+                self._redirect_login()
+                return
+            self._kirim_json(200, self.state.records(username))
+            return
+
+        self._kirim(404, "Not Found")
+
+    def do_HEAD(self):
+        """Cek session tanpa body (dipakai pemanasan koneksi bot)"""
+        path = self.path.split("?")[0].strip("/")
+        if path == "":
+            self._kirim(200, "")
+            return
+
+        self.state.catat(f"HEAD {path}")
+        if self._gangguan():
+            return
+
+        if path == "absensi/history/kemarin":
+            if self._user() is None:
+                self._redirect_login()
+                return
+            self._kirim(200, "", "application/json")
+            return
+
+        self._kirim(404, "Not Found")
+
+    def do_POST(self):
+        path = self.path.split("?")[0].strip("/")
+
+        if path == "_mock/config":
+            panjang = int(self.headers.get("Content-Length") or 0)
+            perubahan = json.loads(self.rfile.read(panjang) or b"{}")
+            with self.state.lock:
+                for kunci, nilai in perubahan.items():
+                    if kunci in self.state.config:
+                        self.state.config[kunci] = type(CONFIG_DEFAULT[kunci])(nilai)
+                self._kirim_json(200, dict(self.state.config))
+            return
+
+        self.state.catat(f"POST {path}")
+        if self._gangguan():
+            return
+
+        if path == "login/confirm":
+            form = self._baca_form()
+            token = self.state.login(form.get("login", ""), form.get("password", ""))
+            if token is None:
+                self._kirim(200, "<html><body>Login gagal, username atau password salah</body></html>")
+                return
+            self._kirim(200, "<html><body>Selamat datang</body></html>",
+                        headers={"Set-Cookie": f"ci_session={token}; Path=/"})
+            return
+
+        if path == "absensi/hit":
+            self._baca_form()
+            username = self._user()
+            if username is None:
+                self._redirect_login()
+                return
+            jenis, jam = self.state.hit(username)
+            pesan = "Absen datang berhasil" if jenis == "datang" else "Absen pulang berhasil"
+            self._kirim_json(200, {"status": "success", "message": pesan, "jam": jam})
+            return
+
+        self._kirim(404, "Not Found")
+
+
+# ======== SERVER =========
+def buat_server(host="127.0.0.1", port=0, config=None, akun=None, hari_history=30, jam=None):
+    """Buat ThreadingHTTPServer mock (port=0 = pilih port kosong otomatis)"""
+    state = StateMock(dict(CONFIG_DEFAULT, **(config or {})), akun, hari_history, jam)
+    handler = type("HandlerMockTerikat", (HandlerMock,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+def jalankan_di_background(**kwargs):
+    """
+    Jalankan server mock di thread daemon
+    Return: (server, base_url) — panggil server.shutdown() untuk berhenti
+    """
+    server = buat_server(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, name="server-mock", daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/"
+
+def simulasi_dns_gagal(rate=1.0, host=None):
+    """
+    Buat resolusi DNS di proses ini gagal dengan peluang rate
+    (untuk host tertentu saja jika host diisi). Return fungsi untuk mengembalikan.
+    Dipanggil di proses client (opsi --dns-gagal benchmark.py / simulasi.py),
+    bukan di server: yang me-resolve nama host adalah client.
+    """
+    asli = socket.getaddrinfo
+
+    def getaddrinfo_gagal(nama, *args, **kwargs):
+        if (host is None or nama == host) and random.random() < rate:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return asli(nama, *args, **kwargs)
+
+    socket.getaddrinfo = getaddrinfo_gagal
+
+    def pulihkan():
+        socket.getaddrinfo = asli
+    return pulihkan
+
+def muat_akun_mock(path):
+    """Baca akun.json (format sama dengan absensi_multi) menjadi {username: password}"""
+    with open(path, "r", encoding="utf-8") as f:
+        return {item["username"]: item["password"] for item in json.load(f)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Server mock endpoint naradaya untuk testing bot absensi")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--akun", help="file akun.json; jika kosong semua login diterima")
+    parser.add_argument("--hari-history", type=int, default=30, help="jumlah hari history awal per akun")
+    for kunci, nilai in CONFIG_DEFAULT.items():
+        parser.add_argument("--" + kunci.replace("_", "-"), type=type(nilai), default=nilai)
+    args = parser.parse_args()
+
+    config = {kunci: getattr(args, kunci) for kunci in CONFIG_DEFAULT}
+    akun = muat_akun_mock(args.akun) if args.akun else None
+    server = buat_server(args.host, args.port, config, akun, args.hari_history)
+
+    host, port = server.server_address[:2]
+    print(f"[MOCK] Server mock berjalan di http://{host}:{port}/", flush=True)
+    print(f"[MOCK] Config: {json.dumps(config)}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("[MOCK] Server dihentikan")
+
+if __name__ == "__main__":
+    main()
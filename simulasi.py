@@ -0,0 +1,151 @@
+"""
+Simulasi jadwal absensi banyak akun dengan jam virtual.
+
+Engine absensi_multi dijalankan apa adanya terhadap server_mock lokal,
+tetapi memakai JamVirtual: waktu langsung melompat ke deadline berikutnya,
+jadi setahun jadwal (termasuk hari Minggu, tunda/batal dan rollover 00:05)
+selesai dalam hitungan detik. Berguna untuk testing dan capacity planning.
+
+Contoh:
+    python simulasi.py --akun 20 --hari 365 --mulai 2026-01-01 --tunda-rate 0.05
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+import absensi_inp
+import absensi_jadwal
+import absensi_multi
+import server_mock
+
+# ======== SIMULASI =========
+async def penunda(daftar_akun, mulai, hari, tunda_rate, batal_rate):
+    """Setiap hari jam 06:00 sebagian akun menunda absensi, sebagian dibatalkan jam 10:00"""
+    statistik = {"tunda": 0, "batal": 0}
+    for i in range(hari):
+        tanggal = mulai + timedelta(days=i)
+
+        await absensi_multi.PENJADWAL.tunggu_sampai("__penunda__", datetime.combine(tanggal, datetime.min.time()).replace(hour=6), bangun_saat=())
+        ditunda = [akun for akun in daftar_akun if random.random() < tunda_rate]
+        for akun in ditunda:
+            await akun.set_tunda()
+        statistik["tunda"] += len(ditunda)
+
+        await absensi_multi.PENJADWAL.tunggu_sampai("__penunda__", datetime.combine(tanggal, datetime.min.time()).replace(hour=10), bangun_saat=())
+        for akun in ditunda:
+            if random.random() < batal_rate and await akun.batal_tunda():
+                statistik["batal"] += 1
+    return statistik
+
+async def jalankan(daftar_akun, mulai, hari, tunda_rate, batal_rate, max_konkuren):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max_konkuren))
+    semaphore = asyncio.Semaphore(max_konkuren)
+
+    # Sama seperti main_async: jadwal semua akun dibagi rata setiap hari
+    absensi_inp.rencanakan_jadwal([akun.username for akun in daftar_akun])
+    tasks = [asyncio.create_task(absensi_multi.loop_akun(akun, semaphore)) for akun in daftar_akun]
+    tasks.append(asyncio.create_task(absensi_multi.pemeliharaan_harian(daftar_akun)))
+    task_penunda = asyncio.create_task(penunda(daftar_akun, mulai, hari, tunda_rate, batal_rate))
+
+    akhir = datetime.combine(mulai + timedelta(days=hari), datetime.min.time())
+    await absensi_multi.PENJADWAL.tunggu_sampai("__simulasi__", akhir, bangun_saat=())
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return await task_penunda
+
+def dalam_jendela(jam_str, start_tuple, end_tuple):
+    if not jam_str:
+        return False
+    jam = tuple(int(x) for x in jam_str.split(":")[:2])
+    return start_tuple <= jam <= end_tuple
+
+def ringkasan(server, daftar_akun, mulai, hari):
+    """Hitung hasil absen per hari dari data yang tercatat di server mock"""
+    hari_kerja = sum(1 for i in range(hari) if (mulai + timedelta(days=i)).weekday() != 6)
+    hasil = {"hari_kerja": hari_kerja, "datang": 0, "pulang": 0, "di_luar_jendela": 0, "hit_minggu": 0}
+    per_detik = {}
+
+    batas_awal = mulai.isoformat()
+    batas_akhir = (mulai + timedelta(days=hari)).isoformat()
+    for akun in daftar_akun:
+        for record in server.state.records(akun.username):
+            tanggal = record["tanggal"].split(" ")[0]
+            if not (batas_awal <= tanggal < batas_akhir):
+                continue
+            if date.fromisoformat(tanggal).weekday() == 6:
+                hasil["hit_minggu"] += 1
+            for jam in (record["jam_datang"], record["jam_pulang"]):
+                if jam:
+                    per_detik[(tanggal, jam)] = per_detik.get((tanggal, jam), 0) + 1
+            if record["jam_datang"]:
+                hasil["datang"] += 1
+                if not dalam_jendela(record["jam_datang"], absensi_inp.PAGI_START, absensi_inp.PAGI_END):
+                    hasil["di_luar_jendela"] += 1
+            if record["jam_pulang"]:
+                hasil["pulang"] += 1
+                if not dalam_jendela(record["jam_pulang"], absensi_inp.SORE_START, absensi_inp.SORE_END):
+                    hasil["di_luar_jendela"] += 1
+    hasil["puncak_per_detik"] = max(per_detik.values(), default=0)
+    return hasil
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulasi jadwal absensi multi akun dengan jam virtual")
+    parser.add_argument("--akun", type=int, default=10, help="jumlah akun simulasi")
+    parser.add_argument("--hari", type=int, default=30, help="jumlah hari yang disimulasikan")
+    parser.add_argument("--mulai", default=date.today().isoformat(), help="tanggal mulai (YYYY-MM-DD)")
+    parser.add_argument("--tunda-rate", type=float, default=0.0, help="peluang akun menunda absensi per hari")
+    parser.add_argument("--batal-rate", type=float, default=0.5, help="peluang tunda dibatalkan lagi")
+    parser.add_argument("--konkuren", type=int, default=absensi_multi.MAX_KONKUREN)
+    parser.add_argument("--dns-gagal", type=float, default=0.0, help="peluang resolusi DNS host server gagal di client")
+    parser.add_argument("--seed", type=int, help="seed random agar hasil bisa diulang")
+    parser.add_argument("--log", help="file log (default: file sementara, console dimatikan)")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    mulai = date.fromisoformat(args.mulai)
+    jam = absensi_jadwal.pakai_jam(absensi_jadwal.JamVirtual(datetime.combine(mulai, datetime.min.time())))
+    server, base_url = server_mock.jalankan_di_background(jam=jam.sekarang, hari_history=0)
+
+    absensi_inp.BASE_URL = base_url
+    if args.dns_gagal:
+        server_mock.simulasi_dns_gagal(args.dns_gagal, host=urlparse(base_url).hostname)
+    folder = tempfile.mkdtemp(prefix="simulasi_absensi_")
+    absensi_inp.LOG_FILE = args.log or os.path.join(folder, "absensi_log.txt")
+    absensi_inp.STATE_FILE = os.path.join(folder, "absensi_state.db")
+    stdout_asli = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+
+    daftar_akun = [absensi_multi.Akun(f"sim{i:05d}", "sim") for i in range(args.akun)]
+    mulai_wall = time.perf_counter()
+    try:
+        statistik = asyncio.run(jalankan(daftar_akun, mulai, args.hari, args.tunda_rate, args.batal_rate, args.konkuren))
+        absensi_inp.LOG_WRITER.flush(timeout=60)
+    finally:
+        sys.stdout = stdout_asli
+    durasi = time.perf_counter() - mulai_wall
+
+    hasil = ringkasan(server, daftar_akun, mulai, args.hari)
+    server.shutdown()
+
+    print(f"[SIMULASI] {args.akun} akun x {args.hari} hari ({mulai} s/d {jam.sekarang():%Y-%m-%d %H:%M}) selesai dalam {durasi:.2f} detik")
+    print(f"[SIMULASI] Hari kerja: {hasil['hari_kerja']}, tunda: {statistik['tunda']}, tunda dibatalkan: {statistik['batal']}")
+    print(f"[SIMULASI] Absen datang: {hasil['datang']}, absen pulang: {hasil['pulang']} "
+          f"(maksimal {hasil['hari_kerja'] * args.akun} masing-masing)")
+    print(f"[SIMULASI] Di luar jendela: {hasil['di_luar_jendela']}, absen di hari Minggu: {hasil['hit_minggu']}")
+    print(f"[SIMULASI] Puncak hit per detik: {hasil['puncak_per_detik']}")
+    print(f"[SIMULASI] Log: {absensi_inp.LOG_FILE}")
+
+if __name__ == "__main__":
+    main()